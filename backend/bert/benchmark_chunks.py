@@ -0,0 +1,179 @@
+'''
+Compares one-vector-per-post search against chunked (multi-vector) search.
+
+Each query is a short passage cut from a post, and a query counts as a hit
+if that post comes back in the top k (known-item recall@k). Passages are
+taken from the head of the post (inside the first 512 tokens, which the
+single post vector sees) and from the tail (past 512 tokens, which only the
+chunk vectors see). Reports index size, single-query latency and recall@k
+for the post index and for the chunk index in each storage mode.
+'''
+
+import argparse
+import random
+import time
+
+import numpy as np
+import torch
+
+from backend.src.api.chunk_utils import segment_max
+from backend.src.api.content_utils import post_text
+from backend.src.api.embedding_utils import load_chunk_artifact, load_embedding_artifact
+from backend.src.api.index_utils import DenseIndex
+from backend.src.api.modern_bert_utils import (
+    CHUNK_EMBEDDINGS_PATH,
+    EMBEDDINGS_PATH,
+    _query_posts,
+    embed_texts,
+    tokenizer,
+)
+
+MAX_LENGTH = 512
+
+
+def make_passages(posts, n_queries, passage_tokens, region):
+    """Return (post id, passage) pairs cut from the head or tail of posts."""
+    rng = random.Random(0)
+    passages = []
+    for post in rng.sample(posts, len(posts)):
+        tokens = tokenizer(
+            post_text(post.page_title, post.page_description, post.content),
+            add_special_tokens = False,
+            verbose = False,
+        )["input_ids"]
+        if len(tokens) < MAX_LENGTH + passage_tokens:
+            continue
+        if region == "head":
+            start = rng.randrange(0, MAX_LENGTH - passage_tokens)
+        else:
+            start = rng.randrange(MAX_LENGTH, len(tokens) - passage_tokens + 1)
+        passages.append((post.id, tokenizer.decode(tokens[start:start + passage_tokens])))
+        if len(passages) == n_queries:
+            break
+    return passages
+
+
+def search_posts(index, row_post_ids, q_emb, k):
+    _, rows = index.search(q_emb, k)
+    return [row_post_ids[row] for row in rows[0] if row >= 0]
+
+
+def search_chunks(index, chunk_post_ids, q_emb, k, multiplier):
+    fetch = k * multiplier
+    while True:
+        distances, rows = index.search(q_emb, min(fetch, index.ntotal))
+        found = rows[0] >= 0
+        post_ids, _ = segment_max(
+            -torch.from_numpy(distances[0][found]),
+            chunk_post_ids[torch.from_numpy(rows[0][found])],
+        )
+        if len(post_ids) >= k or fetch >= index.ntotal:
+            return post_ids[:k].tolist()
+        fetch *= 2
+
+
+def benchmark(search, queries, k):
+    hits = 0
+    start = time.perf_counter()
+    for post_id, q_emb in queries:
+        hits += post_id in search(q_emb, k)
+    latency_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    return hits / len(queries), latency_ms
+
+
+# --------------------------
+# ----- MAIN CLI ENTRY -----
+# --------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Benchmark chunked vs per-post embeddings")
+
+    parser.add_argument("--embeddings-path",
+                        type = str,
+                        default = EMBEDDINGS_PATH,
+                        help = "Per-post embedding artifact")
+
+    parser.add_argument("--chunk-embeddings-path",
+                        type = str,
+                        default = CHUNK_EMBEDDINGS_PATH,
+                        help = "Chunk embedding artifact")
+
+    parser.add_argument("--k",
+                        type = int,
+                        default = 10,
+                        help = "Results per query")
+
+    parser.add_argument("--queries",
+                        type = int,
+                        default = 200,
+                        help = "Passages per region (head and tail)")
+
+    parser.add_argument("--passage-tokens",
+                        type = int,
+                        default = 48,
+                        help = "Tokens per query passage")
+
+    parser.add_argument("--modes",
+                        nargs = "+",
+                        default = ["flat", "fp16", "sq8"],
+                        help = "Storage modes for the chunk index")
+
+    parser.add_argument("--multiplier",
+                        type = int,
+                        default = 4,
+                        help = "Chunks fetched per requested post")
+
+    args = parser.parse_args()
+
+    posts = _query_posts()
+
+    post_embeddings, _ = load_embedding_artifact(args.embeddings_path)
+    row_post_ids = list(post_embeddings)
+    post_vectors = torch.stack([post_embeddings[post_id] for post_id in row_post_ids]).float().numpy()
+    post_index = DenseIndex(post_vectors.shape[1], mode = "flat", rerank_n = 0)
+    post_index.build(post_vectors, np.arange(len(row_post_ids), dtype = "int64"))
+
+    chunk_vectors, chunk_post_ids, _ = load_chunk_artifact(args.chunk_embeddings_path)
+    chunk_rows = np.arange(len(chunk_post_ids), dtype = "int64")
+    print(f"{len(row_post_ids)} post vectors, {len(chunk_post_ids)} chunk vectors "
+          f"({len(chunk_post_ids) / len(torch.unique(chunk_post_ids)):.2f} chunks/post)\n")
+
+    indexes = [("post", "flat", post_index,
+                lambda q, k: search_posts(post_index, row_post_ids, q, k))]
+    for mode in args.modes:
+        index = DenseIndex(chunk_vectors.shape[1], mode = mode, rerank_n = 0)
+        index.build(chunk_vectors.float().numpy(), chunk_rows)
+        indexes.append(("chunk", mode, index,
+                        lambda q, k, index = index: search_chunks(index, chunk_post_ids, q, k, args.multiplier)))
+
+    regions = {}
+    for region in ("head", "tail"):
+        passages = make_passages(posts, args.queries, args.passage_tokens, region)
+        embedded = embed_texts([text for _, text in passages]).numpy() if passages else []
+        regions[region] = [(post_id, q[None, :]) for (post_id, _), q in zip(passages, embedded)]
+
+    print(f"Known-item recall@{args.k} ({len(regions['head'])} head / {len(regions['tail'])} tail passages)\n")
+    print(f"{'vectors':<8} {'mode':<6} {'index MiB':>10} {'ms/query':>9} {'head':>7} {'tail':>7}")
+    for granularity, mode, index, search in indexes:
+        size_mib = index.memory_per_vector() * index.ntotal / 2**20
+        row = f"{granularity:<8} {mode:<6} {size_mib:>10.2f}"
+        latencies = []
+        recalls = []
+        for region in ("head", "tail"):
+            if not regions[region]:
+                recalls.append(float("nan"))
+                continue
+            recall, latency = benchmark(search, regions[region], args.k)
+            recalls.append(recall)
+            latencies.append(latency)
+        print(f"{row} {np.mean(latencies):>9.3f} {recalls[0]:>7.3f} {recalls[1]:>7.3f}")
+
+"""
+HOW TO RUN:
+python -m backend.bert.embed_blogs --chunked
+python -m backend.bert.benchmark_chunks
+python -m backend.bert.benchmark_chunks --modes fp16 sq8 --k 5 --passage-tokens 32
+
+Only posts longer than 512 tokens (plus one passage) are sampled, since
+shorter posts are fully covered by their single post vector.
+"""
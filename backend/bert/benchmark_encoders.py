@@ -0,0 +1,84 @@
+'''
+Compares query-encoding backends for the API (PyTorch fp32, ONNX Runtime fp32,
+ONNX Runtime int8). Reports single-query latency, batched throughput and the
+cosine agreement of each backend with the PyTorch reference.
+'''
+
+import argparse
+import json
+import time
+
+import torch
+
+from backend.src.api.modern_bert_utils import embed_texts
+
+QUERIES_PATH = "backend/data/queries.json"
+
+
+def benchmark_encoder(backend, texts, batch_size=16, repeats=50):
+    # Warm-up also triggers the ONNX export / session load on first use
+    embed_texts(texts[:1], backend=backend)
+
+    latencies = []
+    for i in range(repeats):
+        start = time.perf_counter()
+        embed_texts([texts[i % len(texts)]], backend=backend)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+
+    start = time.perf_counter()
+    for i in range(0, len(texts), batch_size):
+        embed_texts(texts[i:i + batch_size], backend=backend)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "p50_ms": latencies[len(latencies) // 2],
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        "texts_per_sec": len(texts) / elapsed,
+    }
+
+
+# --------------------------
+# ----- MAIN CLI ENTRY -----
+# --------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Benchmark ModernBERT query encoder backends")
+
+    parser.add_argument("--backends",
+                        nargs = "+",
+                        default = ["torch", "onnx", "onnx-int8"],
+                        help = "Backends to compare")
+
+    parser.add_argument("--batch-size",
+                        type = int,
+                        default = 16,
+                        help = "Batch size for the throughput run")
+
+    parser.add_argument("--repeats",
+                        type = int,
+                        default = 50,
+                        help = "Number of single-query latency samples")
+
+    args = parser.parse_args()
+
+    with open(QUERIES_PATH, "r") as f:
+        texts = json.load(f)["queries"]
+
+    # Repeat the query set so the throughput run has enough batches
+    texts = texts * 10
+    reference = embed_texts(texts[:10], backend = "torch")
+
+    print(f"{'backend':<10} {'p50 ms':>8} {'p95 ms':>8} {'texts/s':>9} {'min cos':>8}")
+    for backend in args.backends:
+        stats = benchmark_encoder(backend, texts, args.batch_size, args.repeats)
+        emb = embed_texts(texts[:10], backend = backend)
+        min_cos = torch.nn.functional.cosine_similarity(emb, reference, dim = 1).min().item()
+        print(f"{backend:<10} {stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} "
+              f"{stats['texts_per_sec']:>9.1f} {min_cos:>8.4f}")
+
+"""
+HOW TO RUN:
+python -m backend.bert.benchmark_encoders
+python -m backend.bert.benchmark_encoders --backends torch onnx-int8 --batch-size 32
+"""
@@ -0,0 +1,134 @@
+'''
+Compares dense index storage modes (flat, fp16, sq8, pq, binary) and
+Matryoshka-truncated dimensions, with and without exact full-dimension
+re-ranking, against an exact full-dimension IndexFlatL2 baseline. Reports
+resident memory per vector, single-query latency and recall@k.
+
+Queries are perturbed copies of corpus vectors, so no encoder is needed.
+'''
+
+import argparse
+import os
+import tempfile
+import time
+
+import faiss
+import numpy as np
+import torch
+
+from backend.src.api.embedding_utils import load_embedding_artifact
+from backend.src.api.index_utils import STORAGE_MODES, DenseIndex
+
+EMBEDDINGS_PATH = os.getenv("EMBEDDINGS_PATH", "s3://travel-recommender-s3/travel_blog_embeddings.pt")
+
+
+def load_vectors(path, synthetic):
+    if synthetic:
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((synthetic, 768)).astype("float32")
+    else:
+        embeddings, _ = load_embedding_artifact(path)
+        vectors = torch.stack(list(embeddings.values())).numpy()
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def make_queries(vectors, n_queries, noise=0.05):
+    rng = np.random.default_rng(1)
+    picks = vectors[rng.choice(len(vectors), n_queries, replace=False)]
+    queries = picks + noise * rng.standard_normal(picks.shape).astype("float32")
+    return (queries / np.linalg.norm(queries, axis=1, keepdims=True)).astype("float32")
+
+
+def recall_at_k(ids, truth):
+    hits = sum(len(set(row) & set(gt)) for row, gt in zip(ids, truth))
+    return hits / truth.size
+
+
+def benchmark(index, queries, k):
+    ids = []
+    start = time.perf_counter()
+    for q in queries:
+        _, row = index.search(q[None, :], k)
+        ids.append(row[0])
+    latency_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    return np.array(ids), latency_ms
+
+
+# --------------------------
+# ----- MAIN CLI ENTRY -----
+# --------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Benchmark FAISS storage modes")
+
+    parser.add_argument("--embeddings-path",
+                        type = str,
+                        default = EMBEDDINGS_PATH,
+                        help = "Embedding artifact to index")
+
+    parser.add_argument("--synthetic",
+                        type = int,
+                        default = 0,
+                        help = "Use N random vectors instead of the artifact")
+
+    parser.add_argument("--k",
+                        type = int,
+                        default = 10,
+                        help = "Results per query")
+
+    parser.add_argument("--queries",
+                        type = int,
+                        default = 200,
+                        help = "Number of benchmark queries")
+
+    parser.add_argument("--dims",
+                        type = int,
+                        nargs = "+",
+                        default = [0],
+                        help = "Index dimensions to compare, e.g. 768 512 256 128 (0 = full)")
+
+    parser.add_argument("--modes",
+                        nargs = "+",
+                        default = list(STORAGE_MODES),
+                        help = "Storage modes to compare")
+
+    parser.add_argument("--rerank-n",
+                        type = int,
+                        default = 100,
+                        help = "Candidates re-ranked at full precision")
+
+    args = parser.parse_args()
+
+    vectors = load_vectors(args.embeddings_path, args.synthetic)
+    queries = make_queries(vectors, min(args.queries, len(vectors)))
+    ids = np.arange(len(vectors), dtype = "int64")
+
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    _, truth = exact.search(queries, args.k)
+
+    print(f"{len(vectors)} vectors x {vectors.shape[1]} dims, recall@{args.k} vs IndexFlatL2\n")
+    print(f"{'mode':<8} {'dim':>5} {'rerank':>6} {'bytes/vec':>10} {'ms/query':>9} {'recall':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for dim in args.dims:
+            for mode in args.modes:
+                for rerank_n in (0, args.rerank_n):
+                    index = DenseIndex(
+                        vectors.shape[1],
+                        mode = mode,
+                        rerank_n = rerank_n,
+                        vectors_path = f"{tmp}/{mode}.f32",
+                        index_dim = dim or vectors.shape[1],
+                    ).build(vectors, ids)
+                    found, latency = benchmark(index, queries, args.k)
+                    print(f"{mode:<8} {index.index_dim:>5} {rerank_n:>6} {index.memory_per_vector():>10.1f} "
+                          f"{latency:>9.3f} {recall_at_k(found, truth):>7.3f}")
+
+"""
+HOW TO RUN:
+python -m backend.bert.benchmark_index
+python -m backend.bert.benchmark_index --synthetic 100000 --rerank-n 200
+python -m backend.bert.benchmark_index --modes flat --dims 768 512 256 128
+
+Re-rank memory lives in an mmap'd file and is not counted in bytes/vec.
+"""
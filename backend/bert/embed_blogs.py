@@ -1,40 +1,91 @@
+'''
+Offline embedding pipeline for the travel blog corpus.
+
+Posts are streamed from the database, grouped into length buckets so each batch
+pads as little as possible, embedded in batched forward passes (optionally across
+several worker processes) and written to checkpointed shards together with their
+content hashes. Re-running after a crash skips every post already present in a
+shard with its current hash; posts edited since they were sharded are embedded
+again. Once all posts are embedded the shards are merged into the embedding
+artifact read by the API.
+
+With --incremental only posts whose content hash is new or changed are
+embedded, and the result is appended to the artifact as a small delta.
+
+With --chunked every post is split into overlapping token windows instead of
+being truncated at MAX_LENGTH, and one float16 vector per window is written to
+the chunk artifact together with a chunk -> post id map.
+'''
+
 import os
-import io
+import glob
+import time
+import argparse
+import multiprocessing as mp
+from collections import deque
 import torch
-import boto3
 from transformers import AutoTokenizer, AutoModel
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, select
 from sqlalchemy.orm import Session
 from dotenv import load_dotenv
-from backend.src.api.bm25_utils import Whole_Blogs, Base
+from backend.src.api.bm25_utils import Whole_Blogs
+from backend.src.api.chunk_utils import CHUNK_OVERLAP, CHUNK_TOKENS, token_windows
+from backend.src.api.content_utils import content_hash, post_text
+from backend.src.api.embedding_utils import (
+    append_delta,
+    load_embedding_artifact,
+    write_base_artifact,
+    write_chunk_artifact,
+)
 from tqdm import tqdm
 
 load_dotenv()
 DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
 MODEL_NAME = "nomic-ai/modernbert-embed-base"
+MAX_LENGTH = 512
 
 S3_BUCKET = "travel-recommender-s3"
 S3_KEY = "travel_blog_embeddings.pt"
+EMBEDDINGS_PATH = os.getenv("EMBEDDINGS_PATH", f"s3://{S3_BUCKET}/{S3_KEY}")
+CHUNK_EMBEDDINGS_PATH = os.getenv("CHUNK_EMBEDDINGS_PATH", f"s3://{S3_BUCKET}/travel_blog_chunk_embeddings.pt")
+SHARD_DIR = "artifacts/embedding_shards"
 
-# Load ModernBERT
+# Tokenizer is needed up front to bucket posts by length; the model is only
+# loaded in the process that runs forward passes
 tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-model = AutoModel.from_pretrained(MODEL_NAME).to(DEVICE)
-model.eval()
+_model = None
+
+
+def _get_model():
+    global _model
+    if _model is None:
+        _model = AutoModel.from_pretrained(MODEL_NAME).to(DEVICE)
+        _model.eval()
+    return _model
+
+
+def _init_worker(num_threads: int):
+    torch.set_num_threads(num_threads)
+    _get_model()
 
 # -----------------------------
 # Embed helper
 # -----------------------------
-def embed_texts(texts_batch):
-    encoded = tokenizer(
-        texts_batch,
-        padding=True,
-        truncation=True,
-        max_length=512,
-        return_tensors="pt"
-    ).to(DEVICE)
+def embed_token_batch(batch):
+    """
+    Embed one pre-tokenized batch.
+
+    Args:
+        batch: Tuple of (blog_ids, input_ids lists) with similar lengths
+
+    Returns:
+        Tuple of (blog_ids, embedding tensor, number of non-padding tokens)
+    """
+    ids, input_ids = batch
+    encoded = tokenizer.pad({"input_ids": input_ids}, return_tensors="pt").to(DEVICE)
 
     with torch.no_grad():
-        outputs = model(**encoded)
+        outputs = _get_model()(**encoded)
 
     last_hidden = outputs.last_hidden_state
     attention_mask = encoded["attention_mask"].unsqueeze(-1)
@@ -43,49 +94,466 @@ def embed_texts(texts_batch):
     sum_mask = torch.clamp(sum_mask, min=1e-9)
     embedding = sum_embeddings / sum_mask
     embedding = torch.nn.functional.normalize(embedding, p=2, dim=1)
-    return embedding.cpu()
+    return ids, embedding.cpu(), int(encoded["attention_mask"].sum())
+
+# -----------------------------
+# Streaming + length bucketing
+# -----------------------------
+def iter_posts(engine, skip_ids=frozenset(), known_hashes=None, hashes=None, chunk_size: int = 500):
+    """
+    Stream (blog_id, text) pairs without materializing the table.
+
+    Rows are read in id order with keyset pagination, using a short-lived
+    session per chunk rather than one session held open for the whole run.
+
+    Args:
+        engine: SQLAlchemy engine
+        skip_ids: Blog ids to skip
+        known_hashes: {blog_id: hash}; posts whose hash is unchanged are skipped
+        hashes: Optional dict filled with the current hash of every post read
+    """
+    known_hashes = known_hashes or {}
+    last_id = None
+    while True:
+        stmt = select(
+            Whole_Blogs.id,
+            Whole_Blogs.page_title,
+            Whole_Blogs.page_description,
+            Whole_Blogs.content,
+        ).order_by(Whole_Blogs.id).limit(chunk_size)
+        if last_id is not None:
+            stmt = stmt.where(Whole_Blogs.id > last_id)
+
+        with Session(engine) as session:
+            rows = session.execute(stmt).all()
+        if not rows:
+            return
+
+        for blog_id, title, description, content in rows:
+            text = post_text(title, description, content)
+            digest = content_hash(text)
+            if hashes is not None:
+                hashes[blog_id] = digest
+            if blog_id in skip_ids or known_hashes.get(blog_id) == digest:
+                continue
+            yield blog_id, text
+        last_id = rows[-1][0]
+
+
+def bucket_batches(posts, batch_size: int, window_batches: int = 32):
+    """
+    Group posts into batches of similar token length.
+
+    A window of ``batch_size * window_batches`` posts is tokenized, sorted by
+    length and cut into batches, so padding is limited to the spread within
+    each batch while memory stays bounded by the window size.
+    """
+    window = batch_size * window_batches
+
+    def flush(buffer):
+        ids = [blog_id for blog_id, _ in buffer]
+        encoded = tokenizer(
+            [text for _, text in buffer],
+            truncation=True,
+            max_length=MAX_LENGTH,
+        )["input_ids"]
+        order = sorted(range(len(buffer)), key=lambda i: len(encoded[i]))
+        for start in range(0, len(order), batch_size):
+            chunk = order[start:start + batch_size]
+            yield [ids[i] for i in chunk], [encoded[i] for i in chunk]
+
+    buffer = []
+    for post in posts:
+        buffer.append(post)
+        if len(buffer) >= window:
+            yield from flush(buffer)
+            buffer = []
+    if buffer:
+        yield from flush(buffer)
+
+
+def chunk_batches(posts, batch_size: int, size: int = CHUNK_TOKENS, overlap: int = CHUNK_OVERLAP,
+                  window_batches: int = 32):
+    """
+    Split posts into overlapping token windows and batch them by length.
+
+    Like bucket_batches, but each post contributes one entry per window and
+    the ids in each batch are the owning post ids of the chunks.
+    """
+    window = batch_size * window_batches
+    body_size = size - tokenizer.num_special_tokens_to_add()
+
+    def flush(buffer):
+        encoded = tokenizer(
+            [text for _, text in buffer],
+            add_special_tokens=False,
+            verbose=False,
+        )["input_ids"]
+        ids = []
+        chunks = []
+        for (blog_id, _), tokens in zip(buffer, encoded):
+            for chunk in token_windows(tokens, body_size, overlap):
+                ids.append(blog_id)
+                chunks.append(tokenizer.build_inputs_with_special_tokens(chunk))
+        order = sorted(range(len(chunks)), key=lambda i: len(chunks[i]))
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            yield [ids[i] for i in batch], [chunks[i] for i in batch]
+
+    buffer = []
+    for post in posts:
+        buffer.append(post)
+        if len(buffer) >= window:
+            yield from flush(buffer)
+            buffer = []
+    if buffer:
+        yield from flush(buffer)
+
+
+def _bounded_imap(pool, func, iterable, max_in_flight: int):
+    """Like Pool.imap but never reads more than max_in_flight items ahead."""
+    in_flight = deque()
+    for item in iterable:
+        in_flight.append(pool.apply_async(func, (item,)))
+        if len(in_flight) >= max_in_flight:
+            yield in_flight.popleft().get()
+    while in_flight:
+        yield in_flight.popleft().get()
+
 
 # -----------------------------
-# Upload to S3 helper
+# Checkpointed shards
 # -----------------------------
-def upload_to_s3(data, bucket: str, key: str):
-    s3 = boto3.client("s3")
-    buffer = io.BytesIO()
-    torch.save(data, buffer)
-    buffer.seek(0)
-    s3.put_object(Bucket=bucket, Key=key, Body=buffer.getvalue())
-    print(f"Uploaded embeddings to s3://{bucket}/{key}")
+def _shard_paths(shard_dir: str):
+    return sorted(glob.glob(os.path.join(shard_dir, "shard_*.pt")))
+
+
+def _next_shard_index(shard_dir: str) -> int:
+    paths = _shard_paths(shard_dir)
+    if not paths:
+        return 0
+    return int(os.path.basename(paths[-1])[len("shard_"):-len(".pt")]) + 1
+
+
+def _read_shard(path: str):
+    """Return ({blog_id: embedding}, {blog_id: hash}) of one shard."""
+    shard = torch.load(path, weights_only=True)
+    if "embeddings" not in shard:
+        # Shards written before hashes were stored: nothing in them is known current
+        return shard, {}
+    return shard["embeddings"], shard["hashes"]
+
+
+def load_completed_hashes(shard_dir: str):
+    """Return {blog_id: content hash} of the posts already written to a shard."""
+    done = {}
+    for path in _shard_paths(shard_dir):
+        done.update(_read_shard(path)[1])
+    return done
+
+
+def write_shard(shard_dir: str, shard_index: int, embeddings: dict, hashes: dict):
+    """Atomically write one shard so a crash never leaves a partial file."""
+    path = os.path.join(shard_dir, f"shard_{shard_index:05d}.pt")
+    tmp_path = path + ".tmp"
+    torch.save({"embeddings": embeddings, "hashes": hashes}, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def merge_shards(shard_dir: str):
+    """Merge every shard; later shards win, so re-embedded posts replace stale entries."""
+    merged = {}
+    merged_hashes = {}
+    for path in _shard_paths(shard_dir):
+        embeddings, hashes = _read_shard(path)
+        merged.update(embeddings)
+        for blog_id in embeddings:
+            merged_hashes.pop(blog_id, None)
+        merged_hashes.update(hashes)
+    return merged, merged_hashes
 
 # -----------------------------
 # Main embedding script
 # -----------------------------
-def embed_all_blogs():
+def _get_engine():
     database_url = os.getenv("DATABASE_URL")
     if not database_url:
         raise ValueError("DATABASE_URL not found in environment variables")
+    return create_engine(database_url)
+
+
+def run_batches(batches, num_workers: int = 1, on_batch=None):
+    """
+    Embed batches in-process or on a pool of worker processes.
 
-    engine = create_engine(database_url)
+    Args:
+        batches: Iterable of (blog_ids, input_ids) batches
+        num_workers: Number of worker processes (1 runs in-process)
+        on_batch: Callback receiving (blog_ids, embeddings) for each batch
 
-    embeddings_dict = {}  # store embeddings with blog id as key
+    Returns:
+        Tuple of (posts embedded, tokens embedded, seconds elapsed)
+    """
+    if num_workers > 1:
+        threads = max(1, torch.get_num_threads() // num_workers)
+        pool = mp.get_context("spawn").Pool(num_workers, initializer=_init_worker, initargs=(threads,))
+        results = _bounded_imap(pool, embed_token_batch, batches, max_in_flight=2 * num_workers)
+    else:
+        pool = None
+        results = map(embed_token_batch, batches)
 
-    with Session(engine) as session:
-        blog_posts = session.query(Whole_Blogs).all()
+    n_posts = 0
+    n_tokens = 0
+    start = time.perf_counter()
 
-        print(f"Embedding {len(blog_posts)} blog posts...")
-        for post in tqdm(blog_posts):
-            text = f"{post.page_title} {post.page_description} {post.content}"
-            emb = embed_texts([text])[0]  # tensor
-            embeddings_dict[post.id] = emb  # save tensor in dict
+    try:
+        progress = tqdm(results, unit="batch")
+        for ids, embeddings, tokens in progress:
+            on_batch(ids, embeddings)
+            n_posts += len(ids)
+            n_tokens += tokens
 
-    # Convert dict of tensors to a single tensor if you want
-    # or leave as dict for mapping ids to embeddings
-    upload_to_s3(embeddings_dict, S3_BUCKET, S3_KEY)
-    print("All embeddings saved to S3.")
+            elapsed = time.perf_counter() - start
+            progress.set_postfix(posts_per_s=f"{n_posts / elapsed:.1f}", tokens_per_s=f"{n_tokens / elapsed:.0f}")
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    elapsed = time.perf_counter() - start
+    if n_posts:
+        print(f"Embedded {n_posts} posts ({n_tokens} tokens) in {elapsed:.1f}s: "
+              f"{n_posts / elapsed:.1f} posts/s, {n_tokens / elapsed:.0f} tokens/s")
+    return n_posts, n_tokens, elapsed
+
+# -----------------------------
+# Main embedding script
+# -----------------------------
+def embed_all_blogs(
+    batch_size: int = 16,
+    num_workers: int = 1,
+    shard_dir: str = SHARD_DIR,
+    shard_size: int = 1000,
+    upload: bool = True,
+    embeddings_path: str = EMBEDDINGS_PATH,
+):
+    """Embed the whole corpus and rewrite the base artifact."""
+    engine = _get_engine()
+
+    os.makedirs(shard_dir, exist_ok=True)
+    done_hashes = load_completed_hashes(shard_dir)
+    shard_index = _next_shard_index(shard_dir)
+    if done_hashes:
+        print(f"Resuming: {len(done_hashes)} posts already embedded in {shard_dir}")
+
+    hashes = {}
+    pending = {}
+
+    def on_batch(ids, embeddings):
+        nonlocal pending, shard_index
+        pending.update(zip(ids, embeddings))
+        if len(pending) >= shard_size:
+            write_shard(shard_dir, shard_index, pending, {blog_id: hashes[blog_id] for blog_id in pending})
+            shard_index += 1
+            pending = {}
+
+    # Posts sharded with their current hash are skipped; edited ones are re-embedded
+    batches = bucket_batches(iter_posts(engine, known_hashes=done_hashes, hashes=hashes), batch_size)
+    run_batches(batches, num_workers, on_batch)
+    if pending:
+        write_shard(shard_dir, shard_index, pending, {blog_id: hashes[blog_id] for blog_id in pending})
+
+    embeddings_dict, shard_hashes = merge_shards(shard_dir)
+    # Posts deleted from the database since they were sharded are left out
+    embeddings_dict = {blog_id: e for blog_id, e in embeddings_dict.items() if blog_id in hashes}
+    print(f"Merged {len(embeddings_dict)} embeddings from {shard_dir}")
+
+    if upload:
+        # Each vector is tagged with the hash of the text it was computed from
+        hashes = {blog_id: shard_hashes[blog_id] for blog_id in embeddings_dict if blog_id in shard_hashes}
+        write_base_artifact(embeddings_path, embeddings_dict, hashes)
+        print(f"All embeddings saved to {embeddings_path}.")
+
+    return embeddings_dict
+
+
+def refresh_embeddings(
+    batch_size: int = 16,
+    num_workers: int = 1,
+    embeddings_path: str = EMBEDDINGS_PATH,
+):
+    """
+    Embed only new or changed posts and append them to the artifact as a delta.
+
+    Posts that were removed from the database are recorded as deleted in the
+    same delta.
+    """
+    engine = _get_engine()
+
+    _, known_hashes = load_embedding_artifact(embeddings_path)
+    print(f"Artifact has {len(known_hashes)} hashed posts")
+
+    hashes = {}
+    updated = {}
+
+    def on_batch(ids, embeddings):
+        updated.update(zip(ids, embeddings))
+
+    batches = bucket_batches(iter_posts(engine, known_hashes=known_hashes, hashes=hashes), batch_size)
+    run_batches(batches, num_workers, on_batch)
+
+    deleted = sorted(set(known_hashes) - set(hashes))
+    if not updated and not deleted:
+        print("Embeddings are up to date.")
+        return None
+
+    delta = append_delta(
+        embeddings_path,
+        updated,
+        {blog_id: hashes[blog_id] for blog_id in updated},
+        deleted,
+    )
+    print(f"Appended {len(updated)} new/changed and {len(deleted)} deleted posts to {delta}")
+    return delta
+
+def embed_chunks(
+    batch_size: int = 16,
+    num_workers: int = 1,
+    size: int = CHUNK_TOKENS,
+    overlap: int = CHUNK_OVERLAP,
+    upload: bool = True,
+    chunk_embeddings_path: str = CHUNK_EMBEDDINGS_PATH,
+):
+    """
+    Embed every post as overlapping token windows and write the chunk artifact.
+
+    Chunks of a post are stored contiguously, ordered by post id.
+
+    Returns:
+        Tuple of (float16 chunk embeddings, post id per chunk)
+    """
+    engine = _get_engine()
+
+    hashes = {}
+    chunk_ids = []
+    chunk_embeddings = []
+
+    def on_batch(ids, embeddings):
+        chunk_ids.extend(ids)
+        chunk_embeddings.append(embeddings.half())
+
+    batches = chunk_batches(iter_posts(engine, hashes=hashes), batch_size, size, overlap)
+    run_batches(batches, num_workers, on_batch)
+    if not chunk_ids:
+        print("No posts to embed.")
+        return None
+
+    post_ids = torch.tensor(chunk_ids, dtype=torch.long)
+    order = torch.argsort(post_ids, stable=True)
+    post_ids = post_ids[order]
+    embeddings = torch.cat(chunk_embeddings)[order]
+
+    n_posts = len(torch.unique(post_ids))
+    print(f"Embedded {len(post_ids)} chunks from {n_posts} posts "
+          f"({len(post_ids) / n_posts:.2f} chunks/post, {embeddings.nbytes / 2**20:.1f} MiB fp16)")
+
+    if upload:
+        hashes = {blog_id: hashes[blog_id] for blog_id in post_ids.unique().tolist()}
+        write_chunk_artifact(chunk_embeddings_path, embeddings, post_ids, hashes)
+        print(f"Chunk embeddings saved to {chunk_embeddings_path}.")
+
+    return embeddings, post_ids
 
 if __name__ == "__main__":
-    embed_all_blogs()
+    parser = argparse.ArgumentParser(description = "Embed all travel blog posts with ModernBERT")
+
+    parser.add_argument("--batch-size",
+                        type = int,
+                        default = 16,
+                        help = "Posts per forward pass")
+
+    parser.add_argument("--workers",
+                        type = int,
+                        default = 1,
+                        help = "Number of embedding worker processes")
+
+    parser.add_argument("--shard-dir",
+                        type = str,
+                        default = SHARD_DIR,
+                        help = "Directory for checkpointed embedding shards")
+
+    parser.add_argument("--shard-size",
+                        type = int,
+                        default = 1000,
+                        help = "Posts per checkpoint shard")
+
+    parser.add_argument("--no-upload",
+                        action = "store_true",
+                        help = "Only write local shards, skip writing the artifact")
+
+    parser.add_argument("--incremental",
+                        action = "store_true",
+                        help = "Embed only new or changed posts and append a delta")
+
+    parser.add_argument("--embeddings-path",
+                        type = str,
+                        default = EMBEDDINGS_PATH,
+                        help = "Embedding artifact location (s3://bucket/key or local path)")
+
+    parser.add_argument("--chunked",
+                        action = "store_true",
+                        help = "Embed overlapping token windows into the chunk artifact")
+
+    parser.add_argument("--chunk-tokens",
+                        type = int,
+                        default = CHUNK_TOKENS,
+                        help = "Tokens per chunk window, including special tokens")
+
+    parser.add_argument("--chunk-overlap",
+                        type = int,
+                        default = CHUNK_OVERLAP,
+                        help = "Tokens shared by consecutive chunk windows")
+
+    parser.add_argument("--chunk-embeddings-path",
+                        type = str,
+                        default = CHUNK_EMBEDDINGS_PATH,
+                        help = "Chunk artifact location (s3://bucket/key or local path)")
+
+    args = parser.parse_args()
+
+    if args.chunked:
+        embed_chunks(
+            batch_size = args.batch_size,
+            num_workers = args.workers,
+            size = args.chunk_tokens,
+            overlap = args.chunk_overlap,
+            upload = not args.no_upload,
+            chunk_embeddings_path = args.chunk_embeddings_path,
+        )
+    elif args.incremental:
+        refresh_embeddings(
+            batch_size = args.batch_size,
+            num_workers = args.workers,
+            embeddings_path = args.embeddings_path,
+        )
+    else:
+        embed_all_blogs(
+            batch_size = args.batch_size,
+            num_workers = args.workers,
+            shard_dir = args.shard_dir,
+            shard_size = args.shard_size,
+            upload = not args.no_upload,
+            embeddings_path = args.embeddings_path,
+        )
 
 """
 HOW TO RUN:
 python -m backend.bert.embed_blogs
+python -m backend.bert.embed_blogs --batch-size 32 --workers 4
+python -m backend.bert.embed_blogs --incremental
+python -m backend.bert.embed_blogs --chunked --chunk-tokens 512 --chunk-overlap 128
+
+Shards are kept in --shard-dir; re-running after an interruption resumes from
+the last completed shard, re-embedding posts whose content changed since. Delete
+the directory to force a full re-embed.
 """
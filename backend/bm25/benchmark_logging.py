@@ -0,0 +1,160 @@
+'''
+Measures what logging costs a request: the previous pipeline (JsonFormatter
+with json.dumps, a synchronous StreamHandler per logger) against the queued
+pipeline of logging_utils (records enqueued on the request thread, formatted
+with orjson and written in batches by the listener thread), with and without
+INFO sampling.
+
+Each simulated request opens a request context, writes the log lines a
+/search request writes (INFO lines with props, one WARNING) and waits
+--work-ms between them for its I/O. Several threads log concurrently, as
+threadpool workers do under load, and output goes to /dev/null so the
+figures are logging overhead rather than terminal speed. Dropped records
+are reported, since a queue that overflows would look deceptively cheap.
+'''
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import threading
+import time
+from datetime import datetime, timezone
+
+from backend.src.api import logging_utils
+from backend.src.api.logging_utils import RequestContextFilter, dropped_log_records, flush_logs, request_context
+
+
+class PreviousJsonFormatter(logging.Formatter):
+    """JsonFormatter as it was before the queued pipeline."""
+
+    def format(self, record):
+        log_record = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "funcName": record.funcName,
+            "lineNo": record.lineno,
+        }
+        for field in ("request_id", "trace_id", "span_id"):
+            value = getattr(record, field, None)
+            if value is not None:
+                log_record[field] = value
+        if hasattr(record, "props"):
+            log_record.update(record.props)
+        return json.dumps(log_record)
+
+
+def previous_logger(stream) -> logging.Logger:
+    logger = logging.getLogger("benchmark.previous")
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(PreviousJsonFormatter())
+    handler.addFilter(RequestContextFilter())
+    logger.handlers = [handler]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger
+
+
+def queued_logger(stream) -> logging.Logger:
+    logging_utils._stream_handler.setStream(stream)
+    return logging_utils.get_logger("benchmark.queued")
+
+
+def one_request(logger, i) -> float:
+    """Log one request's lines; returns the seconds spent inside logging calls."""
+    lines = [
+        (logging.INFO, "Search request", {"query": "temples in kyoto", "model": "bm25", "k": 10}),
+        (logging.INFO, "BM25 search complete", {"results": 10, "elapsed_ms": 12.5}),
+        (logging.INFO, "Hydrated results", {"results": 10}),
+        (logging.INFO, "Explanation cache lookup", {"hits": 7, "misses": 3}),
+        (logging.WARNING, "Slow stage", {"stage": "llm_call", "elapsed_ms": 2500.0}),
+        (logging.INFO, "Search response sent", {"status": 200, "bytes": 48213}),
+    ]
+    spent = 0.0
+    with request_context(f"req-{i}", "POST /search"):
+        for level, message, props in lines:
+            start = time.perf_counter()
+            logger.log(level, message, extra = {"props": props})
+            spent += time.perf_counter() - start
+    return spent
+
+
+def run(logger, threads, requests, work_s):
+    """Per-request logging time (us) across ``threads`` concurrent requests, and the wall time until written."""
+    timings = [[] for _ in range(threads)]
+
+    def worker(slot):
+        for i in range(requests):
+            timings[slot].append(one_request(logger, i) * 1e6)
+            time.sleep(work_s)
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target = worker, args = (slot,)) for slot in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    flush_logs(timeout = 60)
+    wall_s = time.perf_counter() - start
+
+    flat = sorted(t for slot in timings for t in slot)
+    return statistics.mean(flat), flat[int(len(flat) * 0.99)], wall_s
+
+
+# --------------------------
+# ----- MAIN CLI ENTRY -----
+# --------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Benchmark per-request logging overhead")
+
+    parser.add_argument("--threads",
+                        type = int,
+                        default = 8,
+                        help = "Concurrent request threads")
+
+    parser.add_argument("--requests",
+                        type = int,
+                        default = 1000,
+                        help = "Requests per thread")
+
+    parser.add_argument("--work-ms",
+                        type = float,
+                        default = 2.0,
+                        help = "Non-logging time per request (sleeps, like awaiting I/O)")
+
+    parser.add_argument("--sample-rate",
+                        type = float,
+                        default = 0.1,
+                        help = "LOG_SAMPLE_RATE for the sampled run")
+
+    args = parser.parse_args()
+
+    with open(os.devnull, "w") as devnull:
+        paths = [
+            ("previous", lambda: previous_logger(devnull), 1.0),
+            ("queued", lambda: queued_logger(devnull), 1.0),
+            (f"queued+sample {args.sample_rate:g}", lambda: queued_logger(devnull), args.sample_rate),
+        ]
+        print(f"{'path':<22} {'us/req mean':>12} {'us/req p99':>11} {'wall s':>8} {'dropped':>8}")
+        for name, make_logger, rate in paths:
+            logging_utils.LOG_SAMPLE_RATE = rate
+            logger = make_logger()
+            run(logger, args.threads, 50, args.work_ms / 1000)  # warm-up
+            dropped = dropped_log_records()
+            mean_us, p99_us, wall_s = run(logger, args.threads, args.requests, args.work_ms / 1000)
+            dropped = dropped_log_records() - dropped
+            print(f"{name:<22} {mean_us:>12.1f} {p99_us:>11.1f} {wall_s:>8.2f} {dropped:>8}")
+
+"""
+HOW TO RUN:
+python -m backend.bm25.benchmark_logging
+python -m backend.bm25.benchmark_logging --threads 32 --requests 2000 --work-ms 1 --sample-rate 0.05
+
+us/req is the time a request thread spends in logging calls; wall s includes
+draining the queue, and dropped shows whether the listener kept up.
+"""
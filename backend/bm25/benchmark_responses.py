@@ -0,0 +1,120 @@
+'''
+Measures /search response serialization: the previous path (re-validating
+the SearchResponse through response_model, then json.dumps as FastAPI's
+JSONResponse does) against the orjson path, with and without a fields=
+projection, and the bytes on the wire with gzip and brotli.
+
+Results come from the real BM25 handler for the benchmark queries, so
+full_content has realistic sizes. No LLM explanations are included.
+'''
+
+import argparse
+import gzip
+import json
+import statistics
+import time
+
+from backend.src.api.main import SearchResponse, SearchRequest, bm25_search
+from backend.src.api.response_utils import BROTLI_QUALITY, GZIP_LEVEL, brotli, encode_json, project
+
+PROJECTION = ["destination", "country", "lat", "lon", "score", "snippets", "why"]
+
+
+def previous_path(response):
+    """FastAPI response_model path: validate, dump to JSON types, json.dumps."""
+    validated = SearchResponse.model_validate(response)
+    content = validated.model_dump(mode = "json")
+    return json.dumps(content, ensure_ascii = False, allow_nan = False, separators = (",", ":")).encode("utf-8")
+
+
+def orjson_path(response, fields = None):
+    """Dump the already-validated results once and encode with orjson."""
+    payload = {
+        "query": response.query,
+        "params": response.params,
+        "results": project([r.model_dump() for r in response.results], fields),
+        "explanations": [],
+        "explanation_details": [],
+        "explanations_job_id": None,
+    }
+    return encode_json(payload)
+
+
+def time_ms(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        body = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), body
+
+
+# --------------------------
+# ----- MAIN CLI ENTRY -----
+# --------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Benchmark /search response serialization")
+
+    parser.add_argument("--queries-path",
+                        type = str,
+                        default = "backend/data/queries.json",
+                        help = "JSON file with a 'queries' list")
+
+    parser.add_argument("--k",
+                        type = int,
+                        nargs = "+",
+                        default = [10, 50],
+                        help = "Result counts to benchmark")
+
+    parser.add_argument("--repeats",
+                        type = int,
+                        default = 50,
+                        help = "Encodings timed per query")
+
+    args = parser.parse_args()
+
+    with open(args.queries_path, "r") as f:
+        queries = json.load(f)["queries"]
+
+    print(f"{'k':>3} {'path':<18} {'ms/resp':>8} {'bytes':>9} {'gzip':>8} {'gzip ms':>8} {'br':>8} {'br ms':>7}")
+    for k in args.k:
+        responses = []
+        for query in queries:
+            req = SearchRequest(query = query, retrieval = {"model": "bm25", "k": k})
+            results = bm25_search(req)
+            responses.append(SearchResponse.model_construct(
+                query = query,
+                params = {"retrieval": req.retrieval.model_dump(), "model_used": "bm25"},
+                results = results,
+                explanations = [],
+                explanation_details = [],
+            ))
+
+        paths = [
+            ("response_model", previous_path),
+            ("orjson", orjson_path),
+            ("orjson+fields", lambda response: orjson_path(response, PROJECTION)),
+        ]
+        for name, encode in paths:
+            rows = []
+            for response in responses:
+                ms, body = time_ms(lambda: encode(response), args.repeats)
+                gz_ms, gz = time_ms(lambda: gzip.compress(body, compresslevel = GZIP_LEVEL), args.repeats)
+                if brotli is not None:
+                    br_ms, br = time_ms(lambda: brotli.compress(body, quality = BROTLI_QUALITY), args.repeats)
+                else:
+                    br_ms, br = float("nan"), b""
+                rows.append((ms, len(body), len(gz), gz_ms, len(br), br_ms))
+
+            ms, size, gz_size, gz_ms, br_size, br_ms = (statistics.mean(col) for col in zip(*rows))
+            print(f"{k:>3} {name:<18} {ms:>8.3f} {size:>9.0f} {gz_size:>8.0f} {gz_ms:>8.3f} {br_size:>8.0f} {br_ms:>7.3f}")
+
+"""
+HOW TO RUN:
+python -m backend.bm25.benchmark_responses
+python -m backend.bm25.benchmark_responses --k 10 50 100 --repeats 20
+
+Needs DATABASE_URL for the BM25 corpus. Brotli columns are empty unless the
+brotli package is installed.
+"""
@@ -0,0 +1,119 @@
+'''
+Measures how query-relevant context selection shrinks LLM explanation prompts.
+
+For every benchmark query the top BM25 posts are turned into explanation
+prompts at each context budget (0 = full post, the previous behaviour).
+Reports prompt tokens, reduction vs the full post and selection time per
+post. With --live, each prompt is also sent to the LLM and the end-to-end
+explanation latency is reported (needs HF_TOKEN; costs API calls).
+'''
+
+import argparse
+import json
+import statistics
+import time
+
+from backend.src.api.bm25_utils import get_bm25_index, search_bm25
+from backend.src.api.context_utils import estimate_tokens
+from backend.src.api.llm_utils import LLM_MODEL, build_prompt, client
+
+
+def count_tokens(text, tokenizer):
+    if tokenizer is None:
+        return estimate_tokens(text)
+    return len(tokenizer(text)["input_ids"])
+
+
+def explain_latency_ms(prompt):
+    start = time.perf_counter()
+    client.chat.completions.create(
+        model = LLM_MODEL,
+        messages = [{"role": "user", "content": prompt}],
+    )
+    return (time.perf_counter() - start) * 1000
+
+
+# --------------------------
+# ----- MAIN CLI ENTRY -----
+# --------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Benchmark LLM prompt context selection")
+
+    parser.add_argument("--queries-file",
+                        type = str,
+                        default = "backend/data/queries.json",
+                        help = "JSON file with a 'queries' list")
+
+    parser.add_argument("--top-n",
+                        type = int,
+                        default = 3,
+                        help = "Posts explained per query")
+
+    parser.add_argument("--budgets",
+                        type = int,
+                        nargs = "+",
+                        default = [0, 1200, 600, 300],
+                        help = "Context token budgets to compare (0 = full post)")
+
+    parser.add_argument("--tokenizer",
+                        type = str,
+                        default = None,
+                        help = "Hugging Face tokenizer for exact counts (default: ~4 chars/token estimate)")
+
+    parser.add_argument("--live",
+                        action = "store_true",
+                        help = "Also call the LLM and report explanation latency")
+
+    parser.add_argument("--live-queries",
+                        type = int,
+                        default = 5,
+                        help = "Queries sent to the LLM per budget with --live")
+
+    args = parser.parse_args()
+
+    tokenizer = None
+    if args.tokenizer:
+        from transformers import AutoTokenizer
+        tokenizer = AutoTokenizer.from_pretrained(args.tokenizer)
+
+    with open(args.queries_file) as f:
+        queries = json.load(f)["queries"]
+
+    get_bm25_index()
+    pairs = [(q, r["full_content"]) for q in queries for r in search_bm25(q, top_n = args.top_n)]
+    print(f"{len(pairs)} (query, post) pairs from {len(queries)} queries\n")
+
+    baseline = None
+    print(f"{'budget':>7} {'mean tok':>9} {'p95 tok':>8} {'max tok':>8} {'reduction':>10} {'select ms':>10}"
+          + (f" {'LLM ms':>9}" if args.live else ""))
+    for budget in args.budgets:
+        tokens = []
+        select_ms = []
+        for query, content in pairs:
+            start = time.perf_counter()
+            prompt = build_prompt(query, content, context_budget = budget)
+            select_ms.append((time.perf_counter() - start) * 1000)
+            tokens.append(count_tokens(prompt, tokenizer))
+
+        mean_tokens = statistics.mean(tokens)
+        baseline = baseline or mean_tokens
+        p95 = sorted(tokens)[int(0.95 * (len(tokens) - 1))]
+        row = (f"{budget or 'full':>7} {mean_tokens:>9.0f} {p95:>8} {max(tokens):>8} "
+               f"{1 - mean_tokens / baseline:>10.1%} {statistics.mean(select_ms):>10.3f}")
+
+        if args.live:
+            live_pairs = pairs[:args.live_queries * args.top_n]
+            latencies = [explain_latency_ms(build_prompt(q, c, context_budget = budget)) for q, c in live_pairs]
+            row += f" {statistics.median(latencies):>9.0f}"
+        print(row)
+
+"""
+HOW TO RUN:
+python -m backend.llm_summary.benchmark_context
+python -m backend.llm_summary.benchmark_context --budgets 0 600 --tokenizer deepseek-ai/DeepSeek-V3.2
+python -m backend.llm_summary.benchmark_context --live --live-queries 5
+
+The first budget is the baseline for the reduction column; keep 0 first.
+LLM latency is the median over the --live pairs.
+"""
@@ -1,61 +1,287 @@
+'''
+Offline batch job that writes a short LLM summary of every travel blog post.
+
+Posts are streamed from ``travel_blogs`` and summarized concurrently with
+async LLM calls, capped both in flight (--concurrency) and per minute
+(--rate). Finished summaries are written to the ``post_summaries`` side table
+every --checkpoint-every posts, so an interrupted run loses at most one
+checkpoint. Posts whose content hash and prompt version match a stored
+summary are skipped, which makes re-running the job both the resume path
+and the incremental refresh after new posts are scraped.
+
+The API uses these summaries as the LLM context for explanations and as
+result snippets (see backend/src/api/summary_utils.py).
+'''
+
 import os
-from huggingface_hub import InferenceClient
-import logging
+import time
+import random
+import asyncio
+import argparse
+from huggingface_hub import AsyncInferenceClient
+from sqlalchemy import select
+from sqlalchemy.orm import Session
 from dotenv import load_dotenv
+from tqdm import tqdm
+from backend.src.api.bm25_utils import Whole_Blogs
+from backend.src.api.db_utils import get_engine
+from backend.src.api.content_utils import content_hash, post_text
+from backend.src.api.llm_utils import LLM_MODEL
+from backend.src.api.summary_utils import (
+    SUMMARY_MAX_WORDS,
+    SUMMARY_PROMPT_VERSION,
+    PostSummary,
+    build_summary_prompt,
+    new_summary,
+)
+# Import Logger
+from backend.src.api.logging_utils import get_logger
 
-logging.basicConfig(level=logging.INFO,
-                    format="%(asctime)s - %(levelname)s - %(message)s")
-logger = logging.getLogger("travel-data")
-
-# Create HuggingFace Hub Link
 load_dotenv()
-hf_token = os.getenv('HF_TOKEN')
-logger.info("Retrieved HuggingFace Token")
+logger = get_logger("summarize_blogs")
 
-client = InferenceClient(
-    token=hf_token,
-)
-logger.info("Built Clinet")
+RETRY_BACKOFF_S = 1.0  # first retry delay, doubled per attempt
 
-def build_prompt( query, blog_post):
-    prompt = f"""
-    You are an AI assistance helping explain why the returned post about a vacation spot was retrieved for the given query.
-    The results were generated through FAISS.
-    
-    Given the following query: '{query}'
 
-    And the returned neighbor (blog post about travel): {blog_post}
+# -----------------------------
+# Rate limiting
+# -----------------------------
+class RateLimiter:
+    """Spaces calls evenly so at most ``rate_per_min`` start per minute."""
+
+    def __init__(self, rate_per_min: float):
+        self.interval = 60.0 / rate_per_min if rate_per_min else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+# -----------------------------
+# Database
+# -----------------------------
+def load_known_hashes(engine):
+    """{post_id: content hash} of the summaries made with the current prompt version."""
+    stmt = select(PostSummary.post_id, PostSummary.content_hash).where(
+        PostSummary.prompt_version == SUMMARY_PROMPT_VERSION
+    )
+    with Session(engine) as session:
+        return dict(session.execute(stmt).all())
 
-    Explain in clear, human terms why this vacation location is a good option for the user to consider given their request query.
-    The response should be a maximum of 8 sentances.
+
+def iter_pending_posts(engine, known_hashes, chunk_size: int = 500):
     """
-    return prompt.strip()
+    Stream (post id, title, text, content hash) of posts without a current summary.
 
+    Rows are read in id order with keyset pagination, one short session per chunk.
+    """
+    last_id = None
+    while True:
+        stmt = select(
+            Whole_Blogs.id,
+            Whole_Blogs.page_title,
+            Whole_Blogs.page_description,
+            Whole_Blogs.content,
+        ).order_by(Whole_Blogs.id).limit(chunk_size)
+        if last_id is not None:
+            stmt = stmt.where(Whole_Blogs.id > last_id)
 
-def explain_results(query, post):
+        with Session(engine) as session:
+            rows = session.execute(stmt).all()
+        if not rows:
+            return
 
-    prompt = build_prompt(query, post)
-    logger.info("Built Prompt")
+        for post_id, title, description, content in rows:
+            text = post_text(title, description, content)
+            digest = content_hash(text)
+            if known_hashes.get(post_id) != digest:
+                yield post_id, title, text, digest
+        last_id = rows[-1][0]
 
-    completion = client.chat.completions.create(
-        model="deepseek-ai/DeepSeek-V3.2",
-        messages=[
-            {
-                "role": "user",
-                "content": prompt
-            }
-        ],
-    )
 
-    return completion.choices[0].message['content']
+def write_checkpoint(engine, summaries):
+    """Upsert a batch of PostSummary rows in one transaction."""
+    with Session(engine) as session:
+        for summary in summaries:
+            session.merge(summary)
+        session.commit()
+
+
+# -----------------------------
+# Summarization
+# -----------------------------
+async def summarize_post(client, limiter, semaphore, model, title, text,
+                         max_words: int = SUMMARY_MAX_WORDS, max_input_words: int = 3000, retries: int = 3):
+    """
+    Summarize one post, retrying failed calls with exponential backoff.
+
+    Returns:
+        The summary text
+
+    Raises:
+        The last error if every attempt fails
+    """
+    words = text.split()
+    if len(words) > max_input_words:
+        text = " ".join(words[:max_input_words])
+    prompt = build_summary_prompt(title, text, max_words)
+
+    for attempt in range(retries + 1):
+        await limiter.acquire()
+        try:
+            async with semaphore:
+                completion = await client.chat.completions.create(
+                    model=model,
+                    messages=[{"role": "user", "content": prompt}],
+                )
+            return completion.choices[0].message['content']
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = RETRY_BACKOFF_S * 2 ** attempt * (1 + random.random())
+            logger.warning(f"Summary call failed ({e}); retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+
+async def summarize_all(engine, client, model: str = LLM_MODEL, concurrency: int = 8, rate_per_min: float = 60,
+                        checkpoint_every: int = 50, limit: int = None, max_words: int = SUMMARY_MAX_WORDS):
+    """
+    Summarize every post without a current summary and store the results.
+
+    Returns:
+        Tuple of (posts summarized, posts that failed)
+    """
+    PostSummary.__table__.create(engine, checkfirst=True)
+    known_hashes = load_known_hashes(engine)
+    if known_hashes:
+        print(f"Resuming: {len(known_hashes)} posts already summarized")
+
+    limiter = RateLimiter(rate_per_min)
+    semaphore = asyncio.Semaphore(concurrency)
+    buffer = []
+    done = failed = 0
+
+    async def run(post_id, title, text, digest):
+        summary = await summarize_post(client, limiter, semaphore, model, title, text, max_words)
+        return new_summary(post_id, digest, model, summary)
+
+    progress = tqdm(desc="Summarizing", unit="post")
+    pending = set()
+    try:
+        for i, (post_id, title, text, digest) in enumerate(iter_pending_posts(engine, known_hashes)):
+            if limit is not None and i >= limit:
+                break
+            pending.add(asyncio.ensure_future(run(post_id, title, text, digest)))
+            # Keep a bounded window of tasks instead of one per post in the corpus
+            if len(pending) < concurrency * 2:
+                continue
+            finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in finished:
+                if task.exception() is not None:
+                    failed += 1
+                    logger.error(f"Summary failed: {task.exception()}")
+                    continue
+                buffer.append(task.result())
+                progress.update(1)
+            if len(buffer) >= checkpoint_every:
+                write_checkpoint(engine, buffer)
+                done += len(buffer)
+                buffer = []
+
+        for task in asyncio.as_completed(pending):
+            try:
+                buffer.append(await task)
+                progress.update(1)
+            except Exception as e:
+                failed += 1
+                logger.error(f"Summary failed: {e}")
+        pending = set()
+    finally:
+        # Interrupted runs keep everything finished so far
+        for task in pending:
+            task.cancel()
+        if buffer:
+            write_checkpoint(engine, buffer)
+            done += len(buffer)
+        progress.close()
+
+    return done, failed
+
+
+# --------------------------
+# ----- MAIN CLI ENTRY -----
+# --------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Summarize every travel blog post with the LLM")
+
+    parser.add_argument("--concurrency",
+                        type = int,
+                        default = 8,
+                        help = "LLM calls in flight")
+
+    parser.add_argument("--rate",
+                        type = float,
+                        default = 60,
+                        help = "Maximum LLM calls started per minute (0 = unlimited)")
+
+    parser.add_argument("--checkpoint-every",
+                        type = int,
+                        default = 50,
+                        help = "Summaries written to the database per checkpoint")
+
+    parser.add_argument("--limit",
+                        type = int,
+                        default = None,
+                        help = "Summarize at most this many posts (for trial runs)")
+
+    parser.add_argument("--max-words",
+                        type = int,
+                        default = SUMMARY_MAX_WORDS,
+                        help = "Target summary length in words")
+
+    parser.add_argument("--model",
+                        type = str,
+                        default = LLM_MODEL,
+                        help = "LLM used for the summaries")
+
+    args = parser.parse_args()
 
+    hf_token = os.getenv("HF_TOKEN")
+    if not hf_token:
+        raise ValueError("HF_TOKEN not found in environment variables")
 
-query_text = "Im looking for a vacation spot that is a cute, quaint village in a mountain town. I would like it to have cultural aspects."
+    async def main():
+        client = AsyncInferenceClient(base_url = os.getenv("LLM_BASE_URL") or None, token = hf_token)
+        try:
+            return await summarize_all(
+                get_engine(),
+                client,
+                model = args.model,
+                concurrency = args.concurrency,
+                rate_per_min = args.rate,
+                checkpoint_every = args.checkpoint_every,
+                limit = args.limit,
+                max_words = args.max_words,
+            )
+        finally:
+            await client.close()
 
-neighbor = "Continuing my icy adventures, this post will tell you about Vail, Colorado, famous famous famous for skiing and snowboarding – and well deserved!",
-"After visiting Dillon’s Ice Castles on a recent Friday, my husband and I headed to Vail for what we thought was one night. Turned out to be two nights because we got 10+ inches of snow overnight and it just kept coming down! Not sorry, as you’ll see!",
-"During that weekend we took the thank-god-for-this-miracle hotel shuttle to Vail Village. Official but unromantic name of the bus stop: Vail Transportation Center. Before leaving that morning, I snapped this photo at the hotel’s pool as my husband made some sort of statement about macaques in Japan:",
-"Now, that’s MY kind of pool party! But I digress. Back to Vail Village. In short order, and after a stop at the Lionshead Village Welcome Center, we stepped off the bus at Vail Village. It was still snowing lightly and everything was covered in a beautiful white blanket! Here’s the scene from the deck of the transpo center – note the slopes in the background:"
+    start = time.perf_counter()
+    done, failed = asyncio.run(main())
+    print(f"Summarized {done} posts in {time.perf_counter() - start:.1f}s ({failed} failed)")
 
+"""
+HOW TO RUN:
+python -m backend.llm_summary.summarize_blogs_api --limit 20
+python -m backend.llm_summary.summarize_blogs_api --concurrency 16 --rate 120
 
-print(explain_results(query_text, neighbor))
\ No newline at end of file
+Re-run the same command to resume after an interruption or to summarize
+posts added since the last run; unchanged posts are skipped.
+"""
@@ -0,0 +1,151 @@
+# backend/src/api/admission_utils.py
+
+"""
+Admission control for the search API.
+
+Work is admitted through lanes, one per cost class:
+
+    bm25    BM25 retrieval and cursor pages (cheap)
+    encode  retrieval that encodes the query with ModernBERT (faiss, hybrid, bm25+rerank)
+    llm     LLM explanations of a search
+
+Each lane runs at most ``concurrency`` requests and queues at most
+``max_queue`` more. A request is shed when the queue is full (429) or when
+it waits longer than the lane's queue wait (503), together with a
+Retry-After estimate. Saturating one lane never delays the others, so the
+cheap BM25 path keeps its latency while encode or LLM work piles up.
+
+Lanes are used from the event loop only and are not thread-safe.
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class Overloaded(Exception):
+    """A lane shed the request; ``status_code`` is 429 (queue full) or 503 (waited too long)."""
+
+    def __init__(self, lane: str, reason: str, status_code: int, retry_after_s: int):
+        super().__init__(f"{lane} lane overloaded ({reason})")
+        self.lane = lane
+        self.status_code = status_code
+        self.retry_after_s = retry_after_s
+
+
+class AdmissionLane:
+    """Concurrency limit with a bounded FIFO queue and a queue wait limit."""
+
+    def __init__(self, name: str, concurrency: int, max_queue: int, max_wait_s: float):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.max_wait_s = max_wait_s
+        self._in_flight = 0
+        self._waiters = deque()
+        self._service_s = 0.0  # moving average of admitted work
+        self.admitted = 0
+        self.shed_queue_full = 0
+        self.shed_timeout = 0
+
+    def retry_after_s(self) -> int:
+        """Seconds until a slot is likely free, estimated from queue depth and service time."""
+        return max(1, math.ceil((len(self._waiters) + 1) * self._service_s / max(self.concurrency, 1)))
+
+    @asynccontextmanager
+    async def admit(self, max_wait_s: Optional[float] = None):
+        """
+        Hold one slot of the lane for the duration of the block.
+
+        Args:
+            max_wait_s: Tighter queue wait for this request (e.g. its remaining deadline)
+
+        Raises:
+            Overloaded: if the queue is full or no slot frees up in time
+        """
+        await self._acquire(self.max_wait_s if max_wait_s is None else min(self.max_wait_s, max_wait_s))
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._service_s = elapsed if not self._service_s else 0.8 * self._service_s + 0.2 * elapsed
+            self._release()
+
+    async def _acquire(self, max_wait_s: float):
+        if self._in_flight < self.concurrency and not self._waiters:
+            self._in_flight += 1
+            self.admitted += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.shed_queue_full += 1
+            raise Overloaded(self.name, "queue full", 429, self.retry_after_s())
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, max(max_wait_s, 0.0))
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # A slot was handed over just as we gave up: pass it on
+                self._release()
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                self.shed_timeout += 1
+                raise Overloaded(self.name, f"no slot within {max_wait_s:.1f}s", 503, self.retry_after_s())
+            raise
+        self.admitted += 1
+
+    def _release(self):
+        # Hand the slot straight to the oldest waiter, if any
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._in_flight -= 1
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "in_flight": self._in_flight,
+            "queued": len(self._waiters),
+            "concurrency": self.concurrency,
+            "max_queue": self.max_queue,
+            "max_wait_s": self.max_wait_s,
+            "admitted": self.admitted,
+            "shed_queue_full": self.shed_queue_full,
+            "shed_timeout": self.shed_timeout,
+        }
+
+
+def _lane_from_env(name: str, concurrency: int, max_queue: int, max_wait_s: float) -> AdmissionLane:
+    """Build a lane whose limits can be overridden with ADMIT_<NAME>_* variables."""
+    prefix = f"ADMIT_{name.upper()}"
+    return AdmissionLane(
+        name,
+        concurrency=int(os.getenv(f"{prefix}_CONCURRENCY", str(concurrency))),
+        max_queue=int(os.getenv(f"{prefix}_QUEUE", str(max_queue))),
+        max_wait_s=float(os.getenv(f"{prefix}_WAIT_S", str(max_wait_s))),
+    )
+
+
+LANES = {
+    "bm25": _lane_from_env("bm25", concurrency=8, max_queue=64, max_wait_s=1.0),
+    # Query encoding is CPU-bound and already multi-threaded inside torch
+    "encode": _lane_from_env("encode", concurrency=2, max_queue=8, max_wait_s=2.0),
+    "llm": _lane_from_env("llm", concurrency=8, max_queue=16, max_wait_s=1.0),
+}
+
+
+def admission_snapshot() -> Dict[str, Dict[str, object]]:
+    """Queue depth, in-flight work and shed counts of every lane."""
+    return {name: lane.snapshot() for name, lane in LANES.items()}
@@ -1,12 +1,13 @@
 # backend/src/api/bm25_utils.py
 
 import re
-import os
-from typing import List, Dict
+import threading
+from typing import Callable, List, Dict, Optional
 from rank_bm25 import BM25Okapi
-from sqlalchemy import create_engine
 from sqlalchemy.orm import Session, DeclarativeBase, Mapped, mapped_column
 from dotenv import load_dotenv
+from .db_utils import get_engine
+from .metrics_utils import timed_stage, track_index_size
 # Import Logger
 from .logging_utils import get_logger
 
@@ -52,19 +53,21 @@ class Whole_Blogs(Base):
 # Cache for loaded data (so we don't reload from DB on every search)
 _cached_posts = None
 _cached_bm25 = None
+_posts_by_url = {}
+_corpus_version = 0  # bumped on every (re)load
+_load_lock = threading.Lock()
+# Called with the posts after every (re)load, to rebuild data derived from them
+_load_listeners: List[Callable[[List[Dict]], None]] = []
+
+track_index_size("bm25", lambda: len(_cached_posts) if _cached_posts is not None else 0)
 
 
 def _load_blogs_from_db():
     """Load blog posts from database and build BM25 index."""
-    global _cached_posts, _cached_bm25
-    
-    database_url = os.getenv("DATABASE_URL")
-    if not database_url:
-        logger.error("DATABASE_URL not found in environment variables")
-        raise ValueError("DATABASE_URL not found in environment variables")
+    global _cached_posts, _cached_bm25, _posts_by_url, _corpus_version
     
+    engine = get_engine()
     logger.info("Loading blog posts from database...")
-    engine = create_engine(database_url)
     
     posts = []
     corpus = []
@@ -100,10 +103,66 @@ def _load_blogs_from_db():
     # Cache the results
     _cached_posts = posts
     _cached_bm25 = bm25
+    _posts_by_url = {post["page_url"]: post for post in posts}
+    _corpus_version += 1
+
+    for listener in _load_listeners:
+        try:
+            listener(posts)
+        except Exception as e:
+            logger.error(f"Corpus load listener {listener.__name__} failed: {e}")
     
     return posts, bm25
 
 
+def _ensure_loaded():
+    """
+    Load the corpus if it is not loaded yet.
+
+    Single-flight: when several threads (startup warm-up, the first requests)
+    find it missing at once, one loads it and the others wait for that load.
+    """
+    if _cached_posts is not None and _cached_bm25 is not None:
+        return
+    with _load_lock:
+        if _cached_posts is None or _cached_bm25 is None:
+            _load_blogs_from_db()
+
+
+def on_corpus_loaded(listener: Callable[[List[Dict]], None]):
+    """
+    Call ``listener(posts)`` after every corpus (re)load, on the loading thread.
+
+    If the corpus is already loaded, the listener is also called right away.
+    """
+    _load_listeners.append(listener)
+    if _cached_posts is not None:
+        listener(_cached_posts)
+
+
+def get_bm25_posts() -> List[Dict]:
+    """Return the in-memory corpus behind the BM25 index, loading it on first use."""
+    _ensure_loaded()
+    return _cached_posts
+
+
+def get_bm25_index() -> BM25Okapi:
+    """Return the corpus BM25 index, loading it on first use (e.g. for its IDF statistics)."""
+    _ensure_loaded()
+    return _cached_bm25
+
+
+def get_post_by_url(page_url: str) -> Optional[Dict]:
+    """Look up a corpus post by its page URL (page_url is unique)."""
+    _ensure_loaded()
+    return _posts_by_url.get(page_url)
+
+
+def corpus_version() -> int:
+    """Version of the loaded corpus, bumped every time it is (re)loaded."""
+    return _corpus_version
+
+
 def search_bm25(query: str, top_n: int = 12) -> List[Dict]:
     """
     Search blog posts using BM25.
@@ -115,54 +174,55 @@ def search_bm25(query: str, top_n: int = 12) -> List[Dict]:
     Returns:
         List of dicts with search results
     """
-    global _cached_posts, _cached_bm25
-    
     # Load data if not already cached
-    if _cached_posts is None or _cached_bm25 is None:
-        _load_blogs_from_db()
+    _ensure_loaded()
     
     if not query.strip():
         return []
     
     # Tokenize query
-    tokenized_query = tokenize(query)
+    with timed_stage("tokenize"):
+        tokenized_query = tokenize(query)
     
     if not tokenized_query:
         return []
     
     # Get BM25 scores
-    scores = _cached_bm25.get_scores(tokenized_query)
+    with timed_stage("bm25_score"):
+        scores = _cached_bm25.get_scores(tokenized_query)
     
     # Get top N document indices
-    top_indices = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[:top_n]
+    with timed_stage("topk"):
+        top_indices = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[:top_n]
     
     # Build results
-    results = []
-    for idx in top_indices:
-        post = _cached_posts[idx]
-        
-        # Create content preview (first 300 chars)
-        content_preview = post.get("content", "")[:300]
-        if len(post.get("content", "")) > 300:
-            content_preview += "..."
-        
-        # Try to extract country from location_name (if formatted like "City, Country")
-        location_parts = post.get("location_name", "").split(",")
-        country = location_parts[-1].strip() if len(location_parts) > 1 else ""
-        
-        results.append({
-            "destination": post.get("location_name", "Unknown"),
-            "country": country,
-            "lat": float(post.get("latitude", 0)) if post.get("latitude") else None,
-            "lon": float(post.get("longitude", 0)) if post.get("longitude") else None,
-            "score": float(scores[idx]),
-            "page_title": post.get("page_title", ""),
-            "page_url": post.get("page_url", ""),
-            "blog_url": post.get("blog_url", ""),
-            "author": post.get("page_author", ""),
-            "description": post.get("page_description", ""),
-            "content_preview": content_preview,
-            "full_content": post.get('content', ""),
-        })
-    
-    return results
\ No newline at end of file
+    with timed_stage("hydrate"):
+        return [_result_dict(_cached_posts[idx], float(scores[idx])) for idx in top_indices]
+
+
+def _result_dict(post: Dict, score: float) -> Dict:
+    """Search result fields of one corpus post."""
+    # Create content preview (first 300 chars)
+    content_preview = post.get("content", "")[:300]
+    if len(post.get("content", "")) > 300:
+        content_preview += "..."
+    
+    # Try to extract country from location_name (if formatted like "City, Country")
+    location_parts = post.get("location_name", "").split(",")
+    country = location_parts[-1].strip() if len(location_parts) > 1 else ""
+    
+    return {
+        "id": post.get("id"),
+        "destination": post.get("location_name", "Unknown"),
+        "country": country,
+        "lat": float(post.get("latitude", 0)) if post.get("latitude") else None,
+        "lon": float(post.get("longitude", 0)) if post.get("longitude") else None,
+        "score": score,
+        "page_title": post.get("page_title", ""),
+        "page_url": post.get("page_url", ""),
+        "blog_url": post.get("blog_url", ""),
+        "author": post.get("page_author", ""),
+        "description": post.get("page_description", ""),
+        "content_preview": content_preview,
+        "full_content": post.get('content', ""),
+    }
\ No newline at end of file
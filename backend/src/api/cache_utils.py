@@ -0,0 +1,183 @@
+# backend/src/api/cache_utils.py
+
+"""
+Persistent cache for LLM explanations.
+
+Explanations are keyed by the normalized query, the post's page URL and the
+prompt version, so repeated (query, post) pairs skip the LLM entirely. The
+backend is chosen by URL:
+
+    sqlite:///artifacts/explanation_cache.sqlite   local file (default), shared
+                                                   by workers on one host
+    redis://host:6379/0                            shared across hosts; needs
+                                                   the ``cache`` extra
+
+Entries expire after EXPLANATION_CACHE_TTL_S. The SQLite backend also keeps
+at most EXPLANATION_CACHE_MAX_ENTRIES rows, evicting the least recently used;
+Redis relies on its own ``maxmemory-policy`` for size eviction.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from dotenv import load_dotenv
+
+# Import Logger
+from .logging_utils import get_logger
+
+load_dotenv()
+
+logger = get_logger("cache_utils")
+
+# Empty string disables the cache
+EXPLANATION_CACHE_URL = os.getenv("EXPLANATION_CACHE_URL", "sqlite:///artifacts/explanation_cache.sqlite")
+EXPLANATION_CACHE_TTL_S = int(os.getenv("EXPLANATION_CACHE_TTL_S", str(7 * 24 * 3600)))
+EXPLANATION_CACHE_MAX_ENTRIES = int(os.getenv("EXPLANATION_CACHE_MAX_ENTRIES", "50000"))
+EVICT_EVERY = 64  # writes between size checks
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase and collapse whitespace so trivially different queries share entries."""
+    return " ".join(query.lower().split())
+
+
+def explanation_key(query: str, page_url: str, prompt_version: str) -> str:
+    """Cache key for one (query, post, prompt version) explanation."""
+    raw = "\x1f".join((prompt_version, normalize_query(query), page_url))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ExplanationCache(ABC):
+    """Interface shared by the cache backends."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached explanation, or None if missing or expired."""
+
+    @abstractmethod
+    def set(self, key: str, value: str):
+        """Store an explanation."""
+
+
+class SQLiteExplanationCache(ExplanationCache):
+    """Explanations in a local SQLite file with TTL and LRU size eviction."""
+
+    def __init__(self, path: str, ttl_s: int = None, max_entries: int = None):
+        self.path = path
+        self.ttl_s = EXPLANATION_CACHE_TTL_S if ttl_s is None else ttl_s
+        self.max_entries = EXPLANATION_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self._lock = threading.Lock()
+        self._writes = 0
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        # WAL lets several API workers read while one writes
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS explanations ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS explanations_accessed ON explanations (accessed_at)")
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM explanations WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at <= now:
+                self._conn.execute("DELETE FROM explanations WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE explanations SET accessed_at = ? WHERE key = ?", (now, key))
+        return value
+
+    def set(self, key: str, value: str):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO explanations (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now + self.ttl_s, now),
+            )
+            self._writes += 1
+            if self._writes % EVICT_EVERY == 0:
+                self._evict(now)
+
+    def _evict(self, now: float):
+        """Drop expired rows, then the least recently used rows over the size limit."""
+        self._conn.execute("DELETE FROM explanations WHERE expires_at <= ?", (now,))
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM explanations").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM explanations WHERE key IN "
+                "(SELECT key FROM explanations ORDER BY accessed_at LIMIT ?)",
+                (excess,),
+            )
+            logger.info(f"Evicted {excess} explanation cache entries")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM explanations").fetchone()[0]
+
+
+class RedisExplanationCache(ExplanationCache):
+    """Explanations in Redis, shared by every API instance."""
+
+    def __init__(self, url: str, ttl_s: int = None, client=None):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.ttl_s = EXPLANATION_CACHE_TTL_S if ttl_s is None else ttl_s
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.client.get(f"explanation:{key}")
+        return value.decode("utf-8") if value is not None else None
+
+    def set(self, key: str, value: str):
+        self.client.set(f"explanation:{key}", value.encode("utf-8"), ex=self.ttl_s)
+
+
+_cache = None
+_cache_url = None
+
+
+def get_explanation_cache(url: str = None) -> Optional[ExplanationCache]:
+    """
+    Return the process-wide explanation cache for ``url``.
+
+    Args:
+        url: ``sqlite:///path``, ``redis://...`` or empty to disable;
+            defaults to EXPLANATION_CACHE_URL
+
+    Returns:
+        The cache, or None when caching is disabled
+    """
+    global _cache, _cache_url
+
+    url = EXPLANATION_CACHE_URL if url is None else url
+    if not url:
+        return None
+    if _cache is not None and _cache_url == url:
+        return _cache
+
+    if url.startswith("sqlite:///"):
+        cache = SQLiteExplanationCache(url[len("sqlite:///"):])
+    elif url.startswith(("redis://", "rediss://")):
+        cache = RedisExplanationCache(url)
+    else:
+        raise ValueError(f"Unsupported explanation cache URL: {url!r}")
+
+    _cache, _cache_url = cache, url
+    logger.info(f"Explanation cache ready at {url}")
+    return cache
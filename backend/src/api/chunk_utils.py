@@ -0,0 +1,69 @@
+# backend/src/api/chunk_utils.py
+
+"""
+Multi-vector (chunked) document embeddings.
+
+Long posts are split into overlapping token windows so text past the
+encoder's 512-token limit still reaches the index. Each window is embedded
+as its own vector; a chunk -> post id map lets search results be collapsed
+back to posts, scoring each post by its best-matching chunk.
+"""
+
+import os
+from typing import List, Tuple
+
+import torch
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CHUNK_TOKENS = int(os.getenv("CHUNK_TOKENS", "512"))  # window size incl. special tokens
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "128"))  # tokens shared by neighbouring windows
+
+
+def token_windows(token_ids: List[int], size: int, overlap: int) -> List[List[int]]:
+    """
+    Split a token sequence into overlapping windows.
+
+    Windows start every ``size - overlap`` tokens; the last window is aligned
+    to the end of the sequence so the tail is always covered.
+
+    Args:
+        token_ids: Token ids without special tokens
+        size: Maximum tokens per window
+        overlap: Tokens shared by consecutive windows
+
+    Returns:
+        List of token id windows (a single window for short sequences)
+    """
+    if overlap >= size:
+        raise ValueError(f"Chunk overlap {overlap} must be smaller than the window size {size}")
+    if len(token_ids) <= size:
+        return [list(token_ids)]
+
+    stride = size - overlap
+    starts = list(range(0, len(token_ids) - size + 1, stride))
+    if starts[-1] + size < len(token_ids):
+        starts.append(len(token_ids) - size)
+    return [list(token_ids[start:start + size]) for start in starts]
+
+
+def segment_max(scores: torch.Tensor, segment_ids: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+    """
+    Maximum score per segment, e.g. the best chunk score of each post.
+
+    Runs as a single scatter-reduce, so it is linear in the number of scores
+    and does not need the input grouped or sorted by segment.
+
+    Args:
+        scores: 1-D tensor of scores (higher is better)
+        segment_ids: 1-D tensor with the segment (post id) of each score
+
+    Returns:
+        Tuple of (segment ids, max score per segment), best segment first
+    """
+    segments, inverse = torch.unique(segment_ids, return_inverse=True)
+    best = torch.full((len(segments),), float("-inf"), dtype=scores.dtype)
+    best = best.scatter_reduce(0, inverse, scores, reduce="amax")
+    order = torch.argsort(best, descending=True)
+    return segments[order], best[order]
@@ -0,0 +1,22 @@
+# backend/src/api/content_utils.py
+
+"""
+Post text and content hashes.
+
+The embedding job, the summary job and the API hash the same text to tell
+whether a post changed since its embedding or summary was made. This module
+has no heavy dependencies, so BM25-only deployments can use it without
+loading torch.
+"""
+
+import hashlib
+
+
+def post_text(title: str, description: str, content: str) -> str:
+    """Text that is embedded for a post (title, description and content)."""
+    return f"{title} {description} {content}"
+
+
+def content_hash(text: str) -> str:
+    """Stable hash of the embedded text, used to detect changed posts."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
@@ -0,0 +1,147 @@
+# backend/src/api/context_utils.py
+
+"""
+Query-relevant context selection for LLM prompts.
+
+Instead of sending a whole blog post to the LLM, the post is split into
+sentence-based passages, each passage is scored against the query with BM25
+(corpus IDF from the search index, passage-length normalization within the
+post), and the best passages are packed up to a token budget. The selected
+passages keep their original order, and the opening passage is always kept
+since it usually names the destination.
+"""
+
+import math
+import os
+import re
+from typing import List, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+from .bm25_utils import get_bm25_index, tokenize
+# Import Logger
+from .logging_utils import get_logger
+
+load_dotenv()
+
+logger = get_logger("context_utils")
+
+# Approximate prompt tokens for the post context; 0 sends the full post
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "600"))
+# Sentences are merged into passages of up to this many words
+CONTEXT_PASSAGE_WORDS = int(os.getenv("CONTEXT_PASSAGE_WORDS", "60"))
+
+SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count (about four characters per token for English text)."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def split_passages(text: str, max_words: int = None) -> List[str]:
+    """
+    Split text into sentences and merge neighbours into passages of up to max_words.
+
+    Sentences longer than max_words (e.g. unpunctuated text) are cut into
+    max_words pieces.
+    """
+    max_words = max_words or CONTEXT_PASSAGE_WORDS
+    passages = []
+    current = []
+    for sentence in SENTENCE_RE.split(text):
+        words = sentence.split()
+        for start in range(0, len(words), max_words):
+            piece = words[start:start + max_words]
+            if current and len(current) + len(piece) > max_words:
+                passages.append(" ".join(current))
+                current = []
+            current.extend(piece)
+    if current:
+        passages.append(" ".join(current))
+    return passages
+
+
+def score_passages(query: str, passages: List[str], bm25=None) -> np.ndarray:
+    """
+    BM25 score of every passage for the query, computed in one pass.
+
+    Term frequencies for all (passage, query term) pairs are counted with a
+    single bincount, then the BM25 formula is applied to the whole matrix.
+
+    Args:
+        query: Search query
+        passages: Passages of one post
+        bm25: BM25Okapi index providing idf, k1 and b; defaults to the search index
+
+    Returns:
+        Array with one score per passage
+    """
+    bm25 = bm25 if bm25 is not None else get_bm25_index()
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms or not passages:
+        return np.zeros(len(passages))
+
+    term_ids = {term: i for i, term in enumerate(terms)}
+    passage_tokens = [tokenize(p) for p in passages]
+    lengths = np.array([len(tokens) for tokens in passage_tokens], dtype="float64")
+
+    # Flattened (passage, term) cell of every token that is a query term
+    cells = [
+        row * len(terms) + term_ids[token]
+        for row, tokens in enumerate(passage_tokens)
+        for token in tokens
+        if token in term_ids
+    ]
+    tf = np.bincount(np.array(cells, dtype="int64"), minlength=len(passages) * len(terms))
+    tf = tf.reshape(len(passages), len(terms)).astype("float64")
+
+    idf = np.array([bm25.idf.get(term, 0.0) for term in terms])
+    avg_len = max(lengths.mean(), 1.0)
+    norm = bm25.k1 * (1 - bm25.b + bm25.b * lengths / avg_len)
+    return (idf * tf * (bm25.k1 + 1) / (tf + norm[:, None])).sum(axis=1)
+
+
+def select_context(query: str, text: str, budget: Optional[int] = None, bm25=None) -> str:
+    """
+    Keep the passages of ``text`` most relevant to ``query`` within a token budget.
+
+    Args:
+        query: Search query
+        text: Full post content
+        budget: Approximate token budget; defaults to CONTEXT_TOKEN_BUDGET, 0 disables
+        bm25: BM25Okapi index for the IDF statistics; defaults to the search index
+
+    Returns:
+        Selected passages in their original order, joined with " ... "
+    """
+    budget = CONTEXT_TOKEN_BUDGET if budget is None else budget
+    if not budget or not text or estimate_tokens(text) <= budget:
+        return text
+
+    passages = split_passages(text)
+    try:
+        scores = score_passages(query, passages, bm25)
+    except Exception as e:
+        # Without BM25 statistics fall back to the opening of the post
+        logger.warning(f"Context scoring unavailable, truncating post: {e}")
+        scores = np.zeros(len(passages))
+
+    costs = [estimate_tokens(p) for p in passages]
+    # Opening passage first, then by score (stable, so ties keep document order)
+    order = [0] + [i for i in np.argsort(-scores, kind="stable").tolist() if i != 0]
+
+    chosen = []
+    used = 0
+    for i in order:
+        if used + costs[i] > budget:
+            continue
+        chosen.append(i)
+        used += costs[i]
+
+    if not chosen:
+        # Even the opening passage is over budget: truncate it
+        return passages[0][:budget * CHARS_PER_TOKEN]
+    return " ... ".join(passages[i] for i in sorted(chosen))
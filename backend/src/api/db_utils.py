@@ -0,0 +1,63 @@
+# backend/src/api/db_utils.py
+
+"""
+Process-wide SQLAlchemy engine.
+
+Every module that reads the database shares one engine, and so one
+connection pool, instead of building a new engine (and pool) per call.
+"""
+
+import os
+import threading
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+
+# Import Logger
+from .logging_utils import get_logger
+
+load_dotenv()
+
+logger = get_logger("db_utils")
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+# Recycle connections before managed Postgres (e.g. RDS) drops idle ones
+DB_POOL_RECYCLE_S = int(os.getenv("DB_POOL_RECYCLE_S", "1800"))
+
+_engine = None
+_engine_url = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> Engine:
+    """
+    Return the shared engine for DATABASE_URL, creating it on first use.
+
+    Raises:
+        ValueError: If DATABASE_URL is not set
+    """
+    global _engine, _engine_url
+
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        logger.error("DATABASE_URL not found in environment variables")
+        raise ValueError("DATABASE_URL not found in environment variables")
+
+    with _engine_lock:
+        if _engine is None or _engine_url != database_url:
+            if database_url.startswith("sqlite"):
+                # SQLite picks its own pool class; it takes no size settings
+                _engine = create_engine(database_url)
+            else:
+                _engine = create_engine(
+                    database_url,
+                    pool_size=DB_POOL_SIZE,
+                    max_overflow=DB_MAX_OVERFLOW,
+                    pool_recycle=DB_POOL_RECYCLE_S,
+                    pool_pre_ping=True,
+                )
+            _engine_url = database_url
+            logger.info("Database engine created")
+    return _engine
@@ -0,0 +1,159 @@
+# backend/src/api/embedding_utils.py
+
+"""
+Embedding artifact format shared by the offline embedding job and the API.
+
+The artifact is a base file plus append-only delta files next to it::
+
+    travel_blog_embeddings.pt              {"embeddings": {id: tensor}, "hashes": {id: sha256}}
+    travel_blog_embeddings.delta-00001.pt  {"embeddings": ..., "hashes": ..., "deleted": [id, ...]}
+
+Deltas are applied in order on load, so an incremental refresh only writes
+the posts that changed. A full run rewrites the base and drops the deltas.
+Older artifacts that are a plain ``{id: tensor}`` dict are still accepted.
+
+Chunked (multi-vector) embeddings use a separate single-file artifact::
+
+    travel_blog_chunk_embeddings.pt  {"embeddings": fp16 (n_chunks, dim),
+                                      "post_ids": int64 (n_chunks,),
+                                      "hashes": {id: sha256}}
+"""
+
+import os
+import re
+import tempfile
+from typing import Dict, List, Tuple
+
+import torch
+
+# Import Logger
+from .logging_utils import get_logger
+from .storage_utils import ARTIFACT_CACHE_DIR, get_artifact_store
+
+logger = get_logger("embedding_utils")
+
+DELTA_RE = re.compile(r"\.delta-(\d+)\.pt$")
+
+
+# -----------------------------
+# Object I/O through the artifact store
+# -----------------------------
+def _read_object(path: str):
+    store, name = get_artifact_store(path)
+    # mmap avoids a second in-memory copy of the (already on-disk) artifact
+    return torch.load(store.fetch(name), weights_only=True, mmap=True)
+
+
+def _write_object(data, path: str):
+    store, name = get_artifact_store(path)
+    fd, tmp_path = tempfile.mkstemp(suffix=".pt", dir=_staging_dir())
+    os.close(fd)
+    try:
+        torch.save(data, tmp_path)
+        store.upload(tmp_path, name)
+    finally:
+        os.remove(tmp_path)
+    logger.info(f"Wrote embedding artifact {path}")
+
+
+def _staging_dir() -> str:
+    os.makedirs(ARTIFACT_CACHE_DIR, exist_ok=True)
+    return ARTIFACT_CACHE_DIR
+
+
+def _delete_object(path: str):
+    store, name = get_artifact_store(path)
+    store.delete(name)
+
+
+def _delta_prefix(path: str) -> str:
+    return path[:-len(".pt")] if path.endswith(".pt") else path
+
+
+def list_deltas(path: str) -> List[str]:
+    """Delta files for the artifact at ``path``, in the order they apply."""
+    store, name = get_artifact_store(path)
+    root = path[:-len(name)]
+    names = store.list(_delta_prefix(name) + ".delta-")
+
+    deltas = [root + n for n in names if DELTA_RE.search(n)]
+    return sorted(deltas, key=lambda c: int(DELTA_RE.search(c).group(1)))
+
+
+# -----------------------------
+# Artifact load / write
+# -----------------------------
+def load_embedding_artifact(path: str) -> Tuple[Dict[int, torch.Tensor], Dict[int, str]]:
+    """
+    Load the base artifact and apply its deltas.
+
+    Returns:
+        Tuple of ({blog_id: embedding}, {blog_id: content hash}). Hashes are
+        empty for posts written by the legacy format.
+    """
+    data = _read_object(path)
+    if "embeddings" in data:
+        embeddings, hashes = dict(data["embeddings"]), dict(data.get("hashes", {}))
+    else:
+        embeddings, hashes = dict(data), {}
+
+    for delta in list_deltas(path):
+        update = _read_object(delta)
+        for blog_id in update.get("deleted", []):
+            embeddings.pop(blog_id, None)
+            hashes.pop(blog_id, None)
+        embeddings.update(update["embeddings"])
+        hashes.update(update["hashes"])
+
+    return embeddings, hashes
+
+
+def write_base_artifact(path: str, embeddings: Dict[int, torch.Tensor], hashes: Dict[int, str]):
+    """Write a full artifact and drop deltas that it supersedes."""
+    stale = list_deltas(path)
+    _write_object({"embeddings": embeddings, "hashes": hashes}, path)
+    for delta in stale:
+        _delete_object(delta)
+
+
+def append_delta(
+    path: str,
+    embeddings: Dict[int, torch.Tensor],
+    hashes: Dict[int, str],
+    deleted: List[int],
+) -> str:
+    """Write the next delta for the artifact at ``path`` and return its location."""
+    existing = list_deltas(path)
+    number = int(DELTA_RE.search(existing[-1]).group(1)) + 1 if existing else 1
+    delta = f"{_delta_prefix(path)}.delta-{number:05d}.pt"
+    _write_object({"embeddings": embeddings, "hashes": hashes, "deleted": list(deleted)}, delta)
+    return delta
+
+
+# -----------------------------
+# Chunk artifact
+# -----------------------------
+def write_chunk_artifact(
+    path: str,
+    embeddings: torch.Tensor,
+    post_ids: torch.Tensor,
+    hashes: Dict[int, str],
+):
+    """Write chunk vectors (stored as float16) with the post id of each chunk."""
+    if len(embeddings) != len(post_ids):
+        raise ValueError(f"Got {len(embeddings)} chunk vectors for {len(post_ids)} post ids")
+    _write_object(
+        {"embeddings": embeddings.half(), "post_ids": post_ids.long(), "hashes": hashes},
+        path,
+    )
+
+
+def load_chunk_artifact(path: str) -> Tuple[torch.Tensor, torch.Tensor, Dict[int, str]]:
+    """
+    Load a chunk artifact.
+
+    Returns:
+        Tuple of (float16 chunk embeddings, post id per chunk, {blog_id: content hash})
+    """
+    data = _read_object(path)
+    return data["embeddings"], data["post_ids"], dict(data["hashes"])
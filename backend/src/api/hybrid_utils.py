@@ -0,0 +1,79 @@
+# backend/src/api/hybrid_utils.py
+
+"""
+Rank fusion for hybrid retrieval.
+
+Both fusion methods take ranked lists of result dicts (best first) and
+return (key, fused score) pairs sorted best first, where ``key`` identifies
+the same document across engines (the post's page URL).
+"""
+
+from typing import Callable, Dict, List, Optional, Tuple
+
+RRF_K = 60
+
+
+def reciprocal_rank_fusion(
+    ranked_lists: List[List[Dict]],
+    key: Callable[[Dict], str],
+    k: int = RRF_K,
+) -> List[Tuple[str, float]]:
+    """
+    Reciprocal-rank fusion: score(d) = sum over lists of 1 / (k + rank(d)).
+
+    Args:
+        ranked_lists: Result lists, each ordered best first
+        key: Function returning the document key of a result
+        k: Smoothing constant; larger values flatten the rank contribution
+
+    Returns:
+        List of (key, fused score), best first
+    """
+    fused: Dict[str, float] = {}
+    for results in ranked_lists:
+        for rank, result in enumerate(results, start=1):
+            doc = key(result)
+            fused[doc] = fused.get(doc, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+
+def _min_max(values: List[float]) -> List[float]:
+    if not values:
+        return []
+    low, high = min(values), max(values)
+    if high == low:
+        return [1.0] * len(values)
+    return [(v - low) / (high - low) for v in values]
+
+
+def blend_scores(
+    bm25_results: List[Dict],
+    faiss_results: List[Dict],
+    key: Callable[[Dict], str],
+    alpha: float = 0.5,
+    default: Optional[float] = 0.0,
+) -> List[Tuple[str, float]]:
+    """
+    Blend min-max normalized BM25 scores and FAISS similarities.
+
+    FAISS distances (lower is better) are flipped to similarities before
+    blending. A document missing from one engine gets ``default`` for it.
+
+    Args:
+        bm25_results: BM25 results with a ``score`` field
+        faiss_results: FAISS results with a ``distance`` field
+        key: Function returning the document key of a result
+        alpha: Weight of the BM25 component (1 - alpha for FAISS)
+
+    Returns:
+        List of (key, blended score), best first
+    """
+    sparse = dict(zip(map(key, bm25_results), _min_max([r["score"] for r in bm25_results])))
+    # Negated so a single hit or tied distances normalize to 1.0, not 0.0
+    dense = dict(zip(map(key, faiss_results), _min_max([-r["distance"] for r in faiss_results])))
+
+    blended = {
+        doc: alpha * sparse.get(doc, default) + (1 - alpha) * dense.get(doc, default)
+        for doc in sparse.keys() | dense.keys()
+    }
+    return sorted(blended.items(), key=lambda item: item[1], reverse=True)
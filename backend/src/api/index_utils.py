@@ -0,0 +1,235 @@
+# backend/src/api/index_utils.py
+
+"""
+Dense vector index with selectable storage modes.
+
+Modes trade memory per vector for accuracy:
+
+    flat    float32 vectors (exact, 4 bytes/dim)
+    fp16    float16 scalar quantizer (2 bytes/dim)
+    sq8     int8 scalar quantizer (1 byte/dim)
+    pq      product quantizer (FAISS_PQ_M bytes per vector)
+    binary  sign bits searched by Hamming distance (1 bit/dim)
+
+Any mode can re-rank its top-N candidates exactly against full-precision
+vectors kept in a memory-mapped file, so only the compressed codes have to
+stay resident in RAM. The same file can be kept without re-ranking for
+callers that gather vectors by id (keep_vectors). Ids passed to the index are
+caller-defined row ids.
+
+The index can also hold Matryoshka-truncated vectors (EMBEDDING_DIM): only
+the first dimensions are indexed, re-normalized, while the re-rank file keeps
+the full vectors so the shortlist can be re-scored at full dimension.
+"""
+
+import os
+import tempfile
+from typing import Optional, Tuple
+
+import faiss
+import numpy as np
+from dotenv import load_dotenv
+
+# Import Logger
+from .logging_utils import get_logger
+
+load_dotenv()
+
+logger = get_logger("index_utils")
+
+STORAGE_MODES = ("flat", "fp16", "sq8", "pq", "binary")
+
+FAISS_STORAGE_MODE = os.getenv("FAISS_STORAGE_MODE", "flat")
+FAISS_RERANK_N = int(os.getenv("FAISS_RERANK_N", "0"))  # 0 disables exact re-rank
+FAISS_PQ_M = int(os.getenv("FAISS_PQ_M", "0"))  # sub-quantizers; 0 uses index dim / 8
+VECTOR_MMAP_PATH = os.getenv("VECTOR_MMAP_PATH", "artifacts/vectors.f32")
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "0"))  # 0 keeps the full model dimension
+
+
+def truncate_embeddings(vectors: np.ndarray, dim: int) -> np.ndarray:
+    """Keep the first ``dim`` Matryoshka dimensions and re-normalize to unit length."""
+    if dim >= vectors.shape[1]:
+        return np.ascontiguousarray(vectors, dtype="float32")
+    prefix = np.ascontiguousarray(vectors[:, :dim], dtype="float32")
+    norms = np.linalg.norm(prefix, axis=1, keepdims=True)
+    return prefix / np.maximum(norms, 1e-12)
+
+
+class MmapVectorStore:
+    """
+    Full-precision vectors in a float32 file, addressed by row id.
+
+    Every store writes its own temporary file next to ``path`` and only
+    replaces ``path`` once it is complete (publish), so a rebuild or another
+    worker never truncates a file that a live index still has mapped. The
+    store keeps its file open and grows it through that handle, which stays
+    valid after the name is replaced.
+    """
+
+    def __init__(self, path: str, dim: int):
+        self.path = path
+        self.dim = dim
+        self.rows = 0
+        self.array = None
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, self._tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+        self._file = os.fdopen(fd, "r+b")
+
+    def _grow(self, rows: int):
+        # Only ever extends the file, which is safe while it is mapped
+        self._file.truncate(rows * self.dim * 4)
+        self.rows = rows
+        self.array = np.memmap(self._file, dtype="float32", mode="r+", shape=(rows, self.dim))
+
+    def publish(self):
+        """Atomically move the finished file to ``path``."""
+        if self._tmp_path is not None:
+            os.replace(self._tmp_path, self.path)
+            self._tmp_path = None
+
+    def write(self, ids: np.ndarray, vectors: np.ndarray):
+        needed = int(ids.max()) + 1
+        if needed > self.rows:
+            self._grow(needed)
+        self.array[ids] = vectors
+        self.array.flush()
+
+    def gather(self, ids: np.ndarray) -> np.ndarray:
+        return np.asarray(self.array[ids])
+
+
+class DenseIndex:
+    """
+    Id-mapped FAISS index with a storage mode and optional exact re-rank.
+
+    ``build``, ``add`` and ``search`` take full-dimension vectors; truncation
+    to ``index_dim`` happens inside. Full vectors are stored in an
+    MmapVectorStore (``vectors``) when re-ranking or ``keep_vectors`` asks
+    for them, never in RAM. ``search`` returns (distances, ids) like
+    a FAISS index. Distances are squared L2 (at ``index_dim``, or at full
+    dimension after re-ranking), except for ``binary`` without re-ranking,
+    which returns Hamming distances.
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        mode: str = None,
+        rerank_n: int = None,
+        vectors_path: Optional[str] = None,
+        pq_m: int = None,
+        index_dim: int = None,
+        keep_vectors: bool = False,
+    ):
+        mode = mode or FAISS_STORAGE_MODE
+        if mode not in STORAGE_MODES:
+            raise ValueError(f"Unknown FAISS storage mode: {mode!r}")
+
+        index_dim = index_dim or EMBEDDING_DIM or dim
+        if index_dim > dim:
+            raise ValueError(f"Index dimension {index_dim} exceeds embedding dimension {dim}")
+
+        self.dim = dim
+        self.index_dim = index_dim
+        self.mode = mode
+        self.rerank_n = FAISS_RERANK_N if rerank_n is None else rerank_n
+        self.pq_m = pq_m or FAISS_PQ_M or max(1, index_dim // 8)
+        if mode == "pq" and index_dim % self.pq_m:
+            raise ValueError(f"FAISS_PQ_M={self.pq_m} must divide the index dimension {index_dim}")
+        self.index = None
+        self.vectors = None
+        if self.rerank_n or keep_vectors:
+            self.vectors = MmapVectorStore(vectors_path or VECTOR_MMAP_PATH, dim)
+
+    @property
+    def ntotal(self) -> int:
+        return self.index.ntotal if self.index is not None else 0
+
+    def _binary_codes(self, vectors: np.ndarray) -> np.ndarray:
+        return np.packbits(vectors > 0, axis=1)
+
+    def _make_index(self, train: np.ndarray):
+        if self.mode == "binary":
+            return faiss.IndexBinaryIDMap2(faiss.IndexBinaryFlat(self.index_dim))
+
+        if self.mode == "pq":
+            # 8-bit codebooks need 256 training points; shrink them for tiny corpora
+            nbits = 8 if len(train) >= 256 else max(1, int(np.log2(len(train))))
+            factory = f"IDMap2,PQ{self.pq_m}x{nbits}"
+        else:
+            factory = {"flat": "IDMap2,Flat", "fp16": "IDMap2,SQfp16", "sq8": "IDMap2,SQ8"}[self.mode]
+
+        index = faiss.index_factory(self.index_dim, factory)
+        if not index.is_trained:
+            index.train(train)
+        return index
+
+    def build(self, vectors: np.ndarray, ids: np.ndarray):
+        vectors = np.ascontiguousarray(vectors, dtype="float32")
+        self.index = self._make_index(truncate_embeddings(vectors, self.index_dim))
+        self.add(vectors, ids)
+        if self.vectors is not None:
+            self.vectors.publish()
+        logger.info(
+            f"Built {self.mode} index with {self.ntotal} vectors "
+            f"(dim={self.index_dim}/{self.dim}, rerank_n={self.rerank_n})"
+        )
+        return self
+
+    def add(self, vectors: np.ndarray, ids: np.ndarray):
+        vectors = np.ascontiguousarray(vectors, dtype="float32")
+        ids = np.asarray(ids, dtype="int64")
+        truncated = truncate_embeddings(vectors, self.index_dim)
+        if self.mode == "binary":
+            self.index.add_with_ids(self._binary_codes(truncated), ids)
+        else:
+            self.index.add_with_ids(truncated, ids)
+        if self.vectors is not None:
+            self.vectors.write(ids, vectors)
+
+    def remove(self, ids: np.ndarray) -> int:
+        return self.index.remove_ids(np.asarray(ids, dtype="int64"))
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        queries = np.ascontiguousarray(queries, dtype="float32")
+        truncated = truncate_embeddings(queries, self.index_dim)
+        rerank = self.rerank_n > 0 and self.vectors is not None
+        fetch = max(k, self.rerank_n) if rerank else k
+
+        if self.mode == "binary":
+            distances, ids = self.index.search(self._binary_codes(truncated), fetch)
+            distances = distances.astype("float32")
+        else:
+            distances, ids = self.index.search(truncated, fetch)
+
+        if not rerank:
+            return distances, ids
+        return self._rerank(queries, ids, k)
+
+    def _rerank(self, queries: np.ndarray, candidates: np.ndarray, k: int):
+        """Exact squared-L2 re-rank of each query's candidates."""
+        out_distances = np.full((len(queries), k), np.inf, dtype="float32")
+        out_ids = np.full((len(queries), k), -1, dtype="int64")
+
+        for q, row in enumerate(candidates):
+            row = row[row >= 0]
+            if not len(row):
+                continue
+            full = self.vectors.gather(row)
+            exact = ((full - queries[q]) ** 2).sum(axis=1)
+            order = np.argsort(exact)[:k]
+            out_distances[q, :len(order)] = exact[order]
+            out_ids[q, :len(order)] = row[order]
+
+        return out_distances, out_ids
+
+    def memory_per_vector(self) -> float:
+        """Bytes of resident index memory per stored vector."""
+        if not self.ntotal:
+            return 0.0
+        if self.mode == "binary":
+            size = len(faiss.serialize_index_binary(self.index))
+        else:
+            size = len(faiss.serialize_index(self.index))
+        return size / self.ntotal
@@ -0,0 +1,160 @@
+# backend/src/api/jobs_utils.py
+
+"""
+In-process background jobs for work that should not hold a request open,
+such as LLM explanations.
+
+A job is queued with the coroutine that does the work and is picked up by a
+small pool of asyncio worker tasks on the API's event loop. The coroutine
+fills the job's result slots as it goes, so a client polling the job sees
+partial results before the job is done. Finished jobs are kept for
+JOB_TTL_S seconds. At most JOB_QUEUE_MAX jobs wait for a worker; submit
+raises JobQueueFull beyond that, and jobs evicted before a worker reaches
+them are skipped.
+
+Jobs live in the memory of one API process: with several workers, polls must
+reach the process that accepted the search (e.g. sticky sessions).
+"""
+
+import asyncio
+import math
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Awaitable, Callable, List, Optional
+
+from dotenv import load_dotenv
+
+# Import Logger
+from .logging_utils import get_logger
+
+load_dotenv()
+
+logger = get_logger("jobs_utils")
+
+# Jobs processed at the same time
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+# Seconds a job is kept after it was created
+JOB_TTL_S = int(os.getenv("JOB_TTL_S", "600"))
+# Jobs waiting for a worker before submit refuses new ones
+JOB_QUEUE_MAX = int(os.getenv("JOB_QUEUE_MAX", "100"))
+MAX_JOBS = 1000
+
+
+class JobQueueFull(Exception):
+    """Too many jobs are waiting; ``retry_after_s`` estimates when one will have started."""
+
+    def __init__(self, pending: int, retry_after_s: int):
+        super().__init__(f"Job queue full ({pending} pending)")
+        self.retry_after_s = retry_after_s
+
+
+class Job:
+    """State of one background job, as reported to polling clients."""
+
+    def __init__(self, total: int):
+        self.job_id = uuid.uuid4().hex
+        self.status = "pending"  # pending -> running -> done | failed
+        self.results: List[Optional[object]] = [None] * total
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+    @property
+    def completed(self) -> int:
+        return sum(result is not None for result in self.results)
+
+    def set_result(self, index: int, result):
+        self.results[index] = result
+
+
+class JobQueue:
+    """
+    Queue of jobs drained by ``workers`` asyncio tasks.
+
+    Workers are started on first submit, on the running event loop.
+    """
+
+    def __init__(self, workers: int = None, ttl_s: int = None, max_jobs: int = MAX_JOBS, max_pending: int = None):
+        self.workers = JOB_WORKERS if workers is None else workers
+        self.ttl_s = JOB_TTL_S if ttl_s is None else ttl_s
+        self.max_jobs = max_jobs
+        self.max_pending = JOB_QUEUE_MAX if max_pending is None else max_pending
+        self._jobs = OrderedDict()
+        self._service_s = 0.0  # moving average of job run time
+        self._queue = None
+        self._tasks = []
+        self._loop = None
+
+    def _start(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def _prune(self):
+        """Drop expired jobs, then the oldest ones until there is room for a new job."""
+        cutoff = time.time() - self.ttl_s
+        while self._jobs:
+            job = next(iter(self._jobs.values()))
+            if job.created_at > cutoff and len(self._jobs) < self.max_jobs:
+                break
+            self._jobs.popitem(last=False)
+
+    def submit(self, total: int, run: Callable[[Job], Awaitable]) -> Job:
+        """
+        Queue a job with ``total`` result slots.
+
+        Args:
+            total: Number of results the job will produce
+            run: Coroutine function doing the work; it receives the job and
+                fills its slots with set_result
+
+        Returns:
+            The queued job
+
+        Raises:
+            JobQueueFull: If max_pending jobs are already waiting
+        """
+        self._start()
+        self._prune()
+        job = Job(total)
+        try:
+            self._queue.put_nowait((job, run))
+        except asyncio.QueueFull:
+            pending = self._queue.qsize()
+            retry_after_s = max(1, math.ceil((pending + 1) * self._service_s / max(self.workers, 1)))
+            raise JobQueueFull(pending, retry_after_s) from None
+        self._jobs[job.job_id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """The job with this id, or None if unknown or expired."""
+        self._prune()
+        return self._jobs.get(job_id)
+
+    async def _worker(self):
+        while True:
+            job, run = await self._queue.get()
+            if self._jobs.get(job.job_id) is not job:
+                # Evicted while queued: nobody can poll it any more
+                logger.info(f"Skipping evicted job {job.job_id}")
+                self._queue.task_done()
+                continue
+            job.status = "running"
+            start = time.perf_counter()
+            try:
+                await run(job)
+                job.status = "done"
+            except Exception as e:
+                logger.error(f"Job {job.job_id} failed: {e}")
+                job.status = "failed"
+                job.error = str(e)
+            finally:
+                job.finished_at = time.time()
+                elapsed = time.perf_counter() - start
+                self._service_s = elapsed if not self._service_s else 0.8 * self._service_s + 0.2 * elapsed
+                self._queue.task_done()
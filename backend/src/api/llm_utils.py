@@ -1,7 +1,16 @@
 import os
-from huggingface_hub import InferenceClient
+import re
+import json
+import time
+import asyncio
+from huggingface_hub import AsyncInferenceClient, InferenceClient
 from dotenv import load_dotenv
 
+from .cache_utils import explanation_key, get_explanation_cache
+from .context_utils import select_context
+from .metrics_utils import record_cache, timed_stage, track_engine
+from .resilience_utils import CircuitBreaker, CircuitOpenError, hedged, time_left
+from .summary_utils import get_summary
 # Import Logger
 from .logging_utils import get_logger
 
@@ -17,12 +26,64 @@ if hf_token:
 else:
     logger.warning("HF_TOKEN not found. LLM features may fail.")
 
+# Seconds before a single explanation call is abandoned
+LLM_TIMEOUT_S = float(os.getenv("LLM_TIMEOUT_S", "30"))
+# Optional OpenAI-compatible endpoint replacing the HF router (e.g. tests/llm_stub_server.py)
+LLM_BASE_URL = os.getenv("LLM_BASE_URL") or None
+
 client = InferenceClient(
+    base_url=LLM_BASE_URL,
+    token=hf_token,
+    timeout=LLM_TIMEOUT_S,
+)
+async_client = AsyncInferenceClient(
+    base_url=LLM_BASE_URL,
     token=hf_token,
+    timeout=LLM_TIMEOUT_S,
 )
 logger.info("Built Client")
 
-def build_prompt(query, blog_post):
+LLM_MODEL = "deepseek-ai/DeepSeek-V3.2"
+# Part of the explanation cache key: bump when build_prompt, LLM_MODEL or the post context changes
+PROMPT_VERSION = "v3"
+# Maximum explanation calls in flight across all requests
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+# "batch": one LLM call explains all top results; "per-result": one call each
+EXPLANATION_MODE = os.getenv("EXPLANATION_MODE", "batch")
+# Consecutive LLM failures that open the circuit breaker; 0 disables it
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+# Seconds the breaker stays open before a trial call is let through
+LLM_BREAKER_RESET_S = float(os.getenv("LLM_BREAKER_RESET_S", "30"))
+# Send a second, hedged call if the first has not answered after this many seconds; 0 disables
+LLM_HEDGE_AFTER_S = float(os.getenv("LLM_HEDGE_AFTER_S", "0"))
+
+UNAVAILABLE_MESSAGE = "Explanation unavailable (LLM temporarily unavailable)."
+
+JSON_ARRAY_RE = re.compile(r"\[.*\]", re.DOTALL)
+
+_llm_semaphore = None
+_breaker = CircuitBreaker("llm", LLM_BREAKER_FAILURES, LLM_BREAKER_RESET_S)
+track_engine("llm", lambda: bool(hf_token) and _breaker.state != "open")
+
+
+def _get_semaphore():
+    # Created on first use so it belongs to the server's event loop
+    global _llm_semaphore
+    if _llm_semaphore is None:
+        _llm_semaphore = asyncio.BoundedSemaphore(LLM_MAX_CONCURRENCY)
+    return _llm_semaphore
+
+def post_context(page_url, post_text):
+    """
+    Post text to explain from: the offline summary when one is stored,
+    otherwise the full post (trimmed to the query-relevant passages later).
+    """
+    return get_summary(page_url) or post_text
+
+
+def build_prompt(query, blog_post, context_budget=None):
+    # Only the passages most relevant to the query, within CONTEXT_TOKEN_BUDGET
+    blog_post = select_context(query, blog_post, budget=context_budget)
     prompt = f"""
     You are an AI assistant helping explain why the returned post about a vacation spot was retrieved for the given query.
     The results were generated through FAISS.
@@ -37,6 +98,60 @@ def build_prompt(query, blog_post):
     return prompt.strip()
 
 
+def build_batch_prompt(query, posts, context_budget=None):
+    """
+    One prompt asking for an explanation of every post, returned as a JSON array.
+
+    Args:
+        query: Search query
+        posts: List of (destination, post text) tuples, best result first
+        context_budget: Token budget per post for select_context
+    """
+    sections = []
+    for i, (destination, blog_post) in enumerate(posts, start=1):
+        blog_post = select_context(query, blog_post, budget=context_budget)
+        sections.append(f"[{i}] Destination: {destination}\n{blog_post}")
+    numbered = "\n\n".join(sections)
+
+    prompt = f"""
+    You are an AI assistant helping explain why the returned posts about vacation spots were retrieved for the given query.
+    The results were generated through FAISS.
+
+    Given the following query: '{query}'
+
+    And the {len(posts)} returned neighbors (blog posts about travel), numbered:
+
+    {numbered}
+
+    For each numbered post, explain in clear, human terms why this vacation location is a good option for the user to consider given their request query.
+    Please reiterate the name of the location, being as specific as possible. Each explanation should be a maximum of 8 sentences.
+    Respond with only a JSON array of {len(posts)} strings, one explanation per post, in the same order as the posts.
+    """
+    return prompt.strip()
+
+
+def parse_batch_explanations(text, expected):
+    """
+    Parse the JSON array returned for a batch prompt.
+
+    Tolerates code fences or prose around the array.
+
+    Raises:
+        ValueError: If no array of ``expected`` non-empty strings can be read
+    """
+    match = JSON_ARRAY_RE.search(text or "")
+    if match is None:
+        raise ValueError("No JSON array in batch explanation response")
+    explanations = json.loads(match.group(0))
+    if (
+        not isinstance(explanations, list)
+        or len(explanations) != expected
+        or not all(isinstance(e, str) and e.strip() for e in explanations)
+    ):
+        raise ValueError(f"Expected a JSON array of {expected} explanations")
+    return [e.strip() for e in explanations]
+
+
 def explain_results(query, post_text):
 
     prompt = build_prompt(query, post_text)
@@ -44,20 +159,292 @@ def explain_results(query, post_text):
 
     if hf_token:
         try:
-            completion = client.chat.completions.create(
-                model="deepseek-ai/DeepSeek-V3.2",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-            )
+            _breaker.before_call()
+        except CircuitOpenError as e:
+            logger.warning(f"Skipping LLM explanation: {e}")
+            return UNAVAILABLE_MESSAGE
+        try:
+            with timed_stage("llm_call"):
+                completion = client.chat.completions.create(
+                    model=LLM_MODEL,
+                    messages=[
+                        {
+                            "role": "user",
+                            "content": prompt
+                        }
+                    ],
+                )
             gen_text = completion.choices[0].message['content']
+            _breaker.record_success()
             return gen_text
         except Exception as e:
+            _breaker.record_failure()
             logger.error(f"LLM explanation generation failed: {e}")
             return "Explanation unavailable due to an error."
     else:
         logger.warning("Skipping LLM explanation: No token available")
-        return "Explanation unavailable (No API Token)."
\ No newline at end of file
+        return "Explanation unavailable (No API Token)."
+
+
+def lookup_explanation(query, page_url):
+    """
+    Cached explanation for (query, page_url), or None. Cache errors count as a miss.
+
+    Blocks on SQLite/Redis I/O; async code calls it in a worker thread.
+    """
+    if not page_url:
+        return None
+    cache = get_explanation_cache()
+    if cache is None:
+        return None
+    try:
+        text = cache.get(explanation_key(query, page_url, PROMPT_VERSION))
+    except Exception as e:
+        logger.error(f"Explanation cache lookup failed: {e}")
+        text = None
+    record_cache("explanation", text is not None)
+    return text
+
+
+def store_explanation(query, page_url, text):
+    """Cache a successfully generated explanation. Blocking, like lookup_explanation."""
+    if not page_url or not text:
+        return
+    cache = get_explanation_cache()
+    if cache is None:
+        return
+    try:
+        cache.set(explanation_key(query, page_url, PROMPT_VERSION), text)
+    except Exception as e:
+        logger.error(f"Explanation cache write failed: {e}")
+
+
+async def _complete(prompt):
+    """
+    One chat completion, guarded by the request deadline and circuit breaker.
+
+    Waits at most the request's remaining time (capped at LLM_TIMEOUT_S),
+    queueing for the shared semaphore included. With LLM_HEDGE_AFTER_S set, a
+    slow call is raced against a second one.
+
+    Raises:
+        asyncio.TimeoutError: If the deadline passes first
+        CircuitOpenError: If the breaker is open; the LLM is not called
+    """
+    timeout = time_left(LLM_TIMEOUT_S)
+    if timeout <= 0:
+        raise asyncio.TimeoutError("Request deadline already passed")
+    _breaker.before_call()
+
+    async def attempt():
+        async with _get_semaphore():
+            with timed_stage("llm_call"):
+                completion = await async_client.chat.completions.create(
+                    model=LLM_MODEL,
+                    messages=[
+                        {
+                            "role": "user",
+                            "content": prompt
+                        }
+                    ],
+                )
+        return completion.choices[0].message['content']
+
+    try:
+        text = await asyncio.wait_for(hedged(attempt, LLM_HEDGE_AFTER_S), timeout=timeout)
+    except asyncio.CancelledError:
+        # Caller went away: the outcome says nothing about the LLM
+        _breaker.abandon()
+        raise
+    except asyncio.TimeoutError:
+        # Only a call that used the full LLM_TIMEOUT_S counts against the LLM;
+        # running out of the request's own (shorter) budget says nothing about it
+        if timeout < LLM_TIMEOUT_S:
+            _breaker.abandon()
+        else:
+            _breaker.record_failure()
+        raise
+    except Exception:
+        _breaker.record_failure()
+        raise
+    _breaker.record_success()
+    return text
+
+
+async def stream_explanation_async(query, post_text, page_url=None):
+    """
+    Yield the explanation for one post as text deltas while the LLM generates it.
+
+    Holds a semaphore slot for the whole stream. A stream still running after
+    LLM_TIMEOUT_S raises asyncio.TimeoutError and counts as an LLM failure,
+    like a completion in _complete; the caller is responsible for the request
+    deadline (e.g. asyncio.wait_for around the consuming loop), and a stream
+    it cancels is not counted. A stream that completes is cached under
+    page_url. Raises CircuitOpenError without calling the LLM while the
+    breaker is open.
+    """
+    prompt = build_prompt(query, post_context(page_url, post_text))
+    logger.info("Built Prompt")
+
+    if not hf_token:
+        logger.warning("Skipping LLM explanation: No token available")
+        yield "Explanation unavailable (No API Token)."
+        return
+
+    _breaker.before_call()
+    # Budget of the whole stream, queueing for the semaphore included
+    budget_end = time.monotonic() + LLM_TIMEOUT_S
+    try:
+        async with _get_semaphore():
+            # The whole stream counts as one call, time to the last token
+            with timed_stage("llm_call"):
+                stream = await asyncio.wait_for(
+                    async_client.chat.completions.create(
+                        model=LLM_MODEL,
+                        messages=[
+                            {
+                                "role": "user",
+                                "content": prompt
+                            }
+                        ],
+                        stream=True,
+                    ),
+                    timeout=budget_end - time.monotonic(),
+                )
+                parts = []
+                chunks = aiter(stream)
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(anext(chunks), timeout=budget_end - time.monotonic())
+                    except StopAsyncIteration:
+                        break
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        parts.append(delta)
+                        yield delta
+    except (asyncio.CancelledError, GeneratorExit):
+        # Cancelled by the caller (e.g. the request deadline): says nothing about the LLM
+        _breaker.abandon()
+        raise
+    except Exception:
+        # Upstream errors and asyncio.TimeoutError at the LLM_TIMEOUT_S cap
+        _breaker.record_failure()
+        raise
+    _breaker.record_success()
+    await asyncio.to_thread(store_explanation, query, page_url, "".join(parts))
+
+
+async def explain_results_async(query, post_text):
+    """
+    Async version of explain_results for use inside the API's event loop.
+
+    The call waits for a slot in the shared semaphore and is cancelled after
+    LLM_TIMEOUT_S seconds or at the request deadline (queueing included), so
+    one slow completion cannot hold a request open. Uncached; see
+    explain_results_cached.
+    """
+    text, _ = await explain_results_cached(query, post_text, page_url=None)
+    return text
+
+
+async def explain_results_cached(query, post_text, page_url):
+    """
+    Explanation for one post, served from the explanation cache when possible.
+
+    Misses call the LLM under the shared semaphore, the request deadline and
+    the circuit breaker. Only real completions are cached; fallback messages
+    are not.
+
+    Returns:
+        Tuple of (explanation text, whether it came from the cache)
+    """
+    cached = await asyncio.to_thread(lookup_explanation, query, page_url)
+    if cached is not None:
+        return cached, True
+
+    if not hf_token:
+        logger.warning("Skipping LLM explanation: No token available")
+        return "Explanation unavailable (No API Token).", False
+
+    prompt = build_prompt(query, post_context(page_url, post_text))
+    logger.info("Built Prompt")
+    try:
+        text = await _complete(prompt)
+    except asyncio.TimeoutError:
+        logger.error("LLM explanation timed out")
+        return "Explanation unavailable (timed out).", False
+    except CircuitOpenError as e:
+        logger.warning(f"Skipping LLM explanation: {e}")
+        return UNAVAILABLE_MESSAGE, False
+    except Exception as e:
+        logger.error(f"LLM explanation generation failed: {e}")
+        return "Explanation unavailable due to an error.", False
+
+    await asyncio.to_thread(store_explanation, query, page_url, text)
+    return text, False
+
+
+async def explain_batch_cached(query, items):
+    """
+    Explanations for several posts from a single LLM call.
+
+    Cached posts are served from the explanation cache; the rest share one
+    batch prompt. If the batch call fails or its JSON cannot be parsed, the
+    uncached posts fall back to concurrent per-result calls; a timeout or an
+    open circuit is reported as is rather than retried.
+
+    Args:
+        query: Search query
+        items: List of (destination, post text, page_url) tuples, best first
+
+    Returns:
+        List of (explanation text, whether it came from the cache), in order
+    """
+    outcomes = [None] * len(items)
+    misses = []
+    # One worker thread does every cache lookup, off the event loop
+    lookups = await asyncio.to_thread(
+        lambda: [lookup_explanation(query, page_url) for _, _, page_url in items]
+    )
+    for i, cached in enumerate(lookups):
+        if cached is not None:
+            outcomes[i] = (cached, True)
+        else:
+            misses.append(i)
+
+    if len(misses) > 1 and hf_token:
+        prompt = build_batch_prompt(
+            query, [(items[i][0], post_context(items[i][2], items[i][1])) for i in misses]
+        )
+        logger.info(f"Built batch prompt for {len(misses)} results")
+        try:
+            text = await _complete(prompt)
+            generated = list(zip(misses, parse_batch_explanations(text, len(misses))))
+            await asyncio.to_thread(
+                lambda: [store_explanation(query, items[i][2], explanation) for i, explanation in generated]
+            )
+            for i, explanation in generated:
+                outcomes[i] = (explanation, False)
+            misses = []
+        except asyncio.TimeoutError:
+            # Retrying per result would double the wait; report the timeout instead
+            logger.error("Batch LLM explanation timed out")
+            for i in misses:
+                outcomes[i] = ("Explanation unavailable (timed out).", False)
+            misses = []
+        except CircuitOpenError as e:
+            logger.warning(f"Skipping batch LLM explanation: {e}")
+            for i in misses:
+                outcomes[i] = (UNAVAILABLE_MESSAGE, False)
+            misses = []
+        except Exception as e:
+            logger.error(f"Batch LLM explanation failed ({e}); falling back to per-result calls")
+
+    if misses:
+        fallback = await asyncio.gather(
+            *(explain_results_cached(query, items[i][1], items[i][2]) for i in misses)
+        )
+        for i, outcome in zip(misses, fallback):
+            outcomes[i] = outcome
+
+    return outcomes
@@ -1,7 +1,239 @@
+import atexit
 import logging
 import json
+import os
+import queue
+import random
 import sys
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, List, Optional
+
+import orjson
+
+# -----------------------------
+# Request context
+# -----------------------------
+# Spans are exported as OTLP/JSON (one ExportTraceServiceRequest per request)
+# to a JSON-lines file and/or POSTed to a collector; neither set disables export
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "")
+TRACE_EXPORT_URL = os.getenv("TRACE_EXPORT_URL", "")
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+SERVICE_NAME = os.getenv("SERVICE_NAME", "travel-recommender-api")
+
+
+class Span:
+    """One timed operation of a request; ``parent_id`` links nested spans."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes
+        self.error = None
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+
+class RequestContext:
+    """Request id and trace of the request being served."""
+
+    def __init__(self, request_id: str, sampled: bool):
+        self.request_id = request_id
+        self.trace_id = os.urandom(16).hex()
+        self.sampled = sampled
+        # INFO logs of a request are kept or dropped together
+        self.log_sampled = LOG_SAMPLE_RATE >= 1.0 or random.random() < LOG_SAMPLE_RATE
+        self.spans: List[Span] = []  # finished spans, appended from any thread
+
+
+_request_context: ContextVar[Optional[RequestContext]] = ContextVar("request_context", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_request_id() -> Optional[str]:
+    context = _request_context.get()
+    return context.request_id if context is not None else None
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Time the block as a span nested under the current one.
+
+    Outside a sampled request this only yields, so it is safe on hot paths.
+    Threads started with a copy of the context (run_in_threadpool,
+    contextvars.copy_context) nest their spans correctly.
+    """
+    context = _request_context.get()
+    if context is None or not context.sampled:
+        yield None
+        return
+
+    parent = _current_span.get()
+    current = Span(name, context.trace_id, parent.span_id if parent else None, attributes)
+    _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = repr(e)
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        # set() rather than reset(): an async generator may be closed from another context
+        _current_span.set(parent)
+        context.spans.append(current)
+
+
+@contextmanager
+def request_context(request_id: str, name: str, **attributes):
+    """
+    Bind ``request_id`` to every log record written inside the block and
+    trace the block as the request's root span, exported when it ends.
+    """
+    sampled = _exporter is not None and random.random() < TRACE_SAMPLE_RATE
+    context = RequestContext(request_id, sampled)
+    token = _request_context.set(context)
+    try:
+        with span(name, **{"request.id": request_id, **attributes}) as root:
+            yield root
+    finally:
+        _request_context.reset(token)
+        if sampled:
+            _exporter.export(context)
+
+
+# -----------------------------
+# OTLP/JSON export
+# -----------------------------
+def _otlp_value(value) -> Dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}  # int64 is a string in OTLP/JSON
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_span(span: Span, root: bool) -> Dict:
+    encoded = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": 2 if root else 1,  # SERVER for the request, INTERNAL below it
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in span.attributes.items()],
+        "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+    }
+    if span.parent_id:
+        encoded["parentSpanId"] = span.parent_id
+    return encoded
+
+
+def to_otlp(context: RequestContext) -> Dict:
+    """The request's finished spans as an OTLP/JSON ExportTraceServiceRequest."""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+            "scopeSpans": [{
+                "scope": {"name": "backend.src.api"},
+                "spans": [_otlp_span(s, s.parent_id is None) for s in context.spans],
+            }],
+        }]
+    }
+
+
+class TraceExporter:
+    """Writes traces from a background thread so requests never wait on I/O."""
+
+    def __init__(self, path: str = "", url: str = ""):
+        self.path = path
+        self.url = url
+        self._queue = queue.Queue(maxsize=1000)
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, context: RequestContext):
+        try:
+            self._queue.put_nowait(context)
+        except queue.Full:
+            pass  # drop traces rather than slow requests down
+
+    def flush(self):
+        """Block until every queued trace is written."""
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            context = self._queue.get()
+            try:
+                body = json.dumps(to_otlp(context)).encode("utf-8")
+                if self.path:
+                    with open(self.path, "ab") as f:
+                        f.write(body + b"\n")
+                if self.url:
+                    request = urllib.request.Request(
+                        self.url, data=body, headers={"Content-Type": "application/json"}
+                    )
+                    urllib.request.urlopen(request, timeout=2).close()
+            except Exception as e:
+                print(f"Trace export failed: {e}", file=sys.stderr)
+            finally:
+                self._queue.task_done()
+
+
+_exporter = TraceExporter(TRACE_EXPORT_PATH, TRACE_EXPORT_URL) if TRACE_EXPORT_PATH or TRACE_EXPORT_URL else None
+
+
+def set_trace_exporter(exporter: Optional[TraceExporter]):
+    """Replace the exporter (None disables tracing)."""
+    global _exporter
+    _exporter = exporter
+
+
+# -----------------------------
+# Logging
+# -----------------------------
+# Loggers only enqueue records; one listener thread formats them with orjson
+# and writes them to stdout in batches of up to LOG_BATCH_SIZE lines.
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "256"))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Fraction of requests whose INFO logs are kept; warnings and errors always are
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Copies the request id, trace id and span id onto records on the calling
+    thread, where the request's context is visible, and drops INFO records
+    of requests that are not sampled for logs.
+    """
+
+    def filter(self, record):
+        context = _request_context.get()
+        if context is not None:
+            if record.levelno <= logging.INFO and not context.log_sampled:
+                return False
+            record.request_id = context.request_id
+            record.trace_id = context.trace_id
+            current = _current_span.get()
+            if current is not None:
+                record.span_id = current.span_id
+        return True
 
 
 class JsonFormatter(logging.Formatter):
@@ -10,7 +242,8 @@ class JsonFormatter(logging.Formatter):
     """
     def format(self, record):
         log_record = {
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            # Time the record was created, not formatted (formatting is deferred)
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
@@ -19,25 +252,117 @@ class JsonFormatter(logging.Formatter):
             "lineNo": record.lineno,
         }
 
+        for field in ("request_id", "trace_id", "span_id"):
+            value = getattr(record, field, None)
+            if value is not None:
+                log_record[field] = value
+
         if hasattr(record, "props"):
             log_record.update(record.props)
 
+        if record.exc_text or record.exc_info:
+            log_record["exception"] = record.exc_text or self.formatException(record.exc_info)
+
+        return orjson.dumps(log_record, default=str).decode("utf-8")
+
+
+class _EnqueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread."""
+
+    def enqueue(self, record):
+        if record.levelno < logging.WARNING and self.queue.qsize() >= LOG_QUEUE_SIZE:
+            # Drop INFO/DEBUG logs rather than slow requests down; the count is
+            # exported. Warnings and errors are always queued.
+            global _dropped_records
+            with _dropped_lock:
+                _dropped_records += 1
+            return
+        self.queue.put_nowait(record)
+
+    def prepare(self, record):
+        # Resolve the message now (its arguments may change later) but do
+        # not build the JSON line here; tracebacks are rendered so the
+        # record does not keep the failing frames alive in the queue
+        record.msg = record.getMessage()
+        record.args = None
         if record.exc_info:
-            log_record["exception"] = self.formatException(record.exc_info)
+            record.exc_text = record.exc_text or _traceback_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class BatchStreamHandler(logging.StreamHandler):
+    """Buffers formatted lines and writes them with one call per batch."""
+
+    def __init__(self, stream=None, batch_size: int = LOG_BATCH_SIZE):
+        super().__init__(stream)
+        self.batch_size = batch_size
+        self._lines = []
+
+    def emit(self, record):
+        try:
+            self._lines.append(self.format(record))
+        except Exception:
+            self.handleError(record)
+        if len(self._lines) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            if self._lines:
+                self.stream.write("\n".join(self._lines) + "\n")
+                self._lines = []
+            super().flush()
+
+
+class _BatchingListener(QueueListener):
+    """Flushes the batch whenever the queue runs empty, so idle logs are not held back."""
 
-        return json.dumps(log_record)
+    def handle(self, record):
+        if isinstance(record, threading.Event):
+            for handler in self.handlers:
+                handler.flush()
+            record.set()
+            return
+        super().handle(record)
+        if self.queue.empty():
+            for handler in self.handlers:
+                handler.flush()
+
+
+_traceback_formatter = logging.Formatter()
+_dropped_records = 0
+_dropped_lock = threading.Lock()
+_log_queue = queue.SimpleQueue()  # cheaper put/get than queue.Queue; bounded in enqueue
+_stream_handler = BatchStreamHandler(sys.stdout)
+_stream_handler.setFormatter(JsonFormatter())
+_listener = _BatchingListener(_log_queue, _stream_handler)
+_listener.start()
+atexit.register(_listener.stop)
+
+_queue_handler = _EnqueueHandler(_log_queue)
+_queue_handler.addFilter(RequestContextFilter())
+
+
+def flush_logs(timeout: float = 5.0):
+    """Block until every record logged so far has been written."""
+    done = threading.Event()
+    _log_queue.put(done)
+    done.wait(timeout)
+
+
+def dropped_log_records() -> int:
+    """INFO/DEBUG records dropped because the log queue was full."""
+    return _dropped_records
 
 
 def get_logger(name: str) -> logging.Logger:
     logger = logging.getLogger(name)
 
-    # Prevent duplicate handlers in Docker/Gunicorn/etc.
-    if not logger.hasHandlers():
-        handler = logging.StreamHandler(sys.stdout)
-        handler.setFormatter(JsonFormatter())
-        handler.setLevel(logging.INFO)
-
-        logger.addHandler(handler)
+    # Prevent duplicate handlers in Docker/Gunicorn/etc. Only the logger's own
+    # handlers count: a handler on the root logger must not bypass the queue.
+    if not logger.handlers:
+        logger.addHandler(_queue_handler)
         logger.setLevel(logging.INFO)
         logger.propagate = False
 
@@ -1,19 +1,36 @@
 from __future__ import annotations
 
+import asyncio
+import contextvars
+import json
+import os
 import time
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 import uuid
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
 
-from .logging_utils import get_logger
+from .admission_utils import LANES, Overloaded, admission_snapshot
+from .hybrid_utils import blend_scores, reciprocal_rank_fusion
+from .jobs_utils import Job, JobQueue, JobQueueFull
+from .logging_utils import current_request_id, get_logger, request_context, span
+from .metrics_utils import CONTENT_TYPE, record_cache, render_metrics, timed_stage, track_admission, track_engine
+from .pagination_utils import CursorExpired, RankedListCache, encode_cursor, ranking_depth
+from .resilience_utils import CircuitOpenError, reset_deadline, set_deadline, time_left
+from .response_utils import json_response, parse_fields, project
+from .summary_utils import get_summary
+from .warmup_utils import Warmup
 
 logger = get_logger("api")
 
 # Import BM25 utilities
 try:
-    from .bm25_utils import search_bm25
+    from .bm25_utils import corpus_version, get_bm25_index, get_post_by_url, search_bm25
+    from .stats_utils import STATS_MAX_AGE_S, get_stats_snapshot
     BM25_AVAILABLE = True
 except ImportError as e: 
     logger.warning(f"BM25 not available: {e}")
@@ -21,60 +38,103 @@ except ImportError as e:
 
 # Import FAISS utilities
 try:
-    from .modern_bert_utils import search_modernbert
+    from .modern_bert_utils import (
+        index_version,
+        load_dense_index,
+        rerank_candidates,
+        search_modernbert,
+        warm_encoder,
+    )
     FAISS_AVAILABLE = True
     logger.info("✓ FAISS search loaded successfully")
 except ImportError as e:
     logger.error(f"FAISS import failed: {e}")  # ← Change to error so it's visible
     FAISS_AVAILABLE = False
-    search_modernbert = None  # ← Define it as None
+    search_modernbert = load_dense_index = warm_encoder = None  # ← Define them as None
 except Exception as e:  # ← Catch other errors too
     logger.error(f"Unexpected error loading FAISS: {e}")
     FAISS_AVAILABLE = False
-    search_modernbert = None
+    search_modernbert = load_dense_index = warm_encoder = None
 
 # Import LLM link for explanations
 try:
-    from .llm_utils import explain_results
+    from .llm_utils import (
+        EXPLANATION_MODE,
+        UNAVAILABLE_MESSAGE,
+        explain_batch_cached,
+        explain_results_cached,
+        lookup_explanation,
+        stream_explanation_async,
+    )
 except ImportError as e:
     logger.warning(f"LLM not available: {e}")
 
 
 app = FastAPI(title="Off-the-Beaten-Path Travel API")
 
+# Separate executors so hybrid search runs both engines side by side
+_bm25_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="bm25")
+_faiss_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="faiss")
+
+# Hybrid mode retrieves this many times k from each engine before fusing
+HYBRID_DEPTH_MULTIPLIER = 2
+
+# Number of top results that get an LLM explanation
+EXPLANATION_COUNT = 3
+
+# Default end-to-end budget of a search request; clients may lower it with
+# the X-Request-Deadline-Ms header. LLM calls never wait past it.
+REQUEST_DEADLINE_S = float(os.getenv("REQUEST_DEADLINE_S", "45"))
+
+# Background explanation jobs for /search with explanations_async
+explanation_jobs = JobQueue()
+
+# Ranked lists behind pagination cursors
+ranked_lists = RankedListCache()
+
+# Engines built concurrently at startup; /readyz reports their progress
+warmup = Warmup()
+warmup.register("bm25", get_bm25_index if BM25_AVAILABLE else None, enabled=BM25_AVAILABLE)
+warmup.register("faiss", load_dense_index, enabled=FAISS_AVAILABLE)
+warmup.register("encoder", warm_encoder, enabled=FAISS_AVAILABLE)
+
+track_engine("bm25", lambda: BM25_AVAILABLE)
+track_engine("faiss", lambda: FAISS_AVAILABLE)
+track_admission(admission_snapshot)
+
 # Middleware for logging requests
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     start_time = time.time()
     request_id = request.headers.get("X-Request-ID", str(uuid.uuid4()))
 
-    response = await call_next(request)
-    process_time = (time.time() - start_time) * 1000
-    
-    log_data = {
-        "request_id": request_id,
-        "method": request.method,
-        "path": request.url.path,
-        "status_code": response.status_code,
-        "duration_ms": round(process_time, 2)
-    }
-    
-    logger.info("Request processed", extra={"props": log_data})
-    
+    # Every log line and span of the request carries its id, the access log included
+    with request_context(request_id, f"{request.method} {request.url.path}",
+                         **{"http.method": request.method, "http.target": request.url.path}) as root:
+        response = await call_next(request)
+        if root is not None:
+            root.attributes["http.status_code"] = response.status_code
+        response.headers["X-Request-ID"] = request_id
+        process_time = (time.time() - start_time) * 1000
+
+        log_data = {
+            "request_id": request_id,
+            "method": request.method,
+            "path": request.url.path,
+            "status_code": response.status_code,
+            "duration_ms": round(process_time, 2)
+        }
+
+        # Sampled with the request's other INFO logs (LOG_SAMPLE_RATE)
+        logger.info("Request processed", extra={"props": log_data})
+
     return response
 
-# Add event handler to preload bm25 index data to limit search time
+# Add event handler to preload every engine so first searches do not pay for it
 @app.on_event("startup")
 async def startup_event():
-    """Preload BM25 index on API startup."""
-    if BM25_AVAILABLE:
-        logger.info("Preloading BM25 index...")
-        try:
-            from .bm25_utils import _load_blogs_from_db
-            _load_blogs_from_db()
-            logger.info("✓ BM25 index preloaded and ready!")
-        except Exception as e:
-            logger.error(f"✗ Failed to preload BM25 index: {e}")
+    """Warm BM25, the FAISS index and the query encoder concurrently in the background."""
+    warmup.start()
 
 
 # ----------------------------
@@ -82,8 +142,13 @@ async def startup_event():
 # ----------------------------
 
 class Retrieval(BaseModel):
-    model: str = Field(pattern="^(bm25|faiss)$")
+    model: str = Field(pattern=r"^(bm25|faiss|hybrid|bm25\+rerank)$")
     k: int = 12
+    # bm25+rerank only: number of BM25 candidates re-ranked by embeddings
+    rerank_n: int = Field(default=100, ge=1, le=1000)
+    # Hybrid only: reciprocal-rank fusion or normalized score blending
+    fusion: str = Field(default="rrf", pattern="^(rrf|blend)$")
+    alpha: float = Field(default=0.5, ge=0.0, le=1.0)  # BM25 weight for "blend"
 
 
 class SearchRequest(BaseModel):
@@ -91,6 +156,12 @@ class SearchRequest(BaseModel):
     retrieval: Retrieval
     ui: Optional[Dict] = None
     llm_explanations: bool = False
+    # Return results at once and generate explanations in a background job
+    explanations_async: bool = False
+    # Rank several pages of results once and return a cursor for later pages
+    paginate: bool = False
+    # next_cursor of a previous response: the next k results of that ranking
+    cursor: Optional[str] = None
 
 
 class Result(BaseModel):
@@ -107,32 +178,123 @@ class Result(BaseModel):
     why: Dict[str, object] = {}
 
 
+class Explanation(BaseModel):
+    text: str
+    page_url: Optional[str] = None
+    cached: bool = False
+
+
 class SearchResponse(BaseModel):
     query: str
     params: Dict[str, object]
     results: List[Result]
     explanations: List[str]
+    # Same explanations with their post and whether they came from the cache
+    explanation_details: List[Explanation] = []
+    # Set with explanations_async: poll GET /explanations/{job_id}
+    explanations_job_id: Optional[str] = None
+    # Set with paginate/cursor while more results remain
+    next_cursor: Optional[str] = None
+
+
+class ExplanationJobResponse(BaseModel):
+    job_id: str
+    status: str
+    completed: int
+    total: int
+    # One slot per explained result, None until that explanation is ready
+    explanations: List[Optional[Explanation]]
+
+
+class StreamSearchRequest(SearchRequest):
+    # Also emit LLM output token by token, not only finished explanations
+    stream_tokens: bool = False
 
 
 # ----------------------------
 # Utility functions
 # ----------------------------
 
-def generate_explanations(req: SearchRequest, results):
+async def generate_explanations(req: SearchRequest, results) -> List[Explanation]:
+    """
+    Explain the top results in one batched LLM call (or concurrent per-result
+    calls when EXPLANATION_MODE is "per-result"), so the added latency is
+    about one LLM round-trip. Cached explanations return without an LLM call.
+    """
     q = req.query
-    explanations = []
-    for r in results[0:3]:
-        content = r.full_content
+    top = results[0:EXPLANATION_COUNT]
+    if EXPLANATION_MODE == "batch":
         try:
-            gen_text = explain_results(q, content)
-            explanations.append(gen_text)
+            generated = await explain_batch_cached(
+                q, [(r.destination, r.full_content, r.why.get("page_url")) for r in top]
+            )
         except Exception as e:
-            logger.error(f"LLM explanation failed: {e}")
-            explanations.append("Explanation unavailable.")
-    
+            generated = [e] * len(top)
+    else:
+        generated = await asyncio.gather(
+            *(explain_results_cached(q, r.full_content, r.why.get("page_url")) for r in top),
+            return_exceptions=True,
+        )
+
+    explanations = []
+    for r, outcome in zip(top, generated):
+        if isinstance(outcome, BaseException):
+            logger.error(f"LLM explanation failed: {outcome}")
+            explanations.append(Explanation(text="Explanation unavailable.", page_url=r.why.get("page_url")))
+        else:
+            text, cached = outcome
+            explanations.append(Explanation(text=text, page_url=r.why.get("page_url"), cached=cached))
+
     return explanations
 
 
+async def _admitted_explanations(req: SearchRequest, results) -> List[Explanation]:
+    """
+    generate_explanations behind the "llm" admission lane. When the lane is
+    saturated the search still succeeds, with placeholder explanations.
+    """
+    try:
+        with span("explain", mode=EXPLANATION_MODE):
+            async with LANES["llm"].admit(time_left()):
+                return await generate_explanations(req, results)
+    except Overloaded as e:
+        logger.warning(f"Explanations skipped: {e}")
+        return [
+            Explanation(text=UNAVAILABLE_MESSAGE, page_url=r.why.get("page_url"))
+            for r in results[0:EXPLANATION_COUNT]
+        ]
+
+
+def _snippets(r: Dict) -> List[str]:
+    """Create snippets from the post summary (if stored), description and content preview."""
+    snippets = []
+    summary = get_summary(r.get("page_url"))
+    if summary:
+        snippets.append(summary)
+    if r.get("description"):
+        snippets.append(r["description"])
+    if r.get("content_preview"):
+        snippets.append(r["content_preview"])
+    return snippets[:2]  # Limit to 2 snippets
+
+
+def _why(r: Dict, model: str) -> Dict[str, object]:
+    return {
+        "model": model,
+        "page_title": r.get("page_title", ""),
+        "page_url": r.get("page_url", ""),
+        "blog_url": r.get("blog_url", ""),
+        "author": r.get("author", ""),
+    }
+
+
+def _timed(fn, *args, **kwargs):
+    """Run fn and return (result, elapsed milliseconds)."""
+    start = time.perf_counter()
+    out = fn(*args, **kwargs)
+    return out, (time.perf_counter() - start) * 1000
+
+
 # ----------------------------
 # Search functions
 # ----------------------------
@@ -156,13 +318,6 @@ def bm25_search(req: SearchRequest) -> List[Result]:
         if "destination" not in r:
             logger.error("BM25 result missing required field 'destination'", extra={"props": r})
             continue
-        # Create snippets from content preview and description
-        snippets = []
-        if r.get("description"):
-            snippets.append(r["description"])
-        if r.get("content_preview"):
-            snippets.append(r["content_preview"])
-        
         results.append(
             Result(
                 destination = r["destination"],
@@ -172,15 +327,9 @@ def bm25_search(req: SearchRequest) -> List[Result]:
                 score = round(r["score"], 4),
                 trend_delta = None,
                 context_cues = {},
-                snippets = snippets[:2],  # Limit to 2 snippets
+                snippets = _snippets(r),
                 full_content = r.get('full_content'),
-                why = {
-                    "model": "BM25",
-                    "page_title": r.get("page_title", ""),
-                    "page_url": r.get("page_url", ""),
-                    "blog_url": r.get("blog_url", ""),
-                    "author": r.get("author", ""),
-                },
+                why = _why(r, "BM25"),
             )
         )
     
@@ -199,13 +348,6 @@ def faiss_search(req: SearchRequest) -> List[Result]:
 
     results = []
     for r in raw_results:
-        # Create snippets from content preview and description
-        snippets = []
-        if r.get("description"):
-            snippets.append(r["description"])
-        if r.get("content_preview"):
-            snippets.append(r["content_preview"])
-        
         results.append(
             Result(
                 destination = r["destination"],
@@ -215,20 +357,426 @@ def faiss_search(req: SearchRequest) -> List[Result]:
                 distance = round(r["distance"], 4),
                 trend_delta = None,
                 context_cues = {},
-                snippets = snippets[:2],  # Limit to 2 snippets
+                snippets = _snippets(r),
                 full_content = r.get('full_content'),
-                why = {
-                    "model": "FAISS",
-                    "page_title": r.get("page_title", ""),
-                    "page_url": r.get("page_url", ""),
-                    "blog_url": r.get("blog_url", ""),
-                    "author": r.get("author", ""),
-                },
+                why = _why(r, "FAISS"),
             )
         )
     
     return results
 
+# Hybrid Search Handler
+def hybrid_search(req: SearchRequest) -> List[Result]:
+    """
+    Run BM25 and FAISS concurrently and fuse their rankings.
+
+    Wall time is close to the slower engine. If one engine is unavailable or
+    fails, results come from the other one alone.
+    """
+    logger.info(f"Executing hybrid search for query: '{req.query}'")
+    depth = req.retrieval.k * HYBRID_DEPTH_MULTIPLIER
+    start = time.perf_counter()
+
+    futures = {}
+    if BM25_AVAILABLE:
+        # Copy the request context so both engines log and trace under the request
+        futures["bm25"] = _bm25_executor.submit(
+            contextvars.copy_context().run, _timed, search_bm25, req.query, top_n=depth
+        )
+    if FAISS_AVAILABLE:
+        futures["faiss"] = _faiss_executor.submit(
+            contextvars.copy_context().run, _timed, search_modernbert, req.query, top_k=depth
+        )
+
+    raw = {"bm25": [], "faiss": []}
+    timings = {}
+    for name, future in futures.items():
+        try:
+            raw[name], timings[f"{name}_ms"] = future.result()
+        except Exception as e:
+            logger.error(f"Hybrid search: {name} engine failed: {e}")
+    timings = {k: round(v, 2) for k, v in timings.items()}
+    timings["wall_ms"] = round((time.perf_counter() - start) * 1000, 2)
+
+    def key(r):
+        return r.get("page_url", "")
+
+    if req.retrieval.fusion == "blend":
+        fused = blend_scores(raw["bm25"], raw["faiss"], key, alpha=req.retrieval.alpha)
+    else:
+        fused = reciprocal_rank_fusion([raw["bm25"], raw["faiss"]], key)
+
+    bm25_hits = {key(r): (rank, r) for rank, r in enumerate(raw["bm25"], start=1)}
+    faiss_hits = {key(r): (rank, r) for rank, r in enumerate(raw["faiss"], start=1)}
+
+    results = []
+    for doc, fused_score in fused[:req.retrieval.k]:
+        bm25_rank, bm25_r = bm25_hits.get(doc, (None, None))
+        faiss_rank, faiss_r = faiss_hits.get(doc, (None, None))
+        r = bm25_r or faiss_r
+
+        why = _why(r, "Hybrid")
+        why.update({
+            "fusion": req.retrieval.fusion,
+            "fused_score": round(fused_score, 6),
+            "bm25_rank": bm25_rank,
+            "faiss_rank": faiss_rank,
+            **timings,
+        })
+
+        results.append(
+            Result(
+                destination = r["destination"],
+                country = r.get("country", ""),
+                lat = r.get("lat"),
+                lon = r.get("lon"),
+                score = round(bm25_r["score"], 4) if bm25_r else None,
+                distance = round(faiss_r["distance"], 4) if faiss_r else None,
+                trend_delta = None,
+                context_cues = {},
+                snippets = _snippets(r),
+                full_content = r.get('full_content'),
+                why = why,
+            )
+        )
+
+    logger.info(f"Hybrid search returned {len(results)} results", extra={"props": timings})
+    return results
+
+# BM25 + Dense Re-rank Handler
+def bm25_rerank_search(req: SearchRequest) -> List[Result]:
+    """
+    Take the top rerank_n BM25 candidates and re-rank them by embedding
+    similarity. Cost scales with rerank_n, not with the corpus size.
+    """
+    if not BM25_AVAILABLE:
+        logger.warning("BM25+rerank search requested but BM25 is not available.")
+        return []
+
+    logger.info(f"Executing BM25+rerank search for query: '{req.query}'")
+    n = max(req.retrieval.rerank_n, req.retrieval.k)
+    candidates, bm25_ms = _timed(search_bm25, req.query, top_n=n)
+    bm25_ranks = {r.get("id"): rank for rank, r in enumerate(candidates, start=1)}
+
+    raw_results = None
+    if FAISS_AVAILABLE:
+        try:
+            raw_results, rerank_ms = _timed(rerank_candidates, req.query, candidates, req.retrieval.k)
+        except Exception as e:
+            logger.error(f"Dense re-rank failed; returning BM25 order: {e}")
+    else:
+        logger.warning("Dense re-rank unavailable; returning BM25 order.")
+    if raw_results is None:
+        raw_results, rerank_ms = candidates[:req.retrieval.k], 0.0
+
+    results = []
+    for r in raw_results:
+        why = _why(r, "BM25+rerank")
+        why.update({
+            "bm25_rank": bm25_ranks.get(r.get("id")),
+            "rerank_n": len(candidates),
+            "similarity": round(r["similarity"], 4) if "similarity" in r else None,
+            "bm25_ms": round(bm25_ms, 2),
+            "rerank_ms": round(rerank_ms, 2),
+        })
+        results.append(
+            Result(
+                destination = r["destination"],
+                country = r.get("country", ""),
+                lat = r.get("lat"),
+                lon = r.get("lon"),
+                score = round(r["score"], 4),
+                distance = round(r["distance"], 4) if "distance" in r else None,
+                trend_delta = None,
+                context_cues = {},
+                snippets = _snippets(r),
+                full_content = r.get('full_content'),
+                why = why,
+            )
+        )
+
+    return results
+
+# Handler per retrieval model, shared by /search and /search/stream
+SEARCH_HANDLERS = {
+    "bm25": bm25_search,
+    "faiss": faiss_search,
+    "hybrid": hybrid_search,
+    "bm25+rerank": bm25_rerank_search,
+}
+
+
+# ----------------------------
+# Pagination
+# ----------------------------
+# Dropped from cached ranked lists and rebuilt from the corpus per page
+HYDRATED_FIELDS = {"full_content", "snippets"}
+
+
+def _index_version(model: str) -> Tuple:
+    """Versions of everything a ranked list depends on; pages are hydrated from the BM25 corpus."""
+    version = [model, corpus_version()]
+    if model != "bm25" and FAISS_AVAILABLE:
+        version.append(index_version())
+    return tuple(version)
+
+
+def _hydrate(entries: List[Dict]) -> List[Result]:
+    """Rebuild full results from cached ranked entries: corpus lookups only, no scoring."""
+    results = []
+    with timed_stage("hydrate"):
+        for entry in entries:
+            page_url = entry["why"].get("page_url")
+            post = get_post_by_url(page_url)
+            if post is None:
+                logger.warning(f"Ranked post {page_url} is no longer in the corpus")
+                continue
+            content = post.get("content") or ""
+            preview = content[:300] + ("..." if len(content) > 300 else "")
+            results.append(
+                Result.model_construct(
+                    **entry,
+                    snippets = _snippets({
+                        "description": post.get("page_description"),
+                        "content_preview": preview,
+                        "page_url": page_url,
+                    }),
+                    full_content = content,
+                )
+            )
+    return results
+
+
+async def _retrieve(req: SearchRequest, deadline: Optional[float] = None) -> Tuple[List[Result], Optional[str]]:
+    """
+    Run retrieval for /search and /search/stream once its admission lane has
+    a slot: "bm25" for BM25 searches and cursor pages, "encode" for every
+    mode that encodes the query.
+
+    Returns:
+        (results, next_cursor); next_cursor is None when nothing is left
+
+    Raises:
+        HTTPException: 429 or 503 with Retry-After if the lane shed the request,
+            and the errors of _run_retrieval
+    """
+    lane = LANES["bm25" if req.cursor or req.retrieval.model == "bm25" else "encode"]
+    try:
+        with span("retrieve", model=req.retrieval.model, k=req.retrieval.k, lane=lane.name):
+            async with lane.admit(deadline - time.monotonic() if deadline is not None else None):
+                return await _run_retrieval(req)
+    except Overloaded as e:
+        logger.warning(f"Search shed: {e}")
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after_s)})
+
+
+async def _run_retrieval(req: SearchRequest) -> Tuple[List[Result], Optional[str]]:
+    """
+    Without paginate or cursor this is the plain handler call. With paginate
+    the handler ranks ranking_depth(k) results once, the list is cached and
+    the first k are returned. With cursor the next k entries of a cached list
+    are hydrated from the corpus.
+
+    Raises:
+        HTTPException: 410 if the cursor expired or the index changed since,
+            503 if the corpus needed for pagination is not available
+    """
+    handler = SEARCH_HANDLERS[req.retrieval.model]
+    if not (req.paginate or req.cursor):
+        return await run_in_threadpool(handler, req), None
+    if not BM25_AVAILABLE:
+        raise HTTPException(status_code=503, detail="Pagination needs the BM25 corpus, which is not available")
+
+    k = req.retrieval.k
+    if req.cursor:
+        try:
+            entries, next_cursor = ranked_lists.page(req.cursor, k, _index_version(req.retrieval.model))
+        except CursorExpired as e:
+            record_cache("ranked_list", False)
+            raise HTTPException(status_code=410, detail=f"{e}; run the search again")
+        record_cache("ranked_list", True)
+        return await run_in_threadpool(_hydrate, entries), next_cursor
+
+    deep = req.model_copy(update={
+        "retrieval": req.retrieval.model_copy(update={"k": ranking_depth(k)})
+    })
+    # The first search may (re)load an index; rank again so the list is
+    # tagged with the version it was actually ranked against
+    for _ in range(2):
+        version = _index_version(req.retrieval.model)
+        ranked = await run_in_threadpool(handler, deep)
+        if _index_version(req.retrieval.model) == version:
+            break
+    if len(ranked) <= k:
+        return ranked, None
+    list_id = ranked_lists.put([r.model_dump(exclude=HYDRATED_FIELDS) for r in ranked], version)
+    return ranked[:k], encode_cursor(list_id, k)
+
+
+def _request_deadline(request: Request, start: float) -> float:
+    """Absolute time.monotonic() deadline of a request that started at ``start``."""
+    budget_s = REQUEST_DEADLINE_S
+    header = request.headers.get("X-Request-Deadline-Ms")
+    if header:
+        try:
+            budget_s = min(budget_s, max(float(header), 0.0) / 1000)
+        except ValueError:
+            logger.warning(f"Ignoring invalid X-Request-Deadline-Ms header: {header!r}")
+    return start + budget_s
+
+
+# ----------------------------
+# Streaming helpers
+# ----------------------------
+async def _explain_into(queue: asyncio.Queue, index: int, query: str, result: Result, stream_tokens: bool):
+    """Generate one explanation and put its token/explanation events on the queue."""
+    page_url = result.why.get("page_url")
+    cached = False
+    try:
+        if stream_tokens:
+            text = await run_in_threadpool(lookup_explanation, query, page_url)
+            cached = text is not None
+            if not cached:
+                parts = []
+
+                async def consume():
+                    async for delta in stream_explanation_async(query, result.full_content, page_url):
+                        parts.append(delta)
+                        await queue.put({"event": "token", "index": index, "text": delta})
+
+                # The stream enforces LLM_TIMEOUT_S itself; only the request deadline is applied here
+                await asyncio.wait_for(consume(), timeout=time_left())
+                text = "".join(parts)
+        else:
+            text, cached = await explain_results_cached(query, result.full_content, page_url)
+    except asyncio.TimeoutError:
+        logger.error(f"LLM explanation {index} timed out")
+        text = "Explanation unavailable (timed out)."
+    except CircuitOpenError as e:
+        logger.warning(f"Skipping LLM explanation {index}: {e}")
+        text = UNAVAILABLE_MESSAGE
+    except Exception as e:
+        logger.error(f"LLM explanation failed: {e}")
+        text = "Explanation unavailable."
+
+    await queue.put({"event": "explanation", "index": index, "text": text, "page_url": page_url, "cached": cached})
+
+
+async def _search_events(req: StreamSearchRequest, results: List[Result], retrieval_ms: float,
+                         deadline: Optional[float] = None, next_cursor: Optional[str] = None):
+    """
+    Yield the stream events of one search: results first, then explanations
+    in completion order, then a final done event.
+    """
+    start = time.perf_counter()
+    # Explanation tasks copy the current context, deadline included
+    set_deadline(deadline)
+    yield {
+        "event": "results",
+        "query": req.query,
+        "params": {
+            "retrieval": req.retrieval.model_dump(),
+            "model_used": req.retrieval.model,
+        },
+        "results": [r.model_dump(mode="json") for r in results],
+        "next_cursor": next_cursor,
+        "retrieval_ms": round(retrieval_ms, 2),
+    }
+
+    if req.llm_explanations and results:
+        try:
+            async with LANES["llm"].admit(time_left()):
+                async for event in _explanation_events(req, results, req.stream_tokens):
+                    yield event
+        except Overloaded as e:
+            logger.warning(f"Explanations skipped: {e}")
+            for i, r in enumerate(results[0:EXPLANATION_COUNT]):
+                yield {"event": "explanation", "index": i, "text": UNAVAILABLE_MESSAGE,
+                       "page_url": r.why.get("page_url"), "cached": False}
+
+    yield {"event": "done", "explanation_ms": round((time.perf_counter() - start) * 1000, 2)}
+
+
+async def _explanation_events(req: SearchRequest, results: List[Result], stream_tokens: bool = False):
+    """Yield token and explanation events for the top results, in completion order."""
+    if EXPLANATION_MODE == "batch" and not stream_tokens:
+        # One batched call: all explanations arrive together
+        for i, explanation in enumerate(await generate_explanations(req, results)):
+            yield {"event": "explanation", "index": i, **explanation.model_dump()}
+        return
+
+    queue = asyncio.Queue()
+    tasks = [
+        asyncio.create_task(_explain_into(queue, i, req.query, r, stream_tokens))
+        for i, r in enumerate(results[0:EXPLANATION_COUNT])
+    ]
+    remaining = len(tasks)
+    try:
+        while remaining:
+            event = await queue.get()
+            if event["event"] == "explanation":
+                remaining -= 1
+            yield event
+    finally:
+        # Consumer went away: stop paying for LLM calls
+        for task in tasks:
+            task.cancel()
+
+
+async def _run_explanation_job(job: Job, req: SearchRequest, results: List[Result], request_id: Optional[str]):
+    """
+    Fill the job's slots as explanations complete, under a fresh request
+    deadline. Jobs share the "llm" admission lane with inline explanations,
+    so background work cannot exceed the LLM concurrency limit. The job logs
+    and traces under the id of the search that started it.
+    """
+    token = set_deadline(time.monotonic() + REQUEST_DEADLINE_S)
+    try:
+        with request_context(request_id or job.job_id, "explanation_job", **{"job.id": job.job_id}):
+            try:
+                async with LANES["llm"].admit(time_left()):
+                    async for event in _explanation_events(req, results):
+                        job.set_result(event["index"], Explanation(
+                            text = event["text"], page_url = event["page_url"], cached = event["cached"]
+                        ))
+            except Overloaded as e:
+                logger.warning(f"Explanations skipped: {e}")
+                for i, r in enumerate(results[0:EXPLANATION_COUNT]):
+                    job.set_result(i, Explanation(text=UNAVAILABLE_MESSAGE, page_url=r.why.get("page_url")))
+    finally:
+        reset_deadline(token)
+
+
+def _search_response(request: Request, projection: Optional[List[str]], query: str, params: Dict,
+                     results: List[Result], explanations: List[Explanation], job_id: Optional[str] = None,
+                     next_cursor: Optional[str] = None) -> Response:
+    """
+    Encode a SearchResponse body directly.
+
+    The results were validated when the handlers built them, so they are
+    dumped once and encoded with orjson instead of being re-validated
+    through response_model.
+    """
+    payload = {
+        "query": query,
+        "params": params,
+        "results": project([r.model_dump() for r in results], projection),
+        "explanations": [e.text for e in explanations],
+        "explanation_details": [e.model_dump() for e in explanations],
+        "explanations_job_id": job_id,
+        "next_cursor": next_cursor,
+    }
+    return json_response(payload, request.headers.get("accept-encoding"))
+
+
+def _ndjson(event: Dict) -> str:
+    return json.dumps(event) + "\n"
+
+
+def _sse(event: Dict) -> str:
+    return f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+
+
 # ----------------------------
 # API
 # ----------------------------
@@ -240,100 +788,144 @@ def health():
         "faiss_search_available": FAISS_AVAILABLE,
     }
 
+@app.get("/livez")
+def livez():
+    """Liveness: the process is up and serving requests, whether or not engines are loaded."""
+    return {"status": "alive"}
+
+@app.get("/readyz")
+def readyz():
+    """Readiness: 200 once every required engine is ready, else 503."""
+    snapshot = warmup.snapshot()
+    return JSONResponse(snapshot, status_code=200 if snapshot["ready"] else 503)
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus metrics: per-stage latency histograms, cache lookups, index sizes, availability."""
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE)
+
+@app.get("/admission")
+def get_admission():
+    """In-flight requests, queue depth and shed counts of each admission lane."""
+    return admission_snapshot()
+
 @app.get("/stats")
-def get_database_stats():
-    """Get database statistics for EDA"""
-    from sqlalchemy import func, create_engine
-    from sqlalchemy.orm import Session
-    from .bm25_utils import Whole_Blogs  # Import inside function
-    import os
-    
-    # Create engine here
-    DATABASE_URL = os.getenv("DATABASE_URL")
-    if not DATABASE_URL:
-        from fastapi import HTTPException
-        raise HTTPException(status_code=500, detail="DATABASE_URL not configured")
-    
-    engine = create_engine(DATABASE_URL)
-    
+def get_database_stats(request: Request):
+    """
+    Get database statistics for EDA.
+
+    Served from a snapshot of the in-memory corpus rather than aggregate
+    queries; clients can revalidate with If-None-Match and cache for
+    STATS_MAX_AGE_S seconds.
+    """
+    if not BM25_AVAILABLE:
+        raise HTTPException(status_code=500, detail="Corpus not available")
     try:
-        with Session(engine) as session:
-            total_posts = session.query(func.count(Whole_Blogs.id)).scalar()
-            unique_locations = session.query(func.count(func.distinct(Whole_Blogs.location_name))).scalar()
-            unique_blogs = session.query(func.count(func.distinct(Whole_Blogs.blog_url))).scalar()
-            unique_authors = session.query(func.count(func.distinct(Whole_Blogs.page_author))).scalar()
-            
-            # Sample coordinates
-            coordinates = session.query(
-                Whole_Blogs.location_name,
-                Whole_Blogs.latitude,
-                Whole_Blogs.longitude,
-                func.count(Whole_Blogs.id).label('cnt')
-            ).filter(
-                Whole_Blogs.latitude.isnot(None),
-                Whole_Blogs.longitude.isnot(None)
-            ).group_by(
-                Whole_Blogs.location_name,
-                Whole_Blogs.latitude,
-                Whole_Blogs.longitude
-            ).all()
-            
-            logger.info(f"Stats requested: {total_posts} posts, {unique_locations} locations")
-            
-            return {
-                "total_posts": total_posts,
-                "unique_locations": unique_locations,
-                "unique_blogs": unique_blogs,
-                "unique_authors": unique_authors,
-                "coordinates": [
-                        {
-                        "location": loc,
-                        "lat": float(lat), 
-                        "lon": float(lon),
-                        "count": cnt
-                        } for loc, lat, lon, cnt in coordinates
-                ]
-            }
+        snapshot = get_stats_snapshot()
     except Exception as e:
         logger.error(f"Database stats error: {e}")
-        from fastapi import HTTPException
         raise HTTPException(status_code=500, detail=str(e))
 
+    headers = {"ETag": snapshot.etag, "Cache-Control": f"public, max-age={STATS_MAX_AGE_S}"}
+    if request.headers.get("if-none-match") == snapshot.etag:
+        return Response(status_code=304, headers=headers)
+
+    logger.info(f"Stats requested: {snapshot.stats['total_posts']} posts, {snapshot.stats['unique_locations']} locations")
+    return Response(content=snapshot.body, media_type="application/json", headers=headers)
+
 
 @app.post("/search", response_model=SearchResponse)
-def search(req: SearchRequest):
+async def search(req: SearchRequest, request: Request, fields: Optional[str] = None):
     """
-    Return a search result based on type of search
-    Either BM25 or FAISS
+    Return a search result based on type of search:
+    BM25, FAISS, hybrid or BM25 + dense re-rank
+
+    Retrieval is CPU-bound and runs in the threadpool; LLM explanations are
+    awaited on the event loop and never outlive the request deadline. With
+    explanations_async the results return at once and the explanations are
+    generated by a background job (see GET /explanations/{job_id}).
+
+    ``fields`` (e.g. ``?fields=destination,score,why``) limits the returned
+    result fields. The body is orjson-encoded and gzip/brotli compressed
+    per Accept-Encoding.
+
+    With paginate the response carries a next_cursor; sending it back as
+    ``cursor`` returns the next k results of the same ranking without
+    searching again.
     """
-    
-    # Route to BM25 if selected
-    if req.retrieval.model == "bm25":
-        results = bm25_search(req)
-        explanations = generate_explanations(req, results)  if req.llm_explanations else []
-
-        return SearchResponse(
-            query = req.query,
-            params = {
-                "retrieval": req.retrieval.model_dump(),
-                "model_used": "bm25",
-            },
-            results = results,
-            explanations = explanations
-        )
-    
-    # Route to FAISS if selected
-    if req.retrieval.model == "faiss":
-        results = faiss_search(req)
-        explanations = generate_explanations(req, results) if req.llm_explanations else []
-
-        return SearchResponse(
-            query = req.query,
-            params = {
-                "retrieval": req.retrieval.model_dump(),
-                "model_used": "faiss",
-            },
-            results = results,
-            explanations = explanations
-        )
-    
\ No newline at end of file
+    projection = parse_fields(fields, Result.model_fields)
+    deadline = _request_deadline(request, time.monotonic())
+    results, next_cursor = await _retrieve(req, deadline)
+    params = {
+        "retrieval": req.retrieval.model_dump(),
+        "model_used": req.retrieval.model,
+    }
+
+    if req.llm_explanations and req.explanations_async and results:
+        request_id = current_request_id()
+        try:
+            job = explanation_jobs.submit(
+                len(results[0:EXPLANATION_COUNT]), lambda job: _run_explanation_job(job, req, results, request_id)
+            )
+        except JobQueueFull as e:
+            logger.warning(f"Search shed: {e}")
+            raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after_s)})
+        return _search_response(request, projection, req.query, params, results, [], job.job_id, next_cursor)
+
+    token = set_deadline(deadline)
+    try:
+        explanations = await _admitted_explanations(req, results) if req.llm_explanations else []
+    finally:
+        reset_deadline(token)
+
+    return _search_response(request, projection, req.query, params, results, explanations,
+                            next_cursor=next_cursor)
+
+
+@app.get("/explanations/{job_id}", response_model=ExplanationJobResponse)
+def get_explanations(job_id: str):
+    """
+    Progress of a background explanation job started by /search with
+    explanations_async. Slots fill in as explanations complete; status is
+    "done" once all of them are in.
+    """
+    job = explanation_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired explanation job")
+    return ExplanationJobResponse(
+        job_id = job.job_id,
+        status = job.status,
+        completed = job.completed,
+        total = len(job.results),
+        explanations = job.results
+    )
+
+
+@app.post("/search/stream")
+async def search_stream(req: StreamSearchRequest, request: Request):
+    """
+    Streaming variant of /search.
+
+    Results are sent as soon as retrieval finishes, followed by each LLM
+    explanation (and, with stream_tokens, its tokens) as it arrives. The
+    body is NDJSON, or Server-Sent Events when the client accepts
+    text/event-stream. Events: results, token, explanation, done.
+    """
+    deadline = _request_deadline(request, time.monotonic())
+    # Retrieve before the stream starts so retrieval errors are plain HTTP errors
+    start = time.perf_counter()
+    results, next_cursor = await _retrieve(req, deadline)
+    retrieval_ms = (time.perf_counter() - start) * 1000
+
+    sse = "text/event-stream" in request.headers.get("accept", "")
+    encode = _sse if sse else _ndjson
+
+    async def body():
+        async for event in _search_events(req, results, retrieval_ms, deadline, next_cursor):
+            yield encode(event)
+
+    return StreamingResponse(
+        body(),
+        media_type = "text/event-stream" if sse else "application/x-ndjson",
+        headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,112 @@
+# backend/src/api/metrics_utils.py
+
+"""
+Prometheus metrics for the search API, served as text by GET /metrics.
+
+    search_stage_seconds{stage}              histogram per hot-path stage
+    cache_lookups_total{cache, result}       hit / miss counters
+    index_documents{index}                   documents in each loaded index
+    engine_available{engine}                 1 if a search engine / the LLM is usable
+    admission_*{lane}                        admission lane load and shed counts
+    log_records_dropped                      INFO/DEBUG records dropped by a full log queue
+
+Stages: tokenize, bm25_score, topk, hydrate, encode, faiss_search, llm_call,
+serialize and compress. Each stage child is resolved once, so recording a
+timing is one perf_counter pair and one histogram observe (a few
+microseconds). Stages are also spans of traced requests (see
+logging_utils). Gauges that describe state (index sizes, availability,
+admission) are read only when /metrics is scraped.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+from .logging_utils import dropped_log_records, span
+
+STAGES = (
+    "tokenize", "bm25_score", "topk", "hydrate", "encode",
+    "faiss_search", "llm_call", "serialize", "compress",
+)
+
+# From 50us (tokenizing a query) to 30s (an LLM call at its timeout)
+STAGE_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+STAGE_SECONDS = Histogram(
+    "search_stage_seconds", "Time spent in each search stage", ["stage"], buckets=STAGE_BUCKETS
+)
+_stage_histograms = {stage: STAGE_SECONDS.labels(stage) for stage in STAGES}
+
+CACHE_LOOKUPS = Counter("cache_lookups", "Cache lookups by cache and result", ["cache", "result"])
+INDEX_DOCUMENTS = Gauge("index_documents", "Documents in each loaded index", ["index"])
+ENGINE_AVAILABLE = Gauge("engine_available", "1 if the engine can serve requests", ["engine"])
+LOG_RECORDS_DROPPED = Gauge("log_records_dropped", "Log records dropped because the log queue was full")
+LOG_RECORDS_DROPPED.set_function(dropped_log_records)
+
+CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+
+def observe_stage(stage: str, seconds: float):
+    """Record a stage timing measured by the caller."""
+    _stage_histograms[stage].observe(seconds)
+
+
+@contextmanager
+def timed_stage(stage: str):
+    """Time the block as one observation of ``stage`` (and as a span of a traced request)."""
+    histogram = _stage_histograms[stage]
+    start = time.perf_counter()
+    try:
+        with span(stage):
+            yield
+    finally:
+        histogram.observe(time.perf_counter() - start)
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_LOOKUPS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def track_index_size(index: str, size: Callable[[], int]):
+    """Report ``size()`` as the document count of ``index`` at scrape time."""
+    INDEX_DOCUMENTS.labels(index).set_function(size)
+
+
+def track_engine(engine: str, available: Callable[[], bool]):
+    """Report ``available()`` as the availability of ``engine`` at scrape time."""
+    ENGINE_AVAILABLE.labels(engine).set_function(lambda: 1.0 if available() else 0.0)
+
+
+class _AdmissionCollector:
+    """Exports admission lane snapshots at scrape time."""
+
+    def __init__(self, snapshot: Callable[[], Dict[str, Dict[str, object]]]):
+        self.snapshot = snapshot
+
+    def collect(self):
+        in_flight = GaugeMetricFamily("admission_in_flight", "Requests holding a lane slot", labels=["lane"])
+        queued = GaugeMetricFamily("admission_queued", "Requests waiting for a lane slot", labels=["lane"])
+        admitted = CounterMetricFamily("admission_admitted", "Requests admitted", labels=["lane"])
+        shed = CounterMetricFamily("admission_shed", "Requests shed", labels=["lane", "reason"])
+        for lane, stats in self.snapshot().items():
+            in_flight.add_metric([lane], stats["in_flight"])
+            queued.add_metric([lane], stats["queued"])
+            admitted.add_metric([lane], stats["admitted"])
+            shed.add_metric([lane, "queue_full"], stats["shed_queue_full"])
+            shed.add_metric([lane, "timeout"], stats["shed_timeout"])
+        yield from (in_flight, queued, admitted, shed)
+
+
+def track_admission(snapshot: Callable[[], Dict[str, Dict[str, object]]]):
+    REGISTRY.register(_AdmissionCollector(snapshot))
+
+
+def render_metrics() -> bytes:
+    """All registered metrics in the Prometheus text format."""
+    return generate_latest(REGISTRY)
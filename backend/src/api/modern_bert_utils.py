@@ -1,18 +1,44 @@
 import os
+import threading
+import numpy as np
 import torch
-import faiss
-from sqlalchemy import create_engine
 from sqlalchemy.orm import Session, DeclarativeBase, Mapped, mapped_column
 from transformers import AutoTokenizer, AutoModel
 from dotenv import load_dotenv
-import boto3
-import io
+
+from .chunk_utils import segment_max
+from .content_utils import content_hash, post_text
+from .db_utils import get_engine
+from .embedding_utils import load_chunk_artifact, load_embedding_artifact
+from .index_utils import DenseIndex
+from .logging_utils import get_logger
+from .metrics_utils import timed_stage, track_index_size
 
 load_dotenv()
 
+logger = get_logger("modern_bert_utils")
+
 DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
 MODEL_NAME = "nomic-ai/modernbert-embed-base"
-EMBEDDINGS_PATH = "s3://travel-recommender-s3/travel_blog_embeddings.pt"
+# Embedding artifact location: s3://bucket/key or a local path
+EMBEDDINGS_PATH = os.getenv("EMBEDDINGS_PATH", "s3://travel-recommender-s3/travel_blog_embeddings.pt")
+
+# Query encoder backend: "torch" (fp32 PyTorch), "onnx" (fp32 ONNX Runtime)
+# or "onnx-int8" (dynamically quantized ONNX Runtime graph)
+ENCODER_BACKEND = os.getenv("ENCODER_BACKEND", "torch")
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "artifacts/onnx")
+ONNX_NUM_THREADS = int(os.getenv("ONNX_NUM_THREADS", "0"))  # 0 lets ORT decide
+
+# Dense search granularity: "post" (one vector per post) or "chunk" (one
+# vector per overlapping token window, aggregated to posts by max score)
+EMBEDDING_GRANULARITY = os.getenv("EMBEDDING_GRANULARITY", "post")
+CHUNK_EMBEDDINGS_PATH = os.getenv(
+    "CHUNK_EMBEDDINGS_PATH", "s3://travel-recommender-s3/travel_blog_chunk_embeddings.pt"
+)
+CHUNK_STORAGE_MODE = os.getenv("CHUNK_STORAGE_MODE", "fp16")
+# Chunks fetched per requested post; widened automatically if too few distinct posts
+CHUNK_SEARCH_MULTIPLIER = int(os.getenv("CHUNK_SEARCH_MULTIPLIER", "4"))
+CHUNK_BUILD_BLOCK = 65536  # chunk vectors converted to float32 at a time
 
 # -----------------------------
 # Load model + tokenizer
@@ -44,114 +70,526 @@ class Whole_Blogs(Base):
 # -----------------------------
 # Cache
 # -----------------------------
+# Rows of _cached_posts are the FAISS ids. Removed posts leave a None row
+# behind so existing ids never shift. Full vectors are not held in RAM: the
+# index keeps them in its memory-mapped store (_index.vectors), read by
+# rerank_candidates.
 _cached_posts = None
 _index = None
-_embeddings = None
+_row_by_post_id = {}
+_pending_post_ids = set()
+
+# Chunk mode: rows of _chunk_post_ids are the FAISS ids of the chunk index
+_chunk_posts = None
+_chunk_index = None
+_chunk_post_ids = None
+
+# Bumped whenever either dense index is built or changed; cursors over
+# ranked lists from an older version are expired
+_index_version = 0
+
+# Builds are single-flight: concurrent first callers wait for one build.
+# The post index lock also serializes refreshes; it is reentrant because
+# refresh_index calls add/remove_post_embeddings.
+_index_lock = threading.RLock()
+_chunk_index_lock = threading.Lock()
+_onnx_lock = threading.Lock()
 
 # -----------------------------
 # Embed helper for queries only
 # -----------------------------
-def embed_texts(texts_batch):
-    encoded = tokenizer(
+class _PooledEncoder(torch.nn.Module):
+    """ModernBERT followed by masked mean pooling and L2 normalization.
+
+    Wrapping the pooling in a module lets the ONNX graph return the final
+    embedding, so both backends share one definition of the output.
+    """
+
+    def __init__(self, encoder):
+        super().__init__()
+        self.encoder = encoder
+
+    def forward(self, input_ids, attention_mask):
+        outputs = self.encoder(input_ids=input_ids, attention_mask=attention_mask)
+        last_hidden = outputs.last_hidden_state
+        mask = attention_mask.unsqueeze(-1).to(last_hidden.dtype)
+        sum_embeddings = torch.sum(last_hidden * mask, dim=1)
+        sum_mask = torch.clamp(torch.sum(mask, dim=1), min=1e-9)
+        embedding = sum_embeddings / sum_mask
+        return torch.nn.functional.normalize(embedding, p=2, dim=1)
+
+
+_pooled_model = _PooledEncoder(model).eval()
+_onnx_sessions = {}
+
+
+def _tokenize(texts_batch):
+    return tokenizer(
         texts_batch,
         padding=True,
         truncation=True,
         max_length=512,
         return_tensors="pt"
-    ).to(DEVICE)
+    )
 
+
+def _onnx_model_path(quantized: bool, output_dir: str = None) -> str:
+    output_dir = output_dir or ONNX_MODEL_DIR
+    return os.path.join(output_dir, "model.int8.onnx" if quantized else "model.onnx")
+
+
+def export_onnx(output_dir: str = None, quantize: bool = True) -> str:
+    """
+    Export the pooled query encoder to ONNX, optionally with an int8 copy.
+
+    Args:
+        output_dir: Directory to write ``model.onnx`` (and ``model.int8.onnx``);
+            defaults to ONNX_MODEL_DIR
+        quantize: Also write a dynamically int8-quantized graph
+
+    Returns:
+        Path of the exported fp32 graph
+    """
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    output_dir = output_dir or ONNX_MODEL_DIR
+    os.makedirs(output_dir, exist_ok=True)
+    fp32_path = _onnx_model_path(False, output_dir)
+
+    # Export from an eager-attention copy on CPU; the SDPA/compiled kernels
+    # used at serving time do not trace cleanly.
+    export_model = AutoModel.from_pretrained(MODEL_NAME, attn_implementation="eager")
+    export_model.config.reference_compile = False
+    pooled = _PooledEncoder(export_model).eval()
+
+    dummy = tokenizer(["a travel query", "a longer travel query for export"],
+                      padding=True, return_tensors="pt")
     with torch.no_grad():
-        outputs = model(**encoded)
+        torch.onnx.export(
+            pooled,
+            (dummy["input_ids"], dummy["attention_mask"]),
+            fp32_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["embedding"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "embedding": {0: "batch"},
+            },
+            opset_version=17,
+        )
+
+    if quantize:
+        quantize_dynamic(fp32_path, _onnx_model_path(True, output_dir), weight_type=QuantType.QInt8)
+
+    return fp32_path
+
+
+def _get_onnx_session(quantized: bool):
+    """Load (exporting on first use if needed) and cache an ORT session."""
+    if quantized in _onnx_sessions:
+        return _onnx_sessions[quantized]
+
+    import onnxruntime as ort
+
+    with _onnx_lock:
+        if quantized in _onnx_sessions:
+            return _onnx_sessions[quantized]
+
+        path = _onnx_model_path(quantized)
+        if not os.path.exists(path):
+            export_onnx(quantize=quantized)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if ONNX_NUM_THREADS:
+            options.intra_op_num_threads = ONNX_NUM_THREADS
+
+        session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        _onnx_sessions[quantized] = session
+        return session
+
+
+def embed_texts(texts_batch, backend: str = None):
+    """
+    Encode texts into L2-normalized mean-pooled embeddings.
+
+    Args:
+        texts_batch: List of strings to encode
+        backend: "torch", "onnx" or "onnx-int8"; defaults to ENCODER_BACKEND
+
+    Returns:
+        CPU float32 tensor of shape (len(texts_batch), hidden_size)
+    """
+    backend = backend or ENCODER_BACKEND
+    encoded = _tokenize(texts_batch)
+
+    if backend == "torch":
+        encoded = encoded.to(DEVICE)
+        with torch.no_grad():
+            embedding = _pooled_model(encoded["input_ids"], encoded["attention_mask"])
+        return embedding.cpu()
+
+    if backend in ("onnx", "onnx-int8"):
+        session = _get_onnx_session(quantized=backend == "onnx-int8")
+        (embedding,) = session.run(
+            ["embedding"],
+            {
+                "input_ids": encoded["input_ids"].numpy(),
+                "attention_mask": encoded["attention_mask"].numpy(),
+            },
+        )
+        return torch.from_numpy(embedding)
+
+    raise ValueError(f"Unknown encoder backend: {backend!r}")
 
-    last_hidden = outputs.last_hidden_state
-    attention_mask = encoded["attention_mask"].unsqueeze(-1)
-    sum_embeddings = torch.sum(last_hidden * attention_mask, dim=1)
-    sum_mask = torch.sum(attention_mask, dim=1)
-    sum_mask = torch.clamp(sum_mask, min=1e-9)
-    embedding = sum_embeddings / sum_mask
-    embedding = torch.nn.functional.normalize(embedding, p=2, dim=1)
-    return embedding.cpu()
 
 # -----------------------------
 # Load posts and embeddings
 # -----------------------------
-def load_embeddings_from_s3(bucket: str, key: str):
-    s3 = boto3.client("s3")
-    obj = s3.get_object(Bucket=bucket, Key=key)
-    buffer = io.BytesIO(obj["Body"].read())
-    return torch.load(buffer, weights_only=True)
+def _post_hash(post) -> str:
+    return content_hash(post_text(post.page_title, post.page_description, post.content))
+
+
+def _is_current(post, hashes) -> bool:
+    """An embedding is usable if its hash matches (or predates hash tracking)."""
+    return post.id not in hashes or hashes[post.id] == _post_hash(post)
+
+
+def _query_posts():
+    with Session(get_engine()) as session:
+        return session.query(Whole_Blogs).all()
 
 
 def _load_posts_and_index():
-    global _cached_posts, _index, _embeddings
+    """Return the posts, post index and its vector store, building them on first use."""
+    if _cached_posts is None or _index is None:
+        with _index_lock:
+            if _cached_posts is None or _index is None:
+                _build_posts_and_index()
+    return _cached_posts, _index, _index.vectors
+
 
-    if _cached_posts is not None and _index is not None and _embeddings is not None:
-        return _cached_posts, _index, _embeddings
+def _build_posts_and_index():
+    global _cached_posts, _index, _row_by_post_id, _pending_post_ids, _index_version
 
     # Load metadata from DB
-    database_url = os.getenv("DATABASE_URL")
-    if not database_url:
-        raise ValueError("DATABASE_URL not found in environment variables")
-    engine = create_engine(database_url)
-    with Session(engine) as session:
-        _cached_posts = session.query(Whole_Blogs).all()
-
-    # Load precomputed embeddings
-    if EMBEDDINGS_PATH.startswith("s3://"):
-        path_without_s3 = EMBEDDINGS_PATH[5:]
-        bucket_name, key = path_without_s3.split("/", 1)
-        data = load_embeddings_from_s3(bucket_name, key)
-    else:
-        data = torch.load(EMBEDDINGS_PATH, weights_only=True)
+    all_posts = _query_posts()
+
+    # Load precomputed embeddings (base artifact + deltas)
+    data, hashes = load_embedding_artifact(EMBEDDINGS_PATH)
 
-    # Convert embeddings dict to tensor array
-    # Data is {blog_id: embedding_tensor, ...}
-    # We need to convert to a stacked tensor aligned with _cached_posts order
+    # Posts without a current embedding are left out of the dense index and
+    # remain searchable through BM25 until the next refresh embeds them
+    posts = []
     embedding_list = []
-    for post in _cached_posts:
-        if post.id in data:
+    pending = set()
+    for post in all_posts:
+        if post.id in data and _is_current(post, hashes):
+            posts.append(post)
             embedding_list.append(data[post.id])
         else:
-            raise ValueError(f"Missing embedding for blog post ID {post.id}")
-    
-    _embeddings = torch.stack(embedding_list)
+            pending.add(post.id)
+
+    if pending:
+        logger.warning(f"{len(pending)} posts are awaiting embeddings and are served by BM25 only")
+    if not posts:
+        raise ValueError("No blog posts have embeddings; FAISS index cannot be built")
+
+    vectors = torch.stack(embedding_list).numpy()
+    del embedding_list, data
+
+    # Build FAISS index keyed by row id so rows can be appended and removed.
+    # The storage mode (flat/fp16/sq8/pq/binary) comes from FAISS_STORAGE_MODE.
+    # Full vectors go to the index's memory-mapped store (bm25+rerank gathers
+    # from it); the float32 matrix is dropped once the index is built.
+    _index = DenseIndex(vectors.shape[1], keep_vectors=True).build(
+        vectors, np.arange(len(posts), dtype="int64")
+    )
+    del vectors
+
+    _cached_posts = posts
+    _row_by_post_id = {post.id: row for row, post in enumerate(posts)}
+    _pending_post_ids = pending
+    _index_version += 1
+    logger.info(f"FAISS index built with {len(posts)} posts")
+
+
+def add_post_embeddings(posts, vectors: torch.Tensor):
+    """
+    Append posts and their embeddings to the live index.
+
+    Posts that are already indexed are replaced.
+    """
+    global _index_version
+
+    with _index_lock:
+        _load_posts_and_index()
+        remove_post_embeddings([post.id for post in posts if post.id in _row_by_post_id])
+
+        start = len(_cached_posts)
+        rows = np.arange(start, start + len(posts), dtype="int64")
+        _index.add(vectors.numpy(), rows)
+        for row, post in zip(rows, posts):
+            _cached_posts.append(post)
+            _row_by_post_id[post.id] = int(row)
+            _pending_post_ids.discard(post.id)
+        _index_version += 1
 
-    # Build FAISS index
-    _index = faiss.IndexFlatL2(_embeddings.shape[1])
-    _index.add(_embeddings.numpy())
 
-    return _cached_posts, _index, _embeddings
+def remove_post_embeddings(post_ids):
+    """Remove posts from the live index; their rows become tombstones."""
+    global _index_version
+
+    with _index_lock:
+        _load_posts_and_index()
+        rows = [_row_by_post_id.pop(post_id) for post_id in post_ids if post_id in _row_by_post_id]
+        if not rows:
+            return 0
+        _index.remove(np.array(rows, dtype="int64"))
+        for row in rows:
+            _cached_posts[row] = None
+        _index_version += 1
+        return len(rows)
+
+
+def refresh_index():
+    """
+    Bring the live index up to date with the database and artifact deltas.
+
+    Only changed posts are touched: new or re-embedded posts are appended,
+    deleted or stale posts are removed, and posts still lacking an embedding
+    are tracked as pending.
+
+    Returns:
+        Dict with the number of added, removed and pending posts
+    """
+    global _pending_post_ids
+
+    with _index_lock:
+        _load_posts_and_index()
+
+        all_posts = _query_posts()
+        data, hashes = load_embedding_artifact(EMBEDDINGS_PATH)
+
+        db_ids = {post.id for post in all_posts}
+        to_remove = [post_id for post_id in _row_by_post_id if post_id not in db_ids or post_id not in data]
+        to_add = []
+        pending = set()
+        for post in all_posts:
+            if post.id in data and _is_current(post, hashes):
+                row = _row_by_post_id.get(post.id)
+                indexed = _cached_posts[row] if row is not None else None
+                if indexed is None or _post_hash(indexed) != _post_hash(post):
+                    to_add.append(post)
+            else:
+                pending.add(post.id)
+                if post.id in _row_by_post_id:
+                    to_remove.append(post.id)
+
+        removed = remove_post_embeddings(to_remove)
+        if to_add:
+            add_post_embeddings(to_add, torch.stack([data[post.id] for post in to_add]))
+        _pending_post_ids = pending
+
+        logger.info(f"FAISS index refreshed: {len(to_add)} added, {removed} removed, {len(pending)} pending")
+        return {"added": len(to_add), "removed": removed, "pending": len(pending)}
+
+
+track_index_size("faiss", lambda: _index.ntotal if _index is not None else 0)
+track_index_size("faiss_chunks", lambda: _chunk_index.ntotal if _chunk_index is not None else 0)
+
+
+def get_pending_post_ids():
+    """Ids of posts that are not in the dense index yet."""
+    return set(_pending_post_ids)
+
+
+def index_version() -> int:
+    """Version of the dense indexes, bumped on every build, add and remove."""
+    return _index_version
+
+# -----------------------------
+# Load chunk embeddings
+# -----------------------------
+def _load_chunk_index():
+    """Return the chunk posts, chunk index and chunk post ids, building them on first use."""
+    if _chunk_index is None:
+        with _chunk_index_lock:
+            if _chunk_index is None:
+                _build_chunk_index()
+    return _chunk_posts, _chunk_index, _chunk_post_ids
+
+
+def _build_chunk_index():
+    """
+    Build the chunk index from the chunk artifact.
+
+    Chunks of posts that are missing from the database or whose content hash
+    changed are dropped; those posts are served by BM25 until re-embedded.
+    """
+    global _chunk_posts, _chunk_index, _chunk_post_ids, _index_version
+
+    all_posts = _query_posts()
+    embeddings, post_ids, hashes = load_chunk_artifact(CHUNK_EMBEDDINGS_PATH)
+
+    posts = {post.id: post for post in all_posts if _is_current(post, hashes)}
+    keep = torch.isin(post_ids, torch.tensor(list(posts), dtype=torch.long))
+    embeddings, post_ids = embeddings[keep], post_ids[keep]
+    if not len(post_ids):
+        raise ValueError("No blog posts have chunk embeddings; FAISS index cannot be built")
+
+    # Chunk vectors stay float16 at rest; only one block at a time is widened
+    # to float32 while it is added to the index
+    rows = np.arange(len(post_ids), dtype="int64")
+    index = DenseIndex(embeddings.shape[1], mode=CHUNK_STORAGE_MODE, rerank_n=0)
+    index.build(embeddings[:CHUNK_BUILD_BLOCK].float().numpy(), rows[:CHUNK_BUILD_BLOCK])
+    for start in range(CHUNK_BUILD_BLOCK, len(rows), CHUNK_BUILD_BLOCK):
+        block = slice(start, start + CHUNK_BUILD_BLOCK)
+        index.add(embeddings[block].float().numpy(), rows[block])
+
+    n_posts = len(torch.unique(post_ids))
+    missing = len(all_posts) - n_posts
+    if missing:
+        logger.warning(f"{missing} posts are awaiting chunk embeddings and are served by BM25 only")
+
+    _chunk_posts = posts
+    _chunk_index = index
+    _chunk_post_ids = post_ids.clone()
+    _index_version += 1
+    logger.info(f"FAISS chunk index built with {len(rows)} chunks from {n_posts} posts")
+
+
+def _search_chunks(query: str, top_k: int):
+    """
+    Search the chunk index and return the top_k distinct posts.
+
+    Each post is scored by its best chunk (segmented max over the retrieved
+    chunks). If the retrieved chunks cover fewer than top_k posts, the chunk
+    fetch is doubled until it does or the index is exhausted.
+    """
+    posts, index, chunk_post_ids = _load_chunk_index()
+    if not query.strip():
+        return []
+
+    with timed_stage("encode"):
+        q_emb = embed_texts([query]).numpy()
+    fetch = top_k * max(1, CHUNK_SEARCH_MULTIPLIER)
+    while True:
+        with timed_stage("faiss_search"):
+            distances, rows = index.search(q_emb, min(fetch, index.ntotal))
+        found = rows[0] >= 0
+        rows = torch.from_numpy(rows[0][found])
+        # Negated distance so the best chunk per post is the maximum
+        scores = -torch.from_numpy(distances[0][found])
+        post_ids, best = segment_max(scores, chunk_post_ids[rows])
+        if len(post_ids) >= top_k or fetch >= index.ntotal:
+            break
+        fetch *= 2
+
+    with timed_stage("hydrate"):
+        return [
+            _result_dict(posts[post_id], -score)
+            for post_id, score in zip(post_ids[:top_k].tolist(), best[:top_k].tolist())
+        ]
+
+# -----------------------------
+# Re-rank BM25 candidates
+# -----------------------------
+def rerank_candidates(query: str, candidates, top_k: int):
+    """
+    Re-rank candidate posts by similarity to the query embedding.
+
+    Embeddings are gathered by row id from the stored embedding matrix, so
+    the cost is one query encode plus a dot product per candidate; no FAISS
+    search runs. Candidates without an embedding yet keep their original
+    order after the re-ranked ones.
+
+    Args:
+        query: Search query string
+        candidates: Result dicts with an ``id`` field (e.g. from search_bm25)
+        top_k: Number of results to return
+
+    Returns:
+        Candidates with ``similarity`` and ``distance`` added, best first
+    """
+    _, _, vectors = _load_posts_and_index()
+    if not query.strip() or not candidates:
+        return []
+
+    rows = [_row_by_post_id.get(c.get("id")) for c in candidates]
+    embedded = [i for i, row in enumerate(rows) if row is not None]
+    missing = [candidates[i] for i, row in enumerate(rows) if row is None]
+
+    reranked = []
+    if embedded:
+        with timed_stage("encode"):
+            q_emb = embed_texts([query])[0].numpy()
+        gathered = vectors.gather(np.array([rows[i] for i in embedded], dtype="int64"))
+        similarities = (gathered @ q_emb).tolist()
+        for i, sim in sorted(zip(embedded, similarities), key=lambda item: item[1], reverse=True):
+            # Squared L2 between unit vectors, comparable with FAISS distances
+            reranked.append({**candidates[i], "similarity": sim, "distance": 2.0 - 2.0 * sim})
+
+    return (reranked + missing)[:top_k]
+
+# -----------------------------
+# Warm-up
+# -----------------------------
+def load_dense_index():
+    """Build the index that search_modernbert uses at EMBEDDING_GRANULARITY, if not built yet."""
+    if EMBEDDING_GRANULARITY == "chunk":
+        _load_chunk_index()
+    else:
+        _load_posts_and_index()
+
+
+def warm_encoder():
+    """Encode one dummy query so the first real one skips lazy setup (ONNX session, kernel selection)."""
+    embed_texts(["warm-up query"])
 
 # -----------------------------
 # Search function
 # -----------------------------
+def _result_dict(post, distance: float):
+    content_preview = post.content[:300] + ("..." if len(post.content) > 300 else "")
+    location_parts = post.location_name.split(",")
+    country = location_parts[-1].strip() if len(location_parts) > 1 else ""
+    return {
+        "destination": post.location_name,
+        "country": country,
+        "lat": post.latitude,
+        "lon": post.longitude,
+        "distance": float(distance),
+        "page_title": post.page_title,
+        "page_url": post.page_url,
+        "blog_url": post.blog_url,
+        "author": post.page_author,
+        "description": post.page_description,
+        "content_preview": content_preview,
+        "full_content": post.content
+    }
+
+
 def search_modernbert(query: str, top_k: int = 5):
-    posts, index, embeddings = _load_posts_and_index()
+    if EMBEDDING_GRANULARITY == "chunk":
+        return _search_chunks(query, top_k)
+
+    posts, index, _ = _load_posts_and_index()
     if not query.strip():
         return []
 
-    q_emb = embed_texts([query]).numpy()
-    distances, idxs = index.search(q_emb, top_k)
+    with timed_stage("encode"):
+        q_emb = embed_texts([query]).numpy()
+    with timed_stage("faiss_search"):
+        distances, idxs = index.search(q_emb, top_k)
 
     results = []
-    for i, idx in enumerate(idxs[0]):
-        post = posts[idx]
-        content_preview = post.content[:300] + ("..." if len(post.content) > 300 else "")
-        location_parts = post.location_name.split(",")
-        country = location_parts[-1].strip() if len(location_parts) > 1 else ""
-        results.append({
-            "destination": post.location_name,
-            "country": country,
-            "lat": post.latitude,
-            "lon": post.longitude,
-            "distance": float(distances[0][i]),
-            "page_title": post.page_title,
-            "page_url": post.page_url,
-            "blog_url": post.blog_url,
-            "author": post.page_author,
-            "description": post.page_description,
-            "content_preview": content_preview,
-            "full_content": post.content
-        })
+    with timed_stage("hydrate"):
+        for i, idx in enumerate(idxs[0]):
+            # FAISS pads with -1 when fewer than top_k vectors are indexed
+            if idx < 0 or posts[idx] is None:
+                continue
+            results.append(_result_dict(posts[idx], distances[0][i]))
 
     return results
@@ -0,0 +1,131 @@
+# backend/src/api/pagination_utils.py
+
+"""
+Cursor pagination over cached ranked lists.
+
+The first paginated search ranks a deeper list (PAGINATION_PAGES pages of
+k results, at most PAGINATION_DEPTH) once and keeps a compact copy of it,
+without full_content or snippets, in a bounded in-process cache. Later pages
+are slices of that list, hydrated from the document store; nothing is
+rescored or re-encoded.
+
+Cursors are opaque to clients. A cursor stops working when its list is
+evicted, when it is older than CURSOR_TTL_S, or when the index it was ranked
+against has changed since (a reload, or posts added or removed).
+"""
+
+import base64
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+# Import Logger
+from .logging_utils import get_logger
+
+load_dotenv()
+
+logger = get_logger("pagination_utils")
+
+PAGINATION_DEPTH = int(os.getenv("PAGINATION_DEPTH", "200"))
+# Pages ranked up front, so a small k does not pay for a PAGINATION_DEPTH ranking
+PAGINATION_PAGES = int(os.getenv("PAGINATION_PAGES", "5"))
+CURSOR_TTL_S = int(os.getenv("CURSOR_TTL_S", "900"))
+CURSOR_CACHE_SIZE = int(os.getenv("CURSOR_CACHE_SIZE", "256"))
+
+
+def ranking_depth(k: int) -> int:
+    """Results ranked for a paginated search of ``k`` per page (never fewer than k)."""
+    return max(k, min(PAGINATION_DEPTH, k * PAGINATION_PAGES))
+
+
+class CursorExpired(Exception):
+    """The cursor is malformed, evicted, too old or from an older index."""
+
+
+def encode_cursor(list_id: str, offset: int) -> str:
+    return base64.urlsafe_b64encode(f"{list_id}:{offset}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """
+    Raises:
+        CursorExpired: if the cursor cannot be decoded
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        list_id, offset = base64.urlsafe_b64decode(padded).decode().split(":")
+        offset = int(offset)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise CursorExpired("Malformed cursor") from e
+    if offset < 0:
+        raise CursorExpired("Malformed cursor")
+    return list_id, offset
+
+
+class _RankedList:
+    def __init__(self, entries: List[Dict], version: Hashable, created_at: float):
+        self.entries = entries
+        self.version = version
+        self.created_at = created_at
+
+
+class RankedListCache:
+    """Bounded LRU of ranked lists, each tagged with the index version it came from."""
+
+    def __init__(self, max_lists: int = CURSOR_CACHE_SIZE, ttl_s: float = CURSOR_TTL_S, clock=time.monotonic):
+        self.max_lists = max_lists
+        self.ttl_s = ttl_s
+        self._clock = clock
+        self._lists = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._lists)
+
+    def put(self, entries: List[Dict], version: Hashable) -> str:
+        """Store a ranked list and return its id."""
+        list_id = secrets.token_urlsafe(12)
+        with self._lock:
+            self._lists[list_id] = _RankedList(entries, version, self._clock())
+            while len(self._lists) > self.max_lists:
+                self._lists.popitem(last=False)
+        return list_id
+
+    def page(self, cursor: str, size: int, version: Hashable) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Return the entries a cursor points at.
+
+        Args:
+            cursor: Cursor returned by a previous page
+            size: Page size
+            version: Current version of the index the list must come from
+
+        Returns:
+            (entries of this page, cursor of the next page or None)
+
+        Raises:
+            CursorExpired: if the list is gone, too old or from another index version
+        """
+        list_id, offset = decode_cursor(cursor)
+        with self._lock:
+            ranked = self._lists.get(list_id)
+            if ranked is None:
+                raise CursorExpired("Unknown or evicted cursor")
+            if self._clock() - ranked.created_at > self.ttl_s:
+                del self._lists[list_id]
+                raise CursorExpired("Cursor is too old")
+            if ranked.version != version:
+                del self._lists[list_id]
+                logger.info(f"Cursor list {list_id} dropped: index changed since it was ranked")
+                raise CursorExpired("The index changed since this cursor was issued")
+            self._lists.move_to_end(list_id)
+
+        entries = ranked.entries[offset:offset + size]
+        next_offset = offset + size
+        next_cursor = encode_cursor(list_id, next_offset) if next_offset < len(ranked.entries) else None
+        return entries, next_cursor
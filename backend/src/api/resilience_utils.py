@@ -0,0 +1,154 @@
+# backend/src/api/resilience_utils.py
+
+"""
+Failure isolation for calls to slow or unreliable upstreams (the LLM API).
+
+    deadlines        the API sets a per-request deadline in a context
+                     variable; every upstream call waits at most the time
+                     left, so a request never outlives its own budget
+    CircuitBreaker   after N consecutive failures calls fail fast for a
+                     cool-down period, then a single trial call decides
+                     whether to close again
+    hedged           if a call has not answered after a delay, a second
+                     identical call is raced against it
+"""
+
+import asyncio
+import contextvars
+import time
+from typing import Awaitable, Callable, Optional
+
+# Import Logger
+from .logging_utils import get_logger
+
+logger = get_logger("resilience_utils")
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling an upstream whose circuit breaker is open."""
+
+
+# -----------------------------
+# Deadlines
+# -----------------------------
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("deadline", default=None)
+
+
+def set_deadline(deadline: Optional[float]) -> contextvars.Token:
+    """Set the absolute time.monotonic() deadline for the current request."""
+    return _deadline.set(deadline)
+
+
+def reset_deadline(token: contextvars.Token):
+    _deadline.reset(token)
+
+
+def time_left(cap: Optional[float] = None) -> Optional[float]:
+    """
+    Seconds until the current deadline, capped at ``cap``.
+
+    Returns:
+        The smaller of ``cap`` and the remaining time (may be <= 0), or
+        ``cap`` when no deadline is set
+    """
+    deadline = _deadline.get()
+    if deadline is None:
+        return cap
+    remaining = deadline - time.monotonic()
+    return remaining if cap is None else min(cap, remaining)
+
+
+# -----------------------------
+# Circuit breaker
+# -----------------------------
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    closed     calls pass; ``failure_threshold`` failures in a row open it
+    open       calls raise CircuitOpenError until ``reset_timeout_s`` passes
+    half-open  one trial call passes; success closes, failure re-opens
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout_s: float, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self.clock() - self.opened_at >= self.reset_timeout_s:
+            return "half-open"
+        return "open"
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go through now."""
+        state = self.state
+        if state == "closed" or not self.failure_threshold:
+            return
+        if state == "half-open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return
+        raise CircuitOpenError(f"Circuit '{self.name}' is open")
+
+    def record_success(self):
+        if self.opened_at is not None:
+            logger.info(f"Circuit '{self.name}' closed")
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.failure_threshold and (self.opened_at is not None or self.failures >= self.failure_threshold):
+            if self.state != "open":
+                logger.warning(f"Circuit '{self.name}' opened after {self.failures} consecutive failures")
+            self.opened_at = self.clock()
+
+    def abandon(self):
+        """Forget a call whose outcome is unknown (e.g. cancelled by its caller)."""
+        self._trial_in_flight = False
+
+
+# -----------------------------
+# Hedged calls
+# -----------------------------
+async def hedged(call: Callable[[], Awaitable], hedge_after_s: float):
+    """
+    Run ``call`` and, if it has not finished after ``hedge_after_s``, race a
+    second attempt against it. The first success wins and the loser is
+    cancelled; if both fail the last error is raised.
+
+    Args:
+        call: Zero-argument coroutine function performing one attempt
+        hedge_after_s: Delay before the hedge is sent; 0 disables hedging
+    """
+    first = asyncio.ensure_future(call())
+    if not hedge_after_s:
+        return await first
+
+    pending = {first}
+    try:
+        done, _ = await asyncio.wait(pending, timeout=hedge_after_s)
+        if not done:
+            logger.info(f"No answer after {hedge_after_s}s, sending hedged request")
+            pending.add(asyncio.ensure_future(call()))
+
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,117 @@
+# backend/src/api/response_utils.py
+
+"""
+Fast JSON responses for the search endpoints.
+
+Search results are validated once, when the handlers build ``Result``
+objects. Instead of letting FastAPI validate and serialize them a second
+time through ``response_model``, the response is dumped to plain Python and
+encoded with orjson. On top of that:
+
+    fields=      keep only the listed result fields (e.g. drop full_content)
+    compression  gzip, or brotli when installed, chosen from Accept-Encoding
+"""
+
+import gzip
+import os
+from typing import Dict, Iterable, List, Optional
+
+import orjson
+from fastapi import HTTPException
+from fastapi.responses import Response
+
+from .metrics_utils import timed_stage
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+
+def encode_json(payload) -> bytes:
+    """Serialize with orjson (numpy scalars and arrays included)."""
+    return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str]) -> Optional[List[str]]:
+    """
+    Parse a comma-separated ``fields=`` value.
+
+    Raises:
+        HTTPException: 400 if a field is not a result field
+    """
+    if not fields:
+        return None
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = sorted(set(requested) - set(allowed))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown result fields: {', '.join(unknown)}")
+    return requested
+
+
+def project(results: List[Dict], fields: Optional[List[str]]) -> List[Dict]:
+    """Keep only ``fields`` of every result dict (all fields when None)."""
+    if fields is None:
+        return results
+    return [{field: r[field] for field in fields if field in r} for r in results]
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick "br" or "gzip" from an Accept-Encoding header, honouring q-values.
+
+    Brotli wins ties when it is installed; None means send identity.
+    """
+    if not accept_encoding:
+        return None
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+
+    candidates = (["br"] if brotli is not None else []) + ["gzip"]
+    best = max(candidates, key=lambda name: weights.get(name, weights.get("*", 0.0)))
+    return best if weights.get(best, weights.get("*", 0.0)) > 0 else None
+
+
+def compress(body: bytes, encoding: Optional[str]) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    return body
+
+
+def json_response(payload, accept_encoding: Optional[str] = None, status_code: int = 200) -> Response:
+    """
+    Encode ``payload`` with orjson and compress it as the client accepts.
+
+    Args:
+        payload: JSON-compatible data (already dumped from pydantic models)
+        accept_encoding: The request's Accept-Encoding header
+        status_code: HTTP status
+
+    Returns:
+        Response with Content-Encoding and Vary headers as appropriate
+    """
+    with timed_stage("serialize"):
+        body = encode_json(payload)
+    headers = {"Vary": "Accept-Encoding"}
+    encoding = negotiate_encoding(accept_encoding) if len(body) >= COMPRESS_MIN_BYTES else None
+    if encoding:
+        with timed_stage("compress"):
+            body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
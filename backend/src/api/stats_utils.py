@@ -0,0 +1,101 @@
+# backend/src/api/stats_utils.py
+
+"""
+Corpus statistics for the /stats endpoint.
+
+The statistics are computed in one pass over the in-memory corpus the BM25
+index is built from, instead of running aggregate queries against the
+database on every request. The result is kept as a snapshot (serialized
+JSON plus an ETag) and rebuilt only when the corpus is reloaded.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+from typing import Dict, List
+
+from dotenv import load_dotenv
+
+from .bm25_utils import get_bm25_posts
+from .metrics_utils import record_cache
+# Import Logger
+from .logging_utils import get_logger
+
+load_dotenv()
+
+logger = get_logger("stats_utils")
+
+# Cache-Control max-age sent with /stats
+STATS_MAX_AGE_S = int(os.getenv("STATS_MAX_AGE_S", "300"))
+
+
+def compute_stats(posts: List[Dict]) -> Dict:
+    """
+    Aggregate corpus statistics, matching the former SQL queries.
+
+    Distinct counts ignore missing values, and coordinates are grouped by
+    (location, lat, lon) over posts that have both coordinates.
+    """
+    locations = set()
+    blogs = set()
+    authors = set()
+    coordinates = Counter()
+    for post in posts:
+        if post.get("location_name") is not None:
+            locations.add(post["location_name"])
+        if post.get("blog_url") is not None:
+            blogs.add(post["blog_url"])
+        if post.get("page_author") is not None:
+            authors.add(post["page_author"])
+        if post.get("latitude") is not None and post.get("longitude") is not None:
+            coordinates[(post.get("location_name"), post["latitude"], post["longitude"])] += 1
+
+    return {
+        "total_posts": len(posts),
+        "unique_locations": len(locations),
+        "unique_blogs": len(blogs),
+        "unique_authors": len(authors),
+        "coordinates": [
+            {
+                "location": loc,
+                "lat": float(lat),
+                "lon": float(lon),
+                "count": cnt
+            } for (loc, lat, lon), cnt in coordinates.items()
+        ]
+    }
+
+
+class StatsSnapshot:
+    """Serialized statistics of one corpus version."""
+
+    def __init__(self, stats: Dict, source: List[Dict]):
+        self.body = json.dumps(stats, separators=(",", ":")).encode("utf-8")
+        self.etag = '"' + hashlib.sha256(self.body).hexdigest()[:32] + '"'
+        self.stats = stats
+        self.source = source  # the corpus list the stats were computed from
+
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+
+def get_stats_snapshot() -> StatsSnapshot:
+    """Return the current statistics snapshot, rebuilding it if the corpus was reloaded."""
+    global _snapshot
+
+    posts = get_bm25_posts()
+    with _snapshot_lock:
+        current = _snapshot is not None and _snapshot.source is posts
+        record_cache("stats_snapshot", current)
+        if not current:
+            start = time.perf_counter()
+            _snapshot = StatsSnapshot(compute_stats(posts), posts)
+            logger.info(
+                f"Stats snapshot built: {_snapshot.stats['total_posts']} posts, "
+                f"{_snapshot.stats['unique_locations']} locations in {(time.perf_counter() - start) * 1000:.1f}ms"
+            )
+        return _snapshot
@@ -0,0 +1,233 @@
+# backend/src/api/storage_utils.py
+
+"""
+Artifact storage for embeddings and indexes.
+
+Artifacts are addressed by a URI: ``s3://bucket/key`` for S3 or a plain
+filesystem path. Transfers stream between disk and the backend in chunks
+(multipart for S3), so an artifact is never held in memory as a whole, and
+every transfer is verified against a SHA-256 checksum stored alongside it.
+"""
+
+import hashlib
+import os
+import shutil
+from abc import ABC, abstractmethod
+from typing import List, Optional, Tuple
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from dotenv import load_dotenv
+
+# Import Logger
+from .logging_utils import get_logger
+
+load_dotenv()
+
+logger = get_logger("storage_utils")
+
+ARTIFACT_CACHE_DIR = os.getenv("ARTIFACT_CACHE_DIR", "artifacts/cache")
+CHUNK_SIZE = 8 * 1024 * 1024
+CHECKSUM_SUFFIX = ".sha256"
+
+
+class ChecksumMismatchError(IOError):
+    """Raised when a transferred artifact does not match its stored checksum."""
+
+
+def file_sha256(path: str) -> str:
+    """SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_checksum(path: str) -> Optional[str]:
+    try:
+        with open(path + CHECKSUM_SUFFIX) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+def _write_checksum(path: str, checksum: str):
+    with open(path + CHECKSUM_SUFFIX, "w") as f:
+        f.write(checksum)
+
+
+def _verify(path: str, expected: Optional[str], name: str):
+    if expected is None:
+        return
+    actual = file_sha256(path)
+    if actual != expected:
+        raise ChecksumMismatchError(f"Checksum mismatch for {name}: expected {expected}, got {actual}")
+
+
+class ArtifactStore(ABC):
+    """Interface shared by the storage backends."""
+
+    @abstractmethod
+    def upload(self, local_path: str, name: str) -> str:
+        """Store a local file under ``name`` and return its checksum."""
+
+    @abstractmethod
+    def download(self, name: str, local_path: str) -> str:
+        """Stream ``name`` into ``local_path`` and return its verified checksum."""
+
+    @abstractmethod
+    def fetch(self, name: str) -> str:
+        """Return a verified local path for ``name``, downloading only if needed."""
+
+    @abstractmethod
+    def list(self, prefix: str) -> List[str]:
+        """Names of stored artifacts starting with ``prefix``."""
+
+    @abstractmethod
+    def delete(self, name: str):
+        """Remove ``name`` (and its checksum) if present."""
+
+
+class LocalArtifactStore(ArtifactStore):
+    """Artifacts stored as files under a root directory."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def upload(self, local_path: str, name: str) -> str:
+        target = self._path(name)
+        os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+        checksum = file_sha256(local_path)
+
+        tmp_path = target + ".tmp"
+        shutil.copyfile(local_path, tmp_path)
+        _verify(tmp_path, checksum, name)
+        os.replace(tmp_path, target)
+        _write_checksum(target, checksum)
+        return checksum
+
+    def download(self, name: str, local_path: str) -> str:
+        source = self.fetch(name)
+        if os.path.abspath(source) != os.path.abspath(local_path):
+            shutil.copyfile(source, local_path)
+        return file_sha256(local_path)
+
+    def fetch(self, name: str) -> str:
+        path = self._path(name)
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        _verify(path, _read_checksum(path), name)
+        return path
+
+    def list(self, prefix: str) -> List[str]:
+        directory = os.path.dirname(self._path(prefix))
+        if not os.path.isdir(directory):
+            return []
+        rel_dir = os.path.relpath(directory, self.root)
+        names = [
+            os.path.normpath(os.path.join(rel_dir, entry))
+            for entry in os.listdir(directory)
+            if not entry.endswith((CHECKSUM_SUFFIX, ".tmp"))
+        ]
+        return sorted(name for name in names if name.startswith(os.path.normpath(prefix)))
+
+    def delete(self, name: str):
+        for path in (self._path(name), self._path(name) + CHECKSUM_SUFFIX):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+class S3ArtifactStore(ArtifactStore):
+    """
+    Artifacts stored as S3 objects with a ``sha256`` metadata entry.
+
+    Downloads go to a local cache; a cached copy whose checksum matches the
+    object's metadata is reused without contacting S3 for the body.
+    """
+
+    def __init__(self, bucket: str, client=None, cache_dir: str = None):
+        self.bucket = bucket
+        self.client = client or boto3.client("s3")
+        self.cache_dir = os.path.join(cache_dir or ARTIFACT_CACHE_DIR, bucket)
+        self.transfer_config = TransferConfig(
+            multipart_threshold=CHUNK_SIZE,
+            multipart_chunksize=CHUNK_SIZE,
+        )
+
+    def _remote_checksum(self, name: str) -> Optional[str]:
+        head = self.client.head_object(Bucket=self.bucket, Key=name)
+        return head.get("Metadata", {}).get("sha256")
+
+    def upload(self, local_path: str, name: str) -> str:
+        checksum = file_sha256(local_path)
+        self.client.upload_file(
+            local_path,
+            self.bucket,
+            name,
+            ExtraArgs={"Metadata": {"sha256": checksum}},
+            Config=self.transfer_config,
+        )
+        logger.info(f"Uploaded {local_path} to s3://{self.bucket}/{name}")
+        return checksum
+
+    def download(self, name: str, local_path: str) -> str:
+        expected = self._remote_checksum(name)
+        os.makedirs(os.path.dirname(local_path) or ".", exist_ok=True)
+
+        tmp_path = local_path + ".tmp"
+        self.client.download_file(self.bucket, name, tmp_path, Config=self.transfer_config)
+        try:
+            _verify(tmp_path, expected, f"s3://{self.bucket}/{name}")
+        except ChecksumMismatchError:
+            os.remove(tmp_path)
+            raise
+        os.replace(tmp_path, local_path)
+
+        checksum = expected or file_sha256(local_path)
+        _write_checksum(local_path, checksum)
+        logger.info(f"Downloaded s3://{self.bucket}/{name} to {local_path}")
+        return checksum
+
+    def fetch(self, name: str) -> str:
+        local_path = os.path.join(self.cache_dir, name)
+        expected = self._remote_checksum(name)
+        if expected is not None and os.path.exists(local_path) and _read_checksum(local_path) == expected:
+            return local_path
+        self.download(name, local_path)
+        return local_path
+
+    def list(self, prefix: str) -> List[str]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        return sorted(
+            obj["Key"]
+            for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix)
+            for obj in page.get("Contents", [])
+        )
+
+    def delete(self, name: str):
+        self.client.delete_object(Bucket=self.bucket, Key=name)
+        local_path = os.path.join(self.cache_dir, name)
+        for path in (local_path, local_path + CHECKSUM_SUFFIX):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def get_artifact_store(uri: str) -> Tuple[ArtifactStore, str]:
+    """
+    Resolve an artifact URI to a store and the artifact name within it.
+
+    Args:
+        uri: ``s3://bucket/key`` or a filesystem path
+
+    Returns:
+        Tuple of (store, name)
+    """
+    if uri.startswith("s3://"):
+        bucket, key = uri[len("s3://"):].split("/", 1)
+        return S3ArtifactStore(bucket), key
+    root, name = os.path.split(uri)
+    return LocalArtifactStore(root or "."), name
@@ -0,0 +1,161 @@
+# backend/src/api/summary_utils.py
+
+"""
+Compact per-post summaries produced offline by
+``backend/llm_summary/summarize_blogs_api.py``.
+
+Summaries live in the ``post_summaries`` side table, one row per post with
+the content hash it was generated from, so the job can skip unchanged posts
+and resume after a crash. The API uses them as the LLM context and snippet of
+a result instead of the full post. The summaries are loaded together with
+the corpus (at warm-up and on every reload), and summaries of posts edited
+since they were written are ignored.
+"""
+
+import os
+import time
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import ForeignKey, select
+from sqlalchemy.orm import Mapped, Session, mapped_column
+
+from .bm25_utils import Base, Whole_Blogs, on_corpus_loaded
+from .content_utils import content_hash, post_text
+from .db_utils import get_engine
+# Import Logger
+from .logging_utils import get_logger
+
+load_dotenv()
+
+logger = get_logger("summary_utils")
+
+# Use stored summaries for explanations and snippets (1) or always the full post (0)
+POST_SUMMARIES = os.getenv("POST_SUMMARIES", "1") == "1"
+# Bump when the summary prompt changes so the job regenerates every summary
+SUMMARY_PROMPT_VERSION = "s1"
+SUMMARY_MAX_WORDS = 120
+
+
+class PostSummary(Base):
+    __tablename__ = "post_summaries"
+
+    post_id: Mapped[int] = mapped_column(ForeignKey("travel_blogs.id"), primary_key=True)
+    content_hash: Mapped[str]
+    prompt_version: Mapped[str]
+    model: Mapped[str]
+    summary: Mapped[str]
+    created_at: Mapped[float]
+
+    def __repr__(self) -> str:
+        return f"PostSummary(post_id={self.post_id!r}, prompt_version={self.prompt_version!r})"
+
+
+def build_summary_prompt(title: str, text: str, max_words: int = SUMMARY_MAX_WORDS) -> str:
+    prompt = f"""
+    Summarize the following travel blog post in at most {max_words} words.
+    Name the destination (town, region and country) as specifically as possible, then cover
+    what a traveler can do there, the atmosphere, the season or weather, and who it suits.
+    Write plain prose without headings or bullet points.
+
+    Title: {title}
+
+    Post: {text}
+    """
+    return prompt.strip()
+
+
+def new_summary(post_id: int, digest: str, model: str, summary: str) -> PostSummary:
+    return PostSummary(
+        post_id=post_id,
+        content_hash=digest,
+        prompt_version=SUMMARY_PROMPT_VERSION,
+        model=model,
+        summary=summary.strip(),
+        created_at=time.time(),
+    )
+
+
+# {page_url: summary} of the loaded corpus, rebuilt after every corpus (re)load
+_summaries: Dict[str, str] = {}
+
+
+def load_summaries(engine=None, posts: Optional[List[Dict]] = None) -> Dict[str, str]:
+    """
+    Read every current summary from the database.
+
+    A summary is current if it was made with SUMMARY_PROMPT_VERSION from the
+    post's present content; summaries of posts edited since are left out.
+
+    Args:
+        engine: SQLAlchemy engine; defaults to the shared engine
+        posts: Corpus posts (id, page_url, page_title, page_description,
+            content) to match against; read from the database if omitted
+
+    Returns:
+        {page_url: summary} of the current summaries
+    """
+    if engine is None:
+        engine = get_engine()
+
+    stmt = select(PostSummary.post_id, PostSummary.content_hash, PostSummary.summary).where(
+        PostSummary.prompt_version == SUMMARY_PROMPT_VERSION
+    )
+    with Session(engine) as session:
+        stored = {post_id: (digest, summary) for post_id, digest, summary in session.execute(stmt)}
+        if posts is None:
+            posts = session.execute(
+                select(
+                    Whole_Blogs.id,
+                    Whole_Blogs.page_url,
+                    Whole_Blogs.page_title,
+                    Whole_Blogs.page_description,
+                    Whole_Blogs.content,
+                )
+            ).mappings().all()
+
+    summaries = {}
+    stale = 0
+    for post in posts:
+        if post["id"] not in stored:
+            continue
+        digest, summary = stored[post["id"]]
+        if content_hash(post_text(post["page_title"], post["page_description"], post["content"])) == digest:
+            summaries[post["page_url"]] = summary
+        else:
+            stale += 1
+    if stale:
+        logger.warning(f"Ignoring {stale} post summaries made before the post was edited")
+    return summaries
+
+
+def refresh_summaries(posts: List[Dict]):
+    """
+    Rebuild the summary cache for a freshly loaded corpus.
+
+    Registered with bm25_utils.on_corpus_loaded, so it runs during warm-up
+    and every corpus reload rather than inside a search request. If the
+    summaries cannot be read (no table yet), lookups return None until the
+    next reload.
+    """
+    global _summaries
+
+    if not POST_SUMMARIES:
+        return
+    try:
+        summaries = load_summaries(posts=posts)
+        logger.info(f"Loaded {len(summaries)} post summaries")
+    except Exception as e:
+        logger.warning(f"Post summaries unavailable, using full posts: {e}")
+        summaries = {}
+    _summaries = summaries
+
+
+def get_summary(page_url: Optional[str]) -> Optional[str]:
+    """Stored summary of the post at ``page_url``, or None. Never touches the database."""
+    if not POST_SUMMARIES or not page_url:
+        return None
+    return _summaries.get(page_url)
+
+
+on_corpus_loaded(refresh_summaries)
@@ -0,0 +1,129 @@
+# backend/src/api/warmup_utils.py
+
+"""
+Startup warm-up and readiness of the search engines.
+
+Each engine registers a loader, and start() runs every loader at once on
+worker threads:
+
+    bm25     corpus query, BM25 build and post summaries
+    faiss    post query, embedding artifact download and FAISS build
+    encoder  one dummy query encode (the model itself loads on import)
+
+The loaders are single-flight (see bm25_utils and modern_bert_utils), so a
+request that arrives mid-warm-up waits for the running build instead of
+starting a second one.
+
+/livez only says the process is serving. /readyz is 200 once every engine in
+WARMUP_REQUIRED is ready, even if optional engines are still loading. Until
+then it returns 503 with each engine's state, load time and error.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+# Import Logger
+from .logging_utils import get_logger
+
+load_dotenv()
+
+logger = get_logger("warmup_utils")
+
+# Engines that must be ready to serve; the others may fail and leave the API degraded
+WARMUP_REQUIRED = [name.strip() for name in os.getenv("WARMUP_REQUIRED", "bm25").split(",") if name.strip()]
+
+PENDING = "pending"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+DISABLED = "disabled"
+
+
+class EngineWarmup:
+    """Load state of one engine."""
+
+    def __init__(self, name: str, load: Optional[Callable[[], object]], enabled: bool = True):
+        self.name = name
+        self.load = load
+        self.status = PENDING if enabled else DISABLED
+        self.duration_s = None
+        self.error = None
+
+    def run(self):
+        if self.status != PENDING:
+            return
+        self.status = LOADING
+        logger.info(f"Warming up {self.name}...")
+        start = time.perf_counter()
+        try:
+            self.load()
+        except Exception as e:
+            self.error = str(e)
+            self.status = FAILED
+            logger.error(f"✗ Failed to warm up {self.name}: {e}")
+        else:
+            self.status = READY
+            logger.info(f"✓ {self.name} ready in {time.perf_counter() - start:.2f}s")
+        finally:
+            self.duration_s = round(time.perf_counter() - start, 3)
+
+    def snapshot(self) -> Dict[str, object]:
+        snapshot = {"status": self.status, "duration_s": self.duration_s}
+        if self.error:
+            snapshot["error"] = self.error
+        return snapshot
+
+
+class Warmup:
+    """Engines loaded concurrently at startup."""
+
+    def __init__(self, required: List[str] = None):
+        self.required = WARMUP_REQUIRED if required is None else required
+        self.engines: Dict[str, EngineWarmup] = {}
+        self.duration_s = None
+        self._thread = None
+
+    def register(self, name: str, load: Optional[Callable[[], object]], enabled: bool = True):
+        """
+        Add an engine to warm up.
+
+        Args:
+            name: Engine name reported by /readyz
+            load: Builds the engine; must be idempotent and single-flight
+            enabled: False if the engine is unavailable (e.g. failed import)
+        """
+        self.engines[name] = EngineWarmup(name, load, enabled)
+
+    def run(self):
+        """Load every pending engine at once and wait for all of them."""
+        pending = [engine for engine in self.engines.values() if engine.status == PENDING]
+        start = time.perf_counter()
+        if pending:
+            with ThreadPoolExecutor(max_workers=len(pending), thread_name_prefix="warmup") as executor:
+                list(executor.map(EngineWarmup.run, pending))
+        self.duration_s = round(time.perf_counter() - start, 3)
+        logger.info(f"Warm-up finished in {self.duration_s:.2f}s", extra={"props": self.snapshot()})
+
+    def start(self) -> threading.Thread:
+        """Run the warm-up in the background so the server answers /livez meanwhile."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name="warmup", daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def ready(self) -> bool:
+        """Only the required engines count; optional ones may still be loading or have failed."""
+        return all(name in self.engines and self.engines[name].status == READY for name in self.required)
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "ready": self.ready(),
+            "required": self.required,
+            "duration_s": self.duration_s,
+            "engines": {name: engine.snapshot() for name, engine in self.engines.items()},
+        }
@@ -1,5 +1,7 @@
 import os
-from typing import Dict, Any
+import json
+import time
+from typing import Dict, Any, Iterator
 import logging
 import sys
 import uuid
@@ -41,11 +43,58 @@ apply_custom_css()
 
 # Backend config
 API_URL = os.getenv("API_URL", "https://dcorcoran-travel-recommender-api.hf.space")
+# Sent as X-Request-Deadline-Ms so the API gives up on LLM calls before our 60s timeout
+REQUEST_DEADLINE_MS = 55000
+# Result fields the app renders; full_content is left out of /search responses
+RESULT_FIELDS = "destination,country,lat,lon,score,distance,context_cues,snippets,why"
 
 
 def _api_search(payload: Dict[str, Any], request_id: str) -> Dict[str, Any]:
-    headers = {"X-Request-ID": request_id}
-    r = requests.post(f"{API_URL}/search", json=payload, headers=headers, timeout=60)
+    headers = {"X-Request-ID": request_id, "X-Request-Deadline-Ms": str(REQUEST_DEADLINE_MS)}
+    r = requests.post(f"{API_URL}/search", params={"fields": RESULT_FIELDS}, json=payload,
+                      headers=headers, timeout=60)
+    r.raise_for_status()
+    return r.json()
+
+
+def _api_search_stream(payload: Dict[str, Any], request_id: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield search events from /search/stream as they arrive.
+
+    Events are ``results`` first, then ``token`` / ``explanation`` events for
+    the top results and a final ``done``. APIs without the streaming endpoint
+    fall back to /search, replayed as the same events.
+    """
+    headers = {"X-Request-ID": request_id, "X-Request-Deadline-Ms": str(REQUEST_DEADLINE_MS)}
+    # (connect, read) timeout: the read timeout applies between events, not to the whole body
+    with requests.post(f"{API_URL}/search/stream", json=payload, headers=headers,
+                       stream=True, timeout=(5, 60)) as r:
+        if r.status_code == 404:
+            response = _api_search(payload, request_id)
+            yield {"event": "results", **{key: response.get(key) for key in ("query", "params", "results", "next_cursor")}}
+            details = response.get("explanation_details") or [{} for _ in response.get("explanations", [])]
+            for i, (text, detail) in enumerate(zip(response.get("explanations", []), details)):
+                yield {"event": "explanation", "index": i, "text": text, "cached": detail.get("cached", False)}
+            yield {"event": "done"}
+            return
+
+        r.raise_for_status()
+        for line in r.iter_lines():
+            if line:
+                yield json.loads(line)
+
+
+def _api_explanation_job(job_id: str) -> Dict[str, Any]:
+    """Current state of a background explanation job started with explanations_async."""
+    r = requests.get(f"{API_URL}/explanations/{job_id}", timeout=10)
+    r.raise_for_status()
+    return r.json()
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _api_stats() -> Dict[str, Any]:
+    """Corpus statistics, fetched at most once per /stats max-age rather than on every rerun."""
+    r = requests.get(f"{API_URL}/stats", timeout=10)
     r.raise_for_status()
     return r.json()
 
@@ -86,10 +135,28 @@ llm_selection = st.sidebar.pills(
     width = "stretch"
 )
 
+# Stream explanations with the search, or return results at once and
+# generate explanations in a background job polled by the Explanations tab
+delivery = st.sidebar.pills(
+    "Explanation Delivery:",
+    options = ["Stream", "Background"],
+    selection_mode = "single",
+    default = "Stream",
+    width = "stretch"
+)
+
+# Per-result token streaming costs one LLM call per explanation; left off,
+# the API explains the top results in a single batched call
+stream_tokens = st.sidebar.toggle(
+    "Stream explanation text as it is written",
+    value = False,
+    disabled = delivery != "Stream",
+)
+
 # Retrieval model choice dropdown
 model = st.sidebar.selectbox(
     "Retrieval Model",
-    ["BM25", "FAISS"],
+    ["BM25", "FAISS", "Hybrid", "BM25 + Rerank"],
     index=0,
 )
 
@@ -127,7 +194,9 @@ def payload() -> Dict[str, Any]:
     m = (
         "attribute+context"
         if model.startswith("attribute")
-        else ("bm25" if model.lower().startswith("bm25") else "faiss")
+        else ("bm25+rerank" if model == "BM25 + Rerank"
+              else "bm25" if model.lower().startswith("bm25")
+              else "hybrid" if model.lower().startswith("hybrid") else "faiss")
     )
     return {
         "query": q.strip(),
@@ -135,10 +204,31 @@ def payload() -> Dict[str, Any]:
             "model": m,
             "k": int(k)
         },
-        "llm_explanations": llm_selection == "Yes"
+        "llm_explanations": llm_selection == "Yes",
+        "stream_tokens": llm_selection == "Yes" and delivery == "Stream" and stream_tokens,
+        "explanations_async": delivery == "Background",
+        "paginate": True
     }
 
 
+def load_more_results() -> bool:
+    """Append the next page of the current ranking to the stored response; False if it expired."""
+    response = st.session_state["response"]
+    # Later pages are hydrated from the API's cached ranking; no new explanations
+    more = {**payload(), "cursor": response["next_cursor"], "llm_explanations": False, "explanations_async": False}
+    try:
+        page = _api_search(more, str(uuid.uuid4()))
+    except requests.HTTPError as e:
+        if e.response is not None and e.response.status_code == 410:
+            st.warning("These results have expired. Run the search again to see more.")
+            response["next_cursor"] = None
+            return False
+        raise
+    response["results"].extend(page["results"])
+    response["next_cursor"] = page.get("next_cursor")
+    return True
+
+
 def score_chip(label: str, value: str) -> str:
     return f'<span class="scorechip"><span class="label">{label}</span>{value}</span>'
 
@@ -199,21 +289,73 @@ def render_result_card(r: Dict[str, Any], i: int):
 if "response" not in st.session_state:
     st.session_state["response"] = None
 
-if run and q.strip():
+if run and q.strip() and delivery == "Background":
     request_id = str(uuid.uuid4())
     logger.info(f"User search initiated: query='{q}', request_id='{request_id}', retrieval={{'k': {k}, 'model': '{model}'}}")
-    
-    with st.spinner("Searching blogs and ranking destinations…"):
-        try:
+
+    # Results return at once; the Explanations tab polls for the explanations
+    try:
+        with st.spinner("Searching blogs and ranking destinations…"):
             st.session_state["response"] = _api_search(payload(), request_id)
+        logger.info(f"Search completed successfully: returned {len(st.session_state['response']['results'])} results")
+    except Exception as e:
+        logger.error(f"API call failed: {e}")
+        st.error(f"API call failed: {e}")
+        st.session_state["response"] = None
+
+elif run and q.strip():
+    request_id = str(uuid.uuid4())
+    logger.info(f"User search initiated: query='{q}', request_id='{request_id}', retrieval={{'k': {k}, 'model': '{model}'}}")
+    
+    # Results render here as soon as retrieval finishes; explanations fill in as they stream.
+    # The preview is cleared once the stream ends, so the cards are only drawn in the Results tab.
+    progress = st.status("Searching blogs and ranking destinations…", expanded=True)
+    try:
+        streamed = None
+        slots = []
+        with progress:
+            live = st.empty()
+        for event in _api_search_stream(payload(), request_id):
+            if event["event"] == "results":
+                streamed = {key: event[key] for key in ("query", "params", "results")}
+                streamed["next_cursor"] = event.get("next_cursor")
+                n_explained = min(3, len(streamed["results"])) if llm_selection == "Yes" else 0
+                streamed["explanations"] = [""] * n_explained
+                streamed["explanation_details"] = [{} for _ in range(n_explained)]
+
+                with live.container():
+                    for i, r in enumerate(streamed["results"], start=1):
+                        render_result_card(r, i)
+                    slots = [st.empty() for _ in range(n_explained)]
+                progress.update(label="Generating explanations…" if n_explained else "Search complete")
+                logger.info(f"Results received: {len(streamed['results'])} results")
+
+            elif event["event"] in ("token", "explanation"):
+                i = event["index"]
+                if event["event"] == "token":
+                    streamed["explanations"][i] += event["text"]
+                else:
+                    streamed["explanations"][i] = event["text"]
+                    streamed["explanation_details"][i] = event
+                slots[i].markdown(
+                    f"**{streamed['results'][i]['destination']}:** {streamed['explanations'][i]}"
+                )
+
+            elif event["event"] == "done":
+                progress.update(label="Search complete", state="complete", expanded=False)
 
-            # Logging Success
-            res_count = len(st.session_state["response"].get("results", []))
-            logger.info(f"Search completed successfully: returned {res_count} results")
-        except Exception as e:
-            logger.error(f"API call failed: {e}")
-            st.error(f"API call failed: {e}")
-            st.session_state["response"] = None
+        live.empty()
+        st.session_state["response"] = streamed
+
+        # Logging Success
+        res_count = len(streamed.get("results", [])) if streamed else 0
+        logger.info(f"Search completed successfully: returned {res_count} results")
+    except Exception as e:
+        logger.error(f"API call failed: {e}")
+        live.empty()
+        progress.update(label="Search failed", state="error")
+        st.error(f"API call failed: {e}")
+        st.session_state["response"] = None
 
 response = st.session_state["response"]
 # print(response.keys)
@@ -222,12 +364,15 @@ response = st.session_state["response"]
 if response and llm_selection == "Yes":
     results = response.get("results") if isinstance(response, dict) else response.results
     explanations = response.get("explanations") if isinstance(response, dict) else response.explanations
+    explanation_details = response.get("explanation_details", []) if isinstance(response, dict) else []
 elif response and llm_selection == "No":
     results = response.get("results") if isinstance(response, dict) else response.results
     explanations = []
+    explanation_details = []
 else:
     results = []
     explanations = []
+    explanation_details = []
 
 tabs = st.tabs(["Results", "Maps", "Explanations", "Database Stats", "About"])
 
@@ -267,6 +412,18 @@ with tabs[0]:
             )
             for i, r in enumerate(res_list, start=1):
                 render_result_card(r, i)
+
+            if response.get("next_cursor"):
+                if st.button("Show more results"):
+                    try:
+                        with st.spinner("Loading more results…"):
+                            loaded = load_more_results()
+                    except Exception as e:
+                        logger.error(f"Loading more results failed: {e}")
+                        st.error(f"Loading more results failed: {e}")
+                    else:
+                        if loaded:
+                            st.rerun()
         else:
             st.info("No results were returned.")
 
@@ -386,6 +543,30 @@ with tabs[2]:
         st.info("Run a search first to view result explanations.")
     elif results and llm_selection == "No":
         st.info("LLM explanation generation has not been selected for this search.")
+    elif response.get("explanations_job_id") and not response.get("explanations_done"):
+        # Background job: poll until every explanation is in (or the deadline passes)
+        st.markdown("Explanations for the top 3 destinations:")
+        slots = [st.empty() for _ in range(min(3, len(results)))]
+        deadline = time.monotonic() + REQUEST_DEADLINE_MS / 1000
+        job = {"status": "pending", "explanations": []}
+        while time.monotonic() < deadline:
+            try:
+                job = _api_explanation_job(response["explanations_job_id"])
+            except Exception as e:
+                logger.error(f"Explanation job poll failed: {e}")
+                st.error(f"Could not load explanations: {e}")
+                break
+            for i, slot in enumerate(slots):
+                explanation = job["explanations"][i] if i < len(job["explanations"]) else None
+                text = explanation["text"] if explanation else "_Generating…_"
+                slot.markdown(f"Destination: {results[i]['destination']}\n\n Explanation: {text}")
+            if job["status"] in ("done", "failed"):
+                break
+            time.sleep(1)
+
+        response["explanations"] = [e["text"] if e else "Explanation unavailable." for e in job["explanations"]]
+        response["explanation_details"] = [e or {} for e in job["explanations"]]
+        response["explanations_done"] = True
     else:
         st.markdown("Explanations for the top 3 destinations:")
 
@@ -393,6 +574,8 @@ with tabs[2]:
         for i in range(0,3):
             st.markdown(f"Destination: {df['destination'][i]}")
             st.markdown(f" Explanation: {explanations[i]}")
+            if i < len(explanation_details) and explanation_details[i].get("cached"):
+                st.caption("Served from the explanation cache")
 
 # Database Stats tab 
 with tabs[3]:  # Database Stats tab
@@ -400,7 +583,7 @@ with tabs[3]:  # Database Stats tab
     
     try:
         # Fetch database stats from API
-        db_stats = requests.get(f"{API_URL}/stats", timeout=10).json()
+        db_stats = _api_stats()
         
         # Overview metrics
         col1, col2, col3, col4 = st.columns(4)
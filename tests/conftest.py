@@ -1,15 +1,59 @@
-import json
-import pytest
-from backend.src.api.bm25_utils import search_bm25
-from backend.src.api.modern_bert_utils import search_modernbert
-
-
-@pytest.fixture
-def queries():
-    with open("backend/data/queries.json", "r") as f:
-        return json.load(f)["queries"]
-
-
-@pytest.fixture
-def run_bm25():
-    return lambda q: search_bm25(q, top_n=5)
+import inspect
+import json
+from types import SimpleNamespace
+
+import pytest
+from backend.src.api.bm25_utils import search_bm25
+from backend.src.api.modern_bert_utils import search_modernbert
+
+
+@pytest.fixture
+def queries():
+    with open("backend/data/queries.json", "r") as f:
+        return json.load(f)["queries"]
+
+
+@pytest.fixture
+def run_bm25():
+    return lambda q: search_bm25(q, top_n=5)
+
+
+@pytest.fixture
+def llm(mocker):
+    """llm_utils with a token, a fresh circuit breaker and no semaphore or explanation cache."""
+    from backend.src.api import llm_utils
+    from backend.src.api.resilience_utils import CircuitBreaker
+
+    mocker.patch.object(llm_utils, "hf_token", "token")
+    mocker.patch.object(llm_utils, "_llm_semaphore", None)
+    mocker.patch.object(llm_utils, "_breaker", CircuitBreaker("llm", 5, 30))
+    mocker.patch.object(llm_utils, "get_explanation_cache", return_value = None)
+    return llm_utils
+
+
+@pytest.fixture
+def llm_reply(mocker, llm):
+    """
+    Install a fake async LLM client and return the list of prompts it receives.
+
+    ``reply`` is the completion text, a function of the prompt returning the
+    text (or an awaitable of it), or an exception to raise.
+    """
+    def install(reply):
+        calls = []
+
+        async def create(**kwargs):
+            prompt = kwargs["messages"][0]["content"]
+            calls.append(prompt)
+            if isinstance(reply, BaseException):
+                raise reply
+            content = reply(prompt) if callable(reply) else reply
+            if inspect.isawaitable(content):
+                content = await content
+            return SimpleNamespace(choices = [SimpleNamespace(message = {"content": content})])
+
+        fake_client = SimpleNamespace(chat = SimpleNamespace(completions = SimpleNamespace(create = create)))
+        mocker.patch.object(llm, "async_client", fake_client)
+        return calls
+
+    return install
@@ -0,0 +1,160 @@
+"""
+Local stand-in for the LLM API, used to test deadlines, the circuit breaker
+and hedging without a network.
+
+Serves an OpenAI-compatible POST /v1/chat/completions (plain and streamed)
+with configurable latency and failures. Point the API at it with
+LLM_BASE_URL=http://127.0.0.1:<port>.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+
+from aiohttp import web
+
+
+class LLMStubServer:
+    """
+    Chat completion stub running on its own event loop in a background thread.
+
+    Args:
+        latency_s: Delay before each response (and between streamed chunks)
+        failure_rate: Fraction of requests answered with HTTP 500
+        reply: Completion text returned for every request
+        port: Port to bind on 127.0.0.1; 0 picks a free one
+    """
+
+    def __init__(self, latency_s = 0.0, failure_rate = 0.0, reply = "Stub explanation.", port = 0):
+        self.latency_s = latency_s
+        self.failure_rate = failure_rate
+        self.reply = reply
+        self.port = port
+        self.fail_next = 0  # force this many upcoming requests to fail
+        self.requests = 0
+        self._rng = random.Random(0)
+        self._loop = None
+        self._runner = None
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def _should_fail(self):
+        if self.fail_next > 0:
+            self.fail_next -= 1
+            return True
+        return self._rng.random() < self.failure_rate
+
+    async def _chat_completions(self, request):
+        self.requests += 1
+        body = await request.json()
+        await asyncio.sleep(self.latency_s)
+        if self._should_fail():
+            return web.json_response({"error": "stub failure"}, status = 500)
+
+        created = int(time.time())
+        if not body.get("stream"):
+            return web.json_response({
+                "id": "stub",
+                "object": "chat.completion",
+                "created": created,
+                "model": body.get("model", "stub"),
+                "system_fingerprint": "stub",
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": self.reply},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            })
+
+        response = web.StreamResponse(headers = {"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for word in self.reply.split(" "):
+            chunk = {
+                "id": "stub",
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": body.get("model", "stub"),
+                "system_fingerprint": "stub",
+                "choices": [{"index": 0, "delta": {"role": "assistant", "content": word + " "}}],
+            }
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            await asyncio.sleep(self.latency_s / 10)
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    async def _start(self):
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self._chat_completions)
+        app.router.add_post("/chat/completions", self._chat_completions)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    def start(self):
+        """Start serving in a background thread; returns once the port is bound."""
+        self._loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self._start())
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target = run, daemon = True)
+        self._thread.start()
+        ready.wait(timeout = 10)
+        return self
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result(timeout = 10)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout = 10)
+
+
+# --------------------------
+# ----- MAIN CLI ENTRY -----
+# --------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Run a local LLM API stub")
+
+    parser.add_argument("--port",
+                        type = int,
+                        default = 8089,
+                        help = "Port to listen on")
+
+    parser.add_argument("--latency",
+                        type = float,
+                        default = 0.5,
+                        help = "Seconds before each response")
+
+    parser.add_argument("--failure-rate",
+                        type = float,
+                        default = 0.0,
+                        help = "Fraction of requests that return HTTP 500")
+
+    args = parser.parse_args()
+
+    server = LLMStubServer(latency_s = args.latency, failure_rate = args.failure_rate, port = args.port).start()
+    print(f"LLM stub listening on {server.url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.stop()
+
+"""
+HOW TO RUN:
+python -m tests.llm_stub_server --port 8089 --latency 2 --failure-rate 0.3
+LLM_BASE_URL=http://127.0.0.1:8089 HF_TOKEN=stub uvicorn backend.src.api.main:app
+"""
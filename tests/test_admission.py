@@ -0,0 +1,129 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.src.api.admission_utils import AdmissionLane, Overloaded
+
+
+def test_lane_queues_then_sheds():
+    async def run():
+        lane = AdmissionLane("test", concurrency = 1, max_queue = 1, max_wait_s = 0.05)
+        release = asyncio.Event()
+
+        async def hold():
+            async with lane.admit():
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(lane.admit().__aenter__())
+        await asyncio.sleep(0)
+
+        with pytest.raises(Overloaded) as full:
+            async with lane.admit():
+                pass
+        with pytest.raises(Overloaded) as timed_out:
+            await waiter
+
+        release.set()
+        await holder
+        return lane, full.value, timed_out.value
+
+    lane, full, timed_out = asyncio.run(run())
+
+    assert (full.status_code, timed_out.status_code) == (429, 503)
+    assert full.retry_after_s >= 1
+    assert lane.snapshot() == {
+        "in_flight": 0, "queued": 0, "concurrency": 1, "max_queue": 1, "max_wait_s": 0.05,
+        "admitted": 1, "shed_queue_full": 1, "shed_timeout": 1,
+    }
+
+
+def test_released_slot_goes_to_oldest_waiter():
+    async def run():
+        lane = AdmissionLane("test", concurrency = 1, max_queue = 4, max_wait_s = 1.0)
+        order = []
+
+        async def work(name):
+            async with lane.admit():
+                order.append(name)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(work(name) for name in "abc"))
+        return lane, order
+
+    lane, order = asyncio.run(run())
+
+    assert order == ["a", "b", "c"]
+    assert lane.snapshot()["in_flight"] == 0
+    assert lane.admitted == 3
+
+
+def _results(req):
+    from backend.src.api.main import Result
+
+    return [Result(destination = "Kyoto", country = "Japan", full_content = "post", why = {"page_url": "https://example.com/0"})]
+
+
+@pytest.fixture
+def client(mocker):
+    from backend.src.api import main
+
+    lanes = {
+        "bm25": AdmissionLane("bm25", concurrency = 4, max_queue = 4, max_wait_s = 1.0),
+        "encode": AdmissionLane("encode", concurrency = 1, max_queue = 0, max_wait_s = 1.0),
+        "llm": AdmissionLane("llm", concurrency = 0, max_queue = 0, max_wait_s = 1.0),
+    }
+    mocker.patch.dict(main.LANES, lanes)
+    with TestClient(main.app) as client:
+        yield client
+
+
+def test_saturated_encode_lane_sheds_without_blocking_bm25(client, mocker):
+    from backend.src.api import main
+
+    release = threading.Event()
+
+    def slow_faiss(req):
+        release.wait(5)
+        return _results(req)
+
+    mocker.patch.dict(main.SEARCH_HANDLERS, {"bm25": _results, "faiss": slow_faiss})
+    faiss_body = {"query": "temples", "retrieval": {"model": "faiss", "k": 1}}
+    busy = threading.Thread(target = client.post, args = ("/search",), kwargs = {"json": faiss_body})
+    busy.start()
+    while main.LANES["encode"].snapshot()["in_flight"] == 0:
+        time.sleep(0.01)
+
+    try:
+        start = time.perf_counter()
+        cheap = client.post("/search", json = {"query": "temples", "retrieval": {"model": "bm25", "k": 1}})
+        bm25_s = time.perf_counter() - start
+        shed = client.post("/search", json = faiss_body)
+    finally:
+        release.set()
+        busy.join()
+
+    assert cheap.status_code == 200
+    assert bm25_s < 1.0
+    assert shed.status_code == 429
+    assert int(shed.headers["Retry-After"]) >= 1
+    assert client.get("/admission").json()["encode"]["shed_queue_full"] == 1
+
+
+def test_saturated_llm_lane_returns_results_without_explanations(client, mocker):
+    from backend.src.api import main
+
+    mocker.patch.dict(main.SEARCH_HANDLERS, {"bm25": _results})
+    generate = mocker.patch.object(main, "generate_explanations")
+
+    response = client.post("/search", json = {
+        "query": "temples", "retrieval": {"model": "bm25", "k": 1}, "llm_explanations": True,
+    })
+
+    assert response.status_code == 200
+    assert response.json()["explanations"] == [main.UNAVAILABLE_MESSAGE]
+    generate.assert_not_called()
@@ -0,0 +1,89 @@
+import os
+
+import boto3
+import pytest
+import torch
+
+from backend.src.api.storage_utils import (
+    ArtifactStore,
+    ChecksumMismatchError,
+    LocalArtifactStore,
+    S3ArtifactStore,
+    file_sha256,
+)
+
+moto = pytest.importorskip("moto")
+
+BUCKET = "test-artifacts"
+
+
+@pytest.fixture
+def artifact(tmp_path):
+    path = tmp_path / "emb.pt"
+    torch.save({1: torch.ones(8), 2: torch.zeros(8)}, path)
+    return str(path)
+
+
+@pytest.fixture
+def s3_store(tmp_path, monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+
+    with moto.mock_aws():
+        client = boto3.client("s3", region_name = "us-east-1")
+        client.create_bucket(Bucket = BUCKET)
+        yield S3ArtifactStore(BUCKET, client = client, cache_dir = str(tmp_path / "cache"))
+
+
+def test_s3_round_trip_verifies_checksum(s3_store, artifact, tmp_path):
+    checksum = s3_store.upload(artifact, "emb/emb.pt")
+
+    local = s3_store.fetch("emb/emb.pt")
+
+    assert file_sha256(local) == checksum
+    assert torch.equal(torch.load(local, weights_only = True)[1], torch.ones(8))
+    assert s3_store.list("emb/") == ["emb/emb.pt"]
+
+
+def test_s3_fetch_reuses_verified_cache(s3_store, artifact, mocker):
+    s3_store.upload(artifact, "emb.pt")
+    s3_store.fetch("emb.pt")
+
+    spy = mocker.spy(s3_store.client, "download_file")
+    s3_store.fetch("emb.pt")
+
+    assert spy.call_count == 0
+
+
+def test_s3_corrupt_download_is_rejected(s3_store, artifact):
+    s3_store.client.upload_file(
+        artifact, BUCKET, "emb.pt", ExtraArgs = {"Metadata": {"sha256": "0" * 64}}
+    )
+
+    with pytest.raises(ChecksumMismatchError):
+        s3_store.fetch("emb.pt")
+
+
+def test_local_store_detects_tampering(tmp_path, artifact):
+    store = LocalArtifactStore(str(tmp_path / "store"))
+    store.upload(artifact, "emb.pt")
+    assert sorted(store.list("emb")) == ["emb.pt"]
+
+    with open(store.fetch("emb.pt"), "ab") as f:
+        f.write(b"corrupt")
+
+    with pytest.raises(ChecksumMismatchError):
+        store.fetch("emb.pt")
+
+    store.delete("emb.pt")
+    assert not os.path.exists(tmp_path / "store" / "emb.pt")
+
+
+def test_incomplete_backend_fails_at_construction():
+    class UploadOnlyStore(ArtifactStore):
+        def upload(self, local_path, name):
+            return ""
+
+    with pytest.raises(TypeError):
+        UploadOnlyStore()
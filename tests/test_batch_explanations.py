@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+
+ITEMS = [
+    ("Kyoto, Japan", "Temples everywhere.", "https://example.com/kyoto"),
+    ("Nara, Japan", "Deer and temples.", "https://example.com/nara"),
+    ("Hakone, Japan", "Hot springs.", "https://example.com/hakone"),
+]
+
+
+def test_parse_batch_explanations_tolerates_code_fences(llm):
+    text = 'Here you go:\n```json\n["Kyoto fits.", "Nara fits."]\n```'
+
+    assert llm.parse_batch_explanations(text, 2) == ["Kyoto fits.", "Nara fits."]
+    with pytest.raises(ValueError):
+        llm.parse_batch_explanations('["only one"]', 2)
+    with pytest.raises(ValueError):
+        llm.parse_batch_explanations("no json here", 2)
+
+
+def test_batch_prompt_numbers_every_post_once(llm, mocker):
+    mocker.patch.object(llm, "select_context", side_effect = lambda q, text, budget = None: text)
+
+    prompt = llm.build_batch_prompt("temples", [(d, t) for d, t, _ in ITEMS])
+
+    assert prompt.count("temples'") == 1  # query appears once
+    assert "[1] Destination: Kyoto, Japan" in prompt
+    assert "[3] Destination: Hakone, Japan" in prompt
+    assert "JSON array of 3 strings" in prompt
+
+
+def test_batch_uses_one_call(llm, llm_reply):
+    calls = llm_reply('["Kyoto fits.", "Nara fits.", "Hakone fits."]')
+
+    outcomes = asyncio.run(llm.explain_batch_cached("temples", ITEMS))
+
+    assert len(calls) == 1
+    assert outcomes == [("Kyoto fits.", False), ("Nara fits.", False), ("Hakone fits.", False)]
+
+
+def test_unparseable_batch_falls_back_to_per_result_calls(llm, llm_reply):
+    calls = llm_reply(lambda prompt: "Sorry, no JSON." if "JSON array" in prompt else "Single.")
+
+    outcomes = asyncio.run(llm.explain_batch_cached("temples", ITEMS))
+
+    assert len(calls) == 1 + len(ITEMS)
+    assert outcomes == [("Single.", False)] * 3
+
+
+def test_cached_results_are_left_out_of_the_batch(llm, llm_reply, mocker):
+    mocker.patch.object(
+        llm, "lookup_explanation",
+        side_effect = lambda query, page_url: "Cached Nara." if page_url.endswith("nara") else None,
+    )
+    calls = llm_reply('["Kyoto fits.", "Hakone fits."]')
+
+    outcomes = asyncio.run(llm.explain_batch_cached("temples", ITEMS))
+
+    assert len(calls) == 1
+    assert "Nara" not in calls[0]
+    assert outcomes == [("Kyoto fits.", False), ("Cached Nara.", True), ("Hakone fits.", False)]
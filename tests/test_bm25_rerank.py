@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+import torch
+
+
+@pytest.fixture
+def mock_rerank_state(mocker):
+    # Rows 0..2 hold unit vectors; post 3 has no embedding yet
+    vectors = SimpleNamespace(gather = lambda ids: np.eye(3, 4, dtype = "float32")[ids])
+
+    mocker.patch(
+        "backend.src.api.modern_bert_utils._load_posts_and_index",
+        return_value = ([], None, vectors),
+    )
+    mocker.patch(
+        "backend.src.api.modern_bert_utils._row_by_post_id",
+        {10: 0, 11: 1, 12: 2},
+    )
+    mocker.patch(
+        "backend.src.api.modern_bert_utils.embed_texts",
+        return_value = torch.tensor([[0.0, 0.6, 0.8, 0.0]]),
+    )
+
+
+def test_rerank_orders_by_similarity(mock_rerank_state):
+    from backend.src.api.modern_bert_utils import rerank_candidates
+
+    candidates = [{"id": 10, "score": 9.0}, {"id": 11, "score": 5.0}, {"id": 12, "score": 1.0}]
+    results = rerank_candidates("query", candidates, top_k = 3)
+
+    assert [r["id"] for r in results] == [12, 11, 10]
+    assert results[0]["similarity"] == pytest.approx(0.8)
+    assert results[0]["distance"] == pytest.approx(0.4)
+    assert results[0]["score"] == 1.0
+
+
+def test_rerank_keeps_unembedded_candidates_last(mock_rerank_state):
+    from backend.src.api.modern_bert_utils import rerank_candidates
+
+    candidates = [{"id": 3, "score": 9.0}, {"id": 10, "score": 5.0}, {"id": 11, "score": 1.0}]
+    results = rerank_candidates("query", candidates, top_k = 3)
+
+    assert [r["id"] for r in results] == [11, 10, 3]
+    assert "similarity" not in results[-1]
+
+
+def test_rerank_truncates_and_handles_empty(mock_rerank_state):
+    from backend.src.api.modern_bert_utils import rerank_candidates
+
+    candidates = [{"id": 10}, {"id": 11}, {"id": 12}]
+    assert len(rerank_candidates("query", candidates, top_k = 1)) == 1
+    assert rerank_candidates("", candidates, top_k = 3) == []
+    assert rerank_candidates("query", [], top_k = 3) == []
+
+
+def test_rerank_failure_falls_back_to_bm25_order(mocker):
+    from backend.src.api import main
+
+    candidates = [{"id": i, "destination": f"Town{i}", "score": 10.0 - i, "full_content": ""} for i in range(5)]
+    mocker.patch.object(main, "BM25_AVAILABLE", True)
+    mocker.patch.object(main, "FAISS_AVAILABLE", True)
+    mocker.patch.object(main, "search_bm25", return_value = candidates)
+    mocker.patch.object(main, "rerank_candidates", side_effect = RuntimeError("vector store gone"))
+    mocker.patch.object(main, "get_summary", return_value = None)
+
+    req = main.SearchRequest(query = "temples", retrieval = {"model": "bm25+rerank", "k": 3, "rerank_n": 5})
+    results = main.bm25_rerank_search(req)
+
+    assert [r.destination for r in results] == ["Town0", "Town1", "Town2"]
+    assert [r.why["bm25_rank"] for r in results] == [1, 2, 3]
+    assert all(r.why["rerank_ms"] == 0.0 for r in results)
@@ -0,0 +1,49 @@
+import pytest
+import torch
+
+from backend.src.api.chunk_utils import segment_max, token_windows
+from backend.src.api.embedding_utils import load_chunk_artifact, write_chunk_artifact
+
+
+def test_token_windows_overlap_and_cover_tail():
+    windows = token_windows(list(range(10)), size = 4, overlap = 1)
+
+    assert windows[0] == [0, 1, 2, 3]
+    assert windows[1] == [3, 4, 5, 6]
+    # Last window is aligned to the end so token 9 is covered
+    assert windows[-1] == [6, 7, 8, 9]
+    assert all(len(w) == 4 for w in windows)
+
+
+def test_token_windows_short_sequence_is_one_window():
+    assert token_windows([1, 2, 3], size = 8, overlap = 2) == [[1, 2, 3]]
+
+    with pytest.raises(ValueError):
+        token_windows([1, 2, 3], size = 4, overlap = 4)
+
+
+def test_segment_max_keeps_best_chunk_per_post():
+    scores = torch.tensor([0.2, 0.9, 0.5, 0.7, 0.1])
+    post_ids = torch.tensor([10, 11, 10, 12, 11])
+
+    posts, best = segment_max(scores, post_ids)
+
+    assert posts.tolist() == [11, 12, 10]
+    assert best.tolist() == pytest.approx([0.9, 0.7, 0.5])
+
+
+def test_chunk_artifact_round_trip_stores_fp16(tmp_path):
+    path = str(tmp_path / "chunks.pt")
+    embeddings = torch.randn(5, 8)
+    post_ids = torch.tensor([1, 1, 2, 3, 3])
+    write_chunk_artifact(path, embeddings, post_ids, {1: "a", 2: "b", 3: "c"})
+
+    loaded, loaded_ids, hashes = load_chunk_artifact(path)
+
+    assert loaded.dtype == torch.float16
+    assert torch.allclose(loaded.float(), embeddings, atol = 1e-2)
+    assert loaded_ids.tolist() == [1, 1, 2, 3, 3]
+    assert hashes == {1: "a", 2: "b", 3: "c"}
+
+    with pytest.raises(ValueError):
+        write_chunk_artifact(path, embeddings, post_ids[:2], {})
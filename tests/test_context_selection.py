@@ -0,0 +1,51 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from backend.src.api.context_utils import estimate_tokens, score_passages, select_context, split_passages
+
+
+@pytest.fixture
+def bm25():
+    return SimpleNamespace(idf = {"temple": 2.0, "ramen": 1.5, "kyoto": 0.5}, k1 = 1.5, b = 0.75)
+
+
+def test_split_passages_merges_sentences_up_to_word_limit():
+    text = "One two three. Four five. Six seven eight nine."
+
+    assert split_passages(text, max_words = 5) == ["One two three. Four five.", "Six seven eight nine."]
+    # Unpunctuated text is cut into max_words pieces
+    assert split_passages("a b c d e f g", max_words = 3) == ["a b c", "d e f", "g"]
+
+
+def test_score_passages_matches_bm25_formula(bm25):
+    passages = ["temple temple garden", "ramen shop", "nothing here"]
+
+    scores = score_passages("Kyoto temple ramen", passages, bm25)
+
+    lengths = np.array([3, 2, 2])
+    norm = 1.5 * (1 - 0.75 + 0.75 * lengths / lengths.mean())
+    expected_temple = 2.0 * 2 * 2.5 / (2 + norm[0])
+    expected_ramen = 1.5 * 1 * 2.5 / (1 + norm[1])
+    assert scores == pytest.approx([expected_temple, expected_ramen, 0.0])
+
+
+def test_select_context_keeps_opening_and_relevant_passages(bm25, mocker):
+    mocker.patch("backend.src.api.context_utils.CONTEXT_PASSAGE_WORDS", 8)
+    opening = "Welcome to Kyoto in spring."
+    filler = " ".join(f"Filler sentence number {i} about trains." for i in range(40))
+    relevant = "The best temple visit was at dawn."
+    text = f"{opening} {filler} {relevant}"
+
+    context = select_context("temple", text, budget = 40, bm25 = bm25)
+
+    assert context.startswith("Welcome to Kyoto")
+    assert "temple visit" in context
+    assert estimate_tokens(context) <= 40 + 5  # separators
+    assert estimate_tokens(context) < estimate_tokens(text)
+
+
+def test_select_context_returns_short_posts_unchanged(bm25):
+    assert select_context("temple", "A short post.", budget = 100, bm25 = bm25) == "A short post."
+    assert select_context("temple", "Any post.", budget = 0, bm25 = bm25) == "Any post."
@@ -0,0 +1,112 @@
+import os
+
+import pytest
+import torch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from backend.bert import embed_blogs
+from backend.src.api.bm25_utils import Base, Whole_Blogs
+from backend.src.api.content_utils import content_hash, post_text
+from backend.src.api.embedding_utils import load_embedding_artifact
+
+
+@pytest.fixture
+def corpus(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'blogs.sqlite'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        for i in range(1, 11):
+            session.add(Whole_Blogs(
+                id = i, blog_url = "https://blog.com", page_url = f"https://blog.com/p{i}",
+                page_title = f"post {i}", page_description = "about", page_author = "author",
+                location_name = "Kyoto, Japan", latitude = 0.0, longitude = 0.0,
+                content = "word " * (i * 7),
+            ))
+        session.commit()
+    monkeypatch.setenv("DATABASE_URL", url)
+    return engine
+
+
+@pytest.fixture
+def stub_encoder(mocker):
+    """Encode each post as a vector filled with its id; record what was embedded."""
+    embedded = []
+
+    def encode(batch):
+        ids, input_ids = batch
+        embedded.extend(ids)
+        vectors = torch.stack([torch.full((4,), float(blog_id)) for blog_id in ids])
+        return ids, vectors, sum(len(tokens) for tokens in input_ids)
+
+    mocker.patch.object(embed_blogs, "embed_token_batch", side_effect = encode)
+    return embedded
+
+
+def test_bucket_batches_group_similar_lengths():
+    posts = [(i, "a " * n) for i, n in enumerate([40, 3, 25, 1, 30, 2, 35, 4])]
+
+    batches = list(embed_blogs.bucket_batches(posts, batch_size = 3, window_batches = 2))
+
+    # Posts 0-5 form one window sorted by length; 6 and 7 are the leftover window
+    assert [ids for ids, _ in batches] == [[3, 5, 1], [2, 4, 0], [7, 6]]
+    assert [len(ids) for ids, _ in batches] == [3, 3, 2]
+    for _, input_ids in batches:
+        lengths = [len(tokens) for tokens in input_ids]
+        assert lengths == sorted(lengths)
+
+
+def test_iter_posts_streams_in_id_order(corpus):
+    hashes = {}
+
+    posts = list(embed_blogs.iter_posts(corpus, skip_ids = {2, 5}, hashes = hashes, chunk_size = 3))
+
+    assert [blog_id for blog_id, _ in posts] == [1, 3, 4, 6, 7, 8, 9, 10]
+    assert sorted(hashes) == list(range(1, 11))
+
+
+def test_write_shard_is_atomic(tmp_path, mocker):
+    embed_blogs.write_shard(str(tmp_path), 0, {1: torch.ones(4)}, {1: "h1"})
+    mocker.patch.object(embed_blogs.torch, "save", side_effect = OSError("disk full"))
+
+    with pytest.raises(OSError):
+        embed_blogs.write_shard(str(tmp_path), 1, {2: torch.ones(4)}, {2: "h2"})
+
+    # The failed write never shows up as a shard
+    assert [os.path.basename(p) for p in embed_blogs._shard_paths(str(tmp_path))] == ["shard_00000.pt"]
+    assert embed_blogs.load_completed_hashes(str(tmp_path)) == {1: "h1"}
+
+
+def test_resume_skips_completed_ids(corpus, stub_encoder, tmp_path):
+    shard_dir = str(tmp_path / "shards")
+
+    first = embed_blogs.embed_all_blogs(batch_size = 2, shard_dir = shard_dir, shard_size = 4, upload = False)
+    assert sorted(first) == list(range(1, 11))
+    assert len(embed_blogs._shard_paths(shard_dir)) == 3
+
+    stub_encoder.clear()
+    second = embed_blogs.embed_all_blogs(batch_size = 2, shard_dir = shard_dir, shard_size = 4, upload = False)
+
+    assert stub_encoder == []
+    assert sorted(second) == list(range(1, 11))
+    assert torch.equal(second[7], torch.full((4,), 7.0))
+
+
+def test_rerun_reembeds_posts_edited_since_sharding(corpus, stub_encoder, tmp_path):
+    shard_dir = str(tmp_path / "shards")
+    path = str(tmp_path / "emb.pt")
+    embed_blogs.embed_all_blogs(batch_size = 2, shard_dir = shard_dir, shard_size = 4, embeddings_path = path)
+
+    with Session(corpus) as session:
+        post = session.get(Whole_Blogs, 3)
+        post.content = "rewritten"
+        new_hash = content_hash(post_text(post.page_title, post.page_description, post.content))
+        session.commit()
+    stub_encoder.clear()
+    embed_blogs.embed_all_blogs(batch_size = 2, shard_dir = shard_dir, shard_size = 4, embeddings_path = path)
+
+    assert stub_encoder == [3]
+    _, hashes = load_embedding_artifact(path)
+    assert hashes[3] == new_hash
+    assert len(hashes) == 10
@@ -0,0 +1,51 @@
+import torch
+
+from backend.src.api.content_utils import content_hash
+from backend.src.api.embedding_utils import (
+    append_delta,
+    list_deltas,
+    load_embedding_artifact,
+    write_base_artifact,
+)
+
+
+def test_deltas_apply_in_order(tmp_path):
+    path = str(tmp_path / "emb.pt")
+    write_base_artifact(path, {1: torch.ones(4), 2: torch.zeros(4)}, {1: "a", 2: "b"})
+
+    append_delta(path, {3: torch.full((4,), 3.0)}, {3: "c"}, deleted = [])
+    append_delta(path, {1: torch.full((4,), 7.0)}, {1: "a2"}, deleted = [2])
+
+    embeddings, hashes = load_embedding_artifact(path)
+
+    assert sorted(embeddings) == [1, 3]
+    assert hashes == {1: "a2", 3: "c"}
+    assert torch.equal(embeddings[1], torch.full((4,), 7.0))
+
+
+def test_base_rewrite_drops_deltas(tmp_path):
+    path = str(tmp_path / "emb.pt")
+    write_base_artifact(path, {1: torch.ones(4)}, {1: "a"})
+    append_delta(path, {2: torch.ones(4)}, {2: "b"}, deleted = [])
+    assert len(list_deltas(path)) == 1
+
+    write_base_artifact(path, {1: torch.ones(4)}, {1: "a"})
+
+    assert list_deltas(path) == []
+    embeddings, _ = load_embedding_artifact(path)
+    assert sorted(embeddings) == [1]
+
+
+def test_legacy_artifact_has_no_hashes(tmp_path):
+    path = str(tmp_path / "emb.pt")
+    torch.save({1: torch.ones(4)}, path)
+
+    embeddings, hashes = load_embedding_artifact(path)
+
+    assert sorted(embeddings) == [1]
+    assert hashes == {}
+
+
+def test_content_hash_is_stable():
+    assert content_hash("Kyoto temples") == content_hash("Kyoto temples")
+    assert content_hash("Kyoto temples") != content_hash("Kyoto shrines")
@@ -0,0 +1,111 @@
+import asyncio
+import threading
+
+import pytest
+
+from backend.src.api.cache_utils import ExplanationCache, SQLiteExplanationCache, explanation_key, normalize_query
+
+
+def test_key_normalizes_query_and_tracks_prompt_version():
+    key = explanation_key("  Temples in   KYOTO ", "https://example.com/p1", "v1")
+
+    assert normalize_query("  Temples in   KYOTO ") == "temples in kyoto"
+    assert key == explanation_key("temples in kyoto", "https://example.com/p1", "v1")
+    assert key != explanation_key("temples in kyoto", "https://example.com/p2", "v1")
+    assert key != explanation_key("temples in kyoto", "https://example.com/p1", "v2")
+
+
+def test_sqlite_cache_persists_across_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    SQLiteExplanationCache(path).set("k", "Kyoto has temples.")
+
+    assert SQLiteExplanationCache(path).get("k") == "Kyoto has temples."
+    assert SQLiteExplanationCache(path).get("missing") is None
+
+
+def test_sqlite_cache_expires_entries(tmp_path, mocker):
+    cache = SQLiteExplanationCache(str(tmp_path / "cache.sqlite"), ttl_s = 10)
+    clock = mocker.patch("backend.src.api.cache_utils.time.time", return_value = 1000.0)
+    cache.set("k", "text")
+
+    clock.return_value = 1009.0
+    assert cache.get("k") == "text"
+    clock.return_value = 1011.0
+    assert cache.get("k") is None
+    assert len(cache) == 0
+
+
+def test_sqlite_cache_evicts_least_recently_used(tmp_path, mocker):
+    mocker.patch("backend.src.api.cache_utils.EVICT_EVERY", 1)
+    clock = mocker.patch("backend.src.api.cache_utils.time.time", return_value = 1000.0)
+    cache = SQLiteExplanationCache(str(tmp_path / "cache.sqlite"), max_entries = 2)
+
+    cache.set("a", "A")
+    clock.return_value = 1001.0
+    cache.set("b", "B")
+    clock.return_value = 1002.0
+    cache.get("a")  # "b" is now least recently used
+    clock.return_value = 1003.0
+    cache.set("c", "C")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+    assert cache.get("c") == "C"
+
+
+def test_cached_explanation_skips_llm(tmp_path, mocker, llm, llm_reply):
+    cache = SQLiteExplanationCache(str(tmp_path / "cache.sqlite"))
+    mocker.patch.object(llm, "get_explanation_cache", return_value = cache)
+    calls = llm_reply("Kyoto fits.")
+
+    first = asyncio.run(llm.explain_results_cached("Kyoto temples", "post", "https://example.com/p1"))
+    second = asyncio.run(llm.explain_results_cached("kyoto  temples", "post", "https://example.com/p1"))
+
+    assert first == ("Kyoto fits.", False)
+    assert second == ("Kyoto fits.", True)
+    assert len(calls) == 1
+
+
+def test_failed_explanation_is_not_cached(tmp_path, mocker, llm, llm_reply):
+    cache = SQLiteExplanationCache(str(tmp_path / "cache.sqlite"))
+    mocker.patch.object(llm, "get_explanation_cache", return_value = cache)
+    llm_reply(RuntimeError("rate limited"))
+
+    text, cached = asyncio.run(llm.explain_results_cached("query", "post", "https://example.com/p1"))
+
+    assert cached is False
+    assert text.startswith("Explanation unavailable")
+    assert len(cache) == 0
+
+
+def test_incomplete_backend_fails_at_construction():
+    class GetOnly(ExplanationCache):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        GetOnly()
+
+
+def test_cache_io_runs_off_the_event_loop(tmp_path, mocker, llm, llm_reply):
+    cache = SQLiteExplanationCache(str(tmp_path / "cache.sqlite"))
+    threads = []
+
+    def recorded(method):
+        def call(*args):
+            threads.append(threading.get_ident())
+            return method(*args)
+        return call
+
+    mocker.patch.object(cache, "get", side_effect = recorded(cache.get))
+    mocker.patch.object(cache, "set", side_effect = recorded(cache.set))
+    mocker.patch.object(llm, "get_explanation_cache", return_value = cache)
+    llm_reply("Kyoto fits.")
+
+    async def explain():
+        return threading.get_ident(), await llm.explain_results_cached("query", "post", "https://example.com/p1")
+
+    loop_thread, outcome = asyncio.run(explain())
+
+    assert outcome == ("Kyoto fits.", False)
+    assert len(threads) == 2 and loop_thread not in threads
@@ -0,0 +1,156 @@
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.src.api.jobs_utils import JobQueue, JobQueueFull
+
+
+def _results(n):
+    from backend.src.api.main import Result
+
+    return [
+        Result(destination = f"Town{i}", country = "", full_content = f"post {i}", why = {"page_url": f"https://example.com/{i}"})
+        for i in range(n)
+    ]
+
+
+@pytest.fixture
+def client(mocker):
+    from backend.src.api import main
+
+    delays = {"post 0": 0.3, "post 1": 0.0, "post 2": 0.1}
+
+    async def explain(query, content, page_url):
+        await asyncio.sleep(delays[content])
+        return f"why {content}", False
+
+    mocker.patch.object(main, "EXPLANATION_MODE", "per-result")
+    mocker.patch.object(main, "explain_results_cached", side_effect = explain)
+    mocker.patch.dict(main.SEARCH_HANDLERS, {"bm25": lambda req: _results(5)})
+    mocker.patch.object(main, "explanation_jobs", JobQueue(workers = 2))
+    with TestClient(main.app) as client:
+        yield client
+
+
+def test_search_returns_job_and_explanations_fill_in(client):
+    body = {"query": "temples", "retrieval": {"model": "bm25", "k": 5},
+            "llm_explanations": True, "explanations_async": True}
+
+    start = time.perf_counter()
+    response = client.post("/search", json = body).json()
+
+    assert time.perf_counter() - start < 0.25  # did not wait for the 0.3s explanation
+    assert len(response["results"]) == 5
+    assert response["explanations"] == []
+    job_id = response["explanations_job_id"]
+
+    seen_partial = False
+    for _ in range(100):
+        job = client.get(f"/explanations/{job_id}").json()
+        if job["status"] == "done":
+            break
+        seen_partial = seen_partial or 0 < job["completed"] < job["total"]
+        time.sleep(0.02)
+
+    assert job["status"] == "done"
+    assert seen_partial
+    assert [e["text"] for e in job["explanations"]] == ["why post 0", "why post 1", "why post 2"]
+    assert job["explanations"][1]["page_url"] == "https://example.com/1"
+
+
+def test_unknown_job_is_404(client):
+    assert client.get("/explanations/nope").status_code == 404
+
+
+def test_failed_and_expired_jobs():
+    async def run():
+        queue = JobQueue(workers = 1, ttl_s = 0.2)
+
+        async def fail(job):
+            raise RuntimeError("boom")
+
+        job = queue.submit(2, fail)
+        await asyncio.sleep(0.05)
+        assert queue.get(job.job_id).status == "failed"
+        assert queue.get(job.job_id).error == "boom"
+
+        await asyncio.sleep(0.2)
+        assert queue.get(job.job_id) is None
+
+    asyncio.run(run())
+
+
+def test_full_queue_refuses_jobs():
+    async def run():
+        queue = JobQueue(workers = 1, max_pending = 1)
+        release = asyncio.Event()
+
+        async def block(job):
+            await release.wait()
+
+        queue.submit(1, block)
+        await asyncio.sleep(0)  # the worker takes the first job
+        queue.submit(1, block)
+        with pytest.raises(JobQueueFull):
+            queue.submit(1, block)
+        release.set()
+
+    asyncio.run(run())
+
+
+def test_evicted_jobs_are_skipped():
+    async def run():
+        queue = JobQueue(workers = 1, max_jobs = 2)
+        release = asyncio.Event()
+        ran = []
+
+        async def work(job):
+            ran.append(job.job_id)
+            await release.wait()
+
+        first = queue.submit(1, work)
+        await asyncio.sleep(0)  # the worker takes the first job
+        queued = queue.submit(1, work)
+        third = queue.submit(1, work)  # evicts the running first job
+        fourth = queue.submit(1, work)  # evicts the still-queued second job
+        release.set()
+        await asyncio.sleep(0.05)
+
+        assert queue.get(queued.job_id) is None
+        assert ran == [first.job_id, third.job_id, fourth.job_id]
+
+    asyncio.run(run())
+
+
+def test_search_is_429_when_the_job_queue_is_full(client, mocker):
+    from backend.src.api import main
+
+    mocker.patch.object(main.explanation_jobs, "submit", side_effect = JobQueueFull(100, 3))
+    body = {"query": "temples", "retrieval": {"model": "bm25", "k": 5},
+            "llm_explanations": True, "explanations_async": True}
+
+    response = client.post("/search", json = body)
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "3"
+
+
+def test_jobs_go_through_the_llm_lane(client, mocker):
+    from backend.src.api import main
+    from backend.src.api.admission_utils import AdmissionLane
+
+    mocker.patch.dict(main.LANES, {"llm": AdmissionLane("llm", concurrency = 0, max_queue = 0, max_wait_s = 1)})
+    body = {"query": "temples", "retrieval": {"model": "bm25", "k": 5},
+            "llm_explanations": True, "explanations_async": True}
+
+    job_id = client.post("/search", json = body).json()["explanations_job_id"]
+    for _ in range(50):
+        job = client.get(f"/explanations/{job_id}").json()
+        if job["status"] == "done":
+            break
+        time.sleep(0.02)
+
+    assert [e["text"] for e in job["explanations"]] == [main.UNAVAILABLE_MESSAGE] * 3
+    main.explain_results_cached.assert_not_called()
@@ -0,0 +1,54 @@
+from backend.src.api.hybrid_utils import blend_scores, reciprocal_rank_fusion
+
+
+def key(r):
+    return r["page_url"]
+
+
+BM25 = [
+    {"page_url": "kyoto", "score": 12.0},
+    {"page_url": "nara", "score": 8.0},
+    {"page_url": "osaka", "score": 2.0},
+]
+FAISS = [
+    {"page_url": "nara", "distance": 0.4},
+    {"page_url": "kyoto", "distance": 0.5},
+    {"page_url": "hakone", "distance": 0.9},
+]
+
+
+def test_rrf_rewards_documents_found_by_both_engines():
+    fused = reciprocal_rank_fusion([BM25, FAISS], key)
+    docs = [doc for doc, _ in fused]
+
+    assert set(docs) == {"kyoto", "nara", "osaka", "hakone"}
+    assert set(docs[:2]) == {"kyoto", "nara"}
+    assert fused[0][1] >= fused[-1][1]
+
+
+def test_rrf_with_one_empty_list_keeps_order():
+    fused = reciprocal_rank_fusion([BM25, []], key)
+    assert [doc for doc, _ in fused] == ["kyoto", "nara", "osaka"]
+
+
+def test_blend_alpha_extremes_follow_single_engine():
+    sparse_only = blend_scores(BM25, FAISS, key, alpha = 1.0)
+    dense_only = blend_scores(BM25, FAISS, key, alpha = 0.0)
+
+    assert sparse_only[0][0] == "kyoto"
+    assert dense_only[0][0] == "nara"
+
+
+def test_blend_single_faiss_result_counts_as_best():
+    blended = dict(blend_scores(BM25, [{"page_url": "hakone", "distance": 0.7}], key, alpha = 0.5))
+
+    assert blended["hakone"] == 0.5
+    assert blended["hakone"] > blended["osaka"]
+
+
+def test_blend_tied_faiss_results_all_count_as_best():
+    tied = [{"page_url": "nara", "distance": 0.3}, {"page_url": "hakone", "distance": 0.3}]
+    blended = dict(blend_scores(BM25, tied, key, alpha = 0.0))
+
+    assert blended["nara"] == blended["hakone"] == 1.0
+    assert blended["kyoto"] == 0.0
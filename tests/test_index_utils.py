@@ -0,0 +1,129 @@
+import os
+
+import numpy as np
+import pytest
+
+from backend.src.api.index_utils import STORAGE_MODES, DenseIndex, MmapVectorStore, truncate_embeddings
+
+DIM = 32
+
+
+@pytest.fixture
+def vectors():
+    rng = np.random.default_rng(0)
+    # Below 256 vectors PQ trains 6-bit codebooks, which keeps the tests fast
+    vectors = rng.standard_normal((120, DIM)).astype("float32")
+    return vectors / np.linalg.norm(vectors, axis = 1, keepdims = True)
+
+
+def build(vectors, tmp_path, mode, **kwargs):
+    return DenseIndex(DIM, mode = mode, vectors_path = str(tmp_path / f"{mode}.f32"), **kwargs).build(
+        vectors, np.arange(len(vectors), dtype = "int64")
+    )
+
+
+@pytest.mark.parametrize("mode", STORAGE_MODES)
+def test_search_finds_query_documents(vectors, tmp_path, mode):
+    index = build(vectors, tmp_path, mode, rerank_n = 0)
+
+    distances, ids = index.search(vectors[:20], 5)
+
+    assert index.ntotal == 120 and index.vectors is None
+    assert ids.shape == distances.shape == (20, 5)
+    assert ((ids >= 0) & (ids < 120)).all()
+    hits = sum(q in row for q, row in enumerate(ids))
+    if mode in ("flat", "fp16", "sq8"):
+        assert hits == 20
+        assert (ids[:, 0] == np.arange(20)).all()
+    else:
+        assert hits >= 16
+
+
+@pytest.mark.parametrize("mode", STORAGE_MODES)
+def test_rerank_returns_exact_full_dimension_distances(vectors, tmp_path, mode):
+    index = build(vectors, tmp_path, mode, rerank_n = 50)
+
+    distances, ids = index.search(vectors[:20], 5)
+
+    assert (ids[:, 0] == np.arange(20)).all()
+    exact = ((vectors[ids] - vectors[:20, None, :]) ** 2).sum(axis = 2)
+    np.testing.assert_allclose(distances, exact, atol = 1e-5)
+    assert (np.diff(distances, axis = 1) >= 0).all()
+
+
+@pytest.mark.parametrize("mode", STORAGE_MODES)
+def test_add_and_remove(vectors, tmp_path, mode):
+    index = build(vectors[:100], tmp_path, mode, rerank_n = 20)
+
+    index.add(vectors[100:], np.arange(1000, 1020, dtype = "int64"))
+    _, ids = index.search(vectors[110:111], 1)
+    assert index.ntotal == 120 and ids[0, 0] == 1010
+
+    assert index.remove(np.array([1010, 3])) == 2
+    _, ids = index.search(vectors[[110, 3]], 10)
+    assert index.ntotal == 118
+    assert 1010 not in ids and 3 not in ids
+
+
+def test_keep_vectors_without_rerank(vectors, tmp_path):
+    kept = build(vectors, tmp_path, "sq8", rerank_n = 0, keep_vectors = True)
+    plain = build(vectors, tmp_path, "sq8", rerank_n = 0)
+
+    np.testing.assert_array_equal(kept.vectors.gather(np.array([7, 3])), vectors[[7, 3]])
+    for a, b in zip(kept.search(vectors[:5], 5), plain.search(vectors[:5], 5)):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_truncation_renormalizes_to_unit_length(vectors):
+    truncated = truncate_embeddings(vectors * 3, 8)
+
+    assert truncated.shape == (120, 8) and truncated.dtype == np.float32
+    np.testing.assert_allclose(np.linalg.norm(truncated, axis = 1), 1, rtol = 1e-6)
+    np.testing.assert_allclose(truncated, truncate_embeddings(vectors, 8), rtol = 1e-6)
+
+
+def test_truncated_search_finds_prefix_neighbours(vectors, tmp_path):
+    index = build(vectors, tmp_path, "flat", index_dim = 16, rerank_n = 0)
+
+    distances, ids = index.search(vectors[:10], 5)
+
+    prefix = truncate_embeddings(vectors, 16)
+    exact = ((prefix[None, :, :] - prefix[:10, None, :]) ** 2).sum(axis = 2)
+    np.testing.assert_array_equal(ids, np.argsort(exact, axis = 1)[:, :5])
+    np.testing.assert_allclose(distances, np.sort(exact, axis = 1)[:, :5], atol = 1e-5)
+
+
+def test_truncated_search_reranks_at_full_dimension(vectors, tmp_path):
+    index = build(vectors, tmp_path, "flat", index_dim = 16, rerank_n = len(vectors))
+
+    distances, ids = index.search(vectors[:10], 5)
+
+    exact = ((vectors[None, :, :] - vectors[:10, None, :]) ** 2).sum(axis = 2)
+    np.testing.assert_array_equal(ids, np.argsort(exact, axis = 1)[:, :5])
+    np.testing.assert_allclose(distances, np.sort(exact, axis = 1)[:, :5], atol = 1e-5)
+
+
+def test_pq_m_must_divide_index_dimension():
+    with pytest.raises(ValueError, match = "FAISS_PQ_M"):
+        DenseIndex(DIM, mode = "pq", pq_m = 5)
+
+
+def test_index_dim_cannot_exceed_embedding_dim():
+    with pytest.raises(ValueError, match = "exceeds"):
+        DenseIndex(DIM, mode = "flat", index_dim = DIM * 2)
+
+
+def test_rebuild_never_truncates_a_mapped_store(vectors, tmp_path):
+    path = str(tmp_path / "vectors.f32")
+    live = MmapVectorStore(path, DIM)
+    live.write(np.arange(120), vectors)
+    live.publish()
+
+    rebuilt = MmapVectorStore(path, DIM)
+    rebuilt.write(np.arange(10), vectors[:10] * 2)
+    rebuilt.publish()
+
+    # The live store still reads its own vectors; the path now holds the rebuild
+    np.testing.assert_array_equal(live.gather(np.array([119])), vectors[[119]])
+    assert os.path.getsize(path) == 10 * DIM * 4
+    assert os.listdir(tmp_path) == ["vectors.f32"]
@@ -0,0 +1,55 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+
+def _result(text):
+    return SimpleNamespace(full_content = text, why = {"page_url": f"https://example.com/{text}"})
+
+
+def test_explanations_run_concurrently(mocker):
+    from backend.src.api import main
+
+    async def slow_explain(query, post_text, page_url):
+        await asyncio.sleep(0.2)
+        return f"why {post_text}", False
+
+    mocker.patch.object(main, "EXPLANATION_MODE", "per-result")
+    mocker.patch.object(main, "explain_results_cached", side_effect = slow_explain)
+    req = SimpleNamespace(query = "kyoto temples")
+    results = [_result("a"), _result("b"), _result("c"), _result("d")]
+
+    start = time.perf_counter()
+    explanations = asyncio.run(main.generate_explanations(req, results))
+    elapsed = time.perf_counter() - start
+
+    assert [e.text for e in explanations] == ["why a", "why b", "why c"]
+    # Three sequential calls would take at least 0.6s
+    assert elapsed < 0.45
+
+
+def test_failed_explanation_does_not_fail_the_others(mocker):
+    from backend.src.api import main
+
+    async def flaky_explain(query, post_text, page_url):
+        if post_text == "b":
+            raise RuntimeError("boom")
+        return f"why {post_text}", False
+
+    mocker.patch.object(main, "EXPLANATION_MODE", "per-result")
+    mocker.patch.object(main, "explain_results_cached", side_effect = flaky_explain)
+    req = SimpleNamespace(query = "kyoto temples")
+
+    explanations = asyncio.run(main.generate_explanations(req, [_result("a"), _result("b")]))
+
+    assert [e.text for e in explanations] == ["why a", "Explanation unavailable."]
+    assert explanations[1].page_url == "https://example.com/b"
+
+
+def test_explain_results_async_times_out(mocker, llm, llm_reply):
+    mocker.patch.object(llm, "LLM_TIMEOUT_S", 0.05)
+    llm_reply(lambda prompt: asyncio.sleep(5, "late"))
+
+    text = asyncio.run(llm.explain_results_async("query", "post"))
+
+    assert text == "Explanation unavailable (timed out)."
@@ -0,0 +1,217 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from backend.src.api.resilience_utils import (
+    CircuitBreaker,
+    CircuitOpenError,
+    hedged,
+    reset_deadline,
+    set_deadline,
+    time_left,
+)
+from tests.llm_stub_server import LLMStubServer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_opens_after_consecutive_failures_and_recovers():
+    clock = FakeClock()
+    breaker = CircuitBreaker("llm", failure_threshold = 3, reset_timeout_s = 10, clock = clock)
+
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    breaker.before_call()
+    breaker.record_success()  # a success resets the count
+    for _ in range(3):
+        breaker.before_call()
+        breaker.record_failure()
+
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    clock.now = 10
+    assert breaker.state == "half-open"
+    breaker.before_call()  # the single trial call
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    clock.now = 20
+    breaker.before_call()
+    breaker.abandon()  # cancelled trial frees the slot
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_time_left_honours_deadline_and_cap():
+    assert time_left(5) == 5
+
+    token = set_deadline(time.monotonic() + 1)
+    try:
+        assert 0.9 < time_left() <= 1
+        assert time_left(0.5) == 0.5
+    finally:
+        reset_deadline(token)
+
+    assert time_left() is None
+
+
+def test_hedge_wins_over_slow_first_attempt():
+    attempts = []
+
+    async def call():
+        attempts.append(None)
+        await asyncio.sleep(1.0 if len(attempts) == 1 else 0.01)
+        return len(attempts)
+
+    start = time.perf_counter()
+    result = asyncio.run(hedged(call, hedge_after_s = 0.05))
+
+    assert result == 2
+    assert time.perf_counter() - start < 0.5
+
+
+def test_request_deadline_header_lowers_budget():
+    from backend.src.api import main
+
+    request = SimpleNamespace(headers = {"X-Request-Deadline-Ms": "1500"})
+    assert main._request_deadline(request, 100.0) == pytest.approx(101.5)
+
+    request = SimpleNamespace(headers = {"X-Request-Deadline-Ms": "not a number"})
+    assert main._request_deadline(request, 100.0) == 100.0 + main.REQUEST_DEADLINE_S
+
+
+# -----------------------------
+# Against the local stub server
+# -----------------------------
+@pytest.fixture
+def stub():
+    server = LLMStubServer(latency_s = 0.0).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def stub_llm(mocker, stub, llm):
+    from huggingface_hub import AsyncInferenceClient
+
+    mocker.patch.object(llm, "_breaker", CircuitBreaker("llm", 2, 30))
+    mocker.patch.object(llm, "select_context", side_effect = lambda q, text, budget = None: text)
+
+    def explain(query = "temples", post = "Kyoto temples.", deadline_s = None):
+        async def run():
+            if deadline_s is not None:
+                set_deadline(time.monotonic() + deadline_s)
+            # The client session is bound to the event loop, so build it per run
+            client = AsyncInferenceClient(base_url = stub.url, token = "stub")
+            mocker.patch.object(llm, "async_client", client)
+            try:
+                return await llm.explain_results_cached(query, post, page_url = None)
+            finally:
+                await client.close()
+        return asyncio.run(run())
+
+    return SimpleNamespace(utils = llm, explain = explain)
+
+
+def test_stub_answers(stub_llm, stub):
+    assert stub_llm.explain() == ("Stub explanation.", False)
+    assert stub.requests == 1
+
+
+def test_deadline_cuts_slow_llm_call(stub_llm, stub):
+    stub.latency_s = 2.0
+
+    start = time.perf_counter()
+    text, _ = stub_llm.explain(deadline_s = 0.2)
+
+    assert text == "Explanation unavailable (timed out)."
+    assert time.perf_counter() - start < 1.5
+
+
+def test_breaker_fails_fast_after_upstream_errors(stub_llm, stub):
+    stub.fail_next = 2
+
+    assert stub_llm.explain()[0] == "Explanation unavailable due to an error."
+    assert stub_llm.explain()[0] == "Explanation unavailable due to an error."
+    assert stub_llm.utils._breaker.state == "open"
+
+    # Open circuit: the upstream is not called at all
+    assert stub_llm.explain()[0] == stub_llm.utils.UNAVAILABLE_MESSAGE
+    assert stub.requests == 2
+
+
+def test_request_deadline_timeouts_do_not_open_the_breaker(stub_llm, stub):
+    stub.latency_s = 0.5
+
+    for _ in range(3):
+        assert stub_llm.explain(deadline_s = 0.1)[0] == "Explanation unavailable (timed out)."
+
+    assert stub_llm.utils._breaker.state == "closed"
+    assert stub_llm.utils._breaker.failures == 0
+
+
+def test_timeouts_at_the_llm_cap_open_the_breaker(stub_llm, stub, mocker):
+    mocker.patch.object(stub_llm.utils, "LLM_TIMEOUT_S", 0.1)
+    stub.latency_s = 0.5
+
+    for _ in range(2):
+        assert stub_llm.explain()[0] == "Explanation unavailable (timed out)."
+
+    assert stub_llm.utils._breaker.state == "open"
+
+
+def _stalled_stream(mocker, llm):
+    """Fake streaming client that sends one chunk and then hangs."""
+    async def chunks():
+        yield SimpleNamespace(choices = [SimpleNamespace(delta = SimpleNamespace(content = "Kyoto"))])
+        await asyncio.sleep(5)
+
+    async def create(**kwargs):
+        return chunks()
+
+    mocker.patch.object(llm, "async_client", SimpleNamespace(chat = SimpleNamespace(completions = SimpleNamespace(create = create))))
+    mocker.patch.object(llm, "select_context", side_effect = lambda q, text, budget = None: text)
+
+
+def test_stream_hung_past_the_llm_cap_counts_as_failure(llm, mocker):
+    _stalled_stream(mocker, llm)
+    mocker.patch.object(llm, "LLM_TIMEOUT_S", 0.1)
+    received = []
+
+    async def consume():
+        async for delta in llm.stream_explanation_async("temples", "Kyoto temples."):
+            received.append(delta)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(consume())
+
+    assert received == ["Kyoto"]
+    assert llm._breaker.failures == 1
+
+
+def test_stream_cut_by_the_request_deadline_is_not_counted(llm, mocker):
+    _stalled_stream(mocker, llm)
+
+    async def consume():
+        async for _ in llm.stream_explanation_async("temples", "Kyoto temples."):
+            pass
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(asyncio.wait_for(consume(), timeout = 0.1))
+
+    assert llm._breaker.failures == 0
+    assert llm._breaker.state == "closed"
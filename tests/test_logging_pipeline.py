@@ -0,0 +1,89 @@
+import io
+import json
+import logging
+
+from backend.src.api import bm25_utils, logging_utils
+from backend.src.api.logging_utils import BatchStreamHandler, JsonFormatter, flush_logs, request_context
+
+
+class CountingStream(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+
+def test_records_are_formatted_off_the_calling_thread(mocker):
+    stream = io.StringIO()
+    mocker.patch.object(logging_utils._stream_handler, "stream", stream)
+    format_json = mocker.spy(JsonFormatter, "format")
+    mocker.patch.object(logging_utils._listener, "handle", side_effect = lambda record: None)
+
+    bm25_utils.logger.info("queued %s", "only")
+
+    # The listener is stubbed out, so nothing may have been formatted or written
+    assert format_json.call_count == 0
+    assert stream.getvalue() == ""
+
+
+def test_batches_are_written_together():
+    stream = CountingStream()
+    handler = BatchStreamHandler(stream, batch_size = 3)
+    handler.setFormatter(JsonFormatter())
+
+    for i in range(7):
+        handler.handle(logging.makeLogRecord({"msg": f"line {i}", "levelno": logging.INFO, "levelname": "INFO"}))
+    assert stream.writes == 2
+    handler.flush()
+
+    assert stream.writes == 3
+    assert [json.loads(line)["message"] for line in stream.getvalue().splitlines()] == [f"line {i}" for i in range(7)]
+
+
+def test_unsampled_requests_keep_only_warnings(mocker):
+    stream = io.StringIO()
+    mocker.patch.object(logging_utils._stream_handler, "stream", stream)
+    mocker.patch.object(logging_utils, "LOG_SAMPLE_RATE", 0.0)
+
+    with request_context("req-3", "test"):
+        bm25_utils.logger.info("routine")
+        bm25_utils.logger.warning("slow %s", "query")
+    bm25_utils.logger.info("outside")
+    flush_logs()
+
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [(line["message"], line.get("request_id")) for line in lines] == [("slow query", "req-3"), ("outside", None)]
+
+
+def test_exceptions_are_rendered_before_queueing(mocker):
+    stream = io.StringIO()
+    mocker.patch.object(logging_utils._stream_handler, "stream", stream)
+
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        bm25_utils.logger.exception("failed")
+    flush_logs()
+
+    line = json.loads(stream.getvalue())
+    assert "ValueError: boom" in line["exception"]
+
+
+def test_full_queue_drops_only_info_and_debug(mocker):
+    import queue
+
+    log_queue = queue.SimpleQueue()
+    handler = logging_utils._EnqueueHandler(log_queue)
+    mocker.patch.object(logging_utils, "LOG_QUEUE_SIZE", 2)
+    mocker.patch.object(logging_utils, "_dropped_records", 0)
+
+    for level in (logging.INFO, logging.INFO, logging.DEBUG, logging.INFO, logging.WARNING, logging.ERROR):
+        handler.enqueue(logging.makeLogRecord({"msg": "line", "levelno": level}))
+
+    assert [log_queue.get_nowait().levelno for _ in range(log_queue.qsize())] == [
+        logging.INFO, logging.INFO, logging.WARNING, logging.ERROR
+    ]
+    assert logging_utils.dropped_log_records() == 2
@@ -0,0 +1,67 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from rank_bm25 import BM25Okapi
+
+from backend.src.api import bm25_utils, llm_utils
+
+
+def _count(stage):
+    return REGISTRY.get_sample_value("search_stage_seconds_count", {"stage": stage}) or 0.0
+
+
+def _lookups(cache, result):
+    return REGISTRY.get_sample_value("cache_lookups_total", {"cache": cache, "result": result}) or 0.0
+
+
+@pytest.fixture
+def corpus(mocker):
+    posts = [
+        {"location_name": "Kyoto, Japan", "content": "kyoto temples and shrines", "page_url": "https://example.com/kyoto"},
+        {"location_name": "Dolomites, Italy", "content": "dolomites mountain huts", "page_url": "https://example.com/dolomites"},
+    ]
+    mocker.patch.object(bm25_utils, "_cached_posts", posts)
+    mocker.patch.object(bm25_utils, "_cached_bm25", BM25Okapi([p["content"].split() for p in posts]))
+    return posts
+
+
+def test_bm25_stages_are_timed(corpus):
+    before = {stage: _count(stage) for stage in ("tokenize", "bm25_score", "topk", "hydrate")}
+
+    results = bm25_utils.search_bm25("kyoto temples", top_n = 1)
+
+    assert results[0]["country"] == "Japan"
+    assert {stage: _count(stage) - n for stage, n in before.items()} == {
+        "tokenize": 1, "bm25_score": 1, "topk": 1, "hydrate": 1,
+    }
+
+
+def test_explanation_cache_hits_and_misses(mocker):
+    cache = SimpleNamespace(get = lambda key: "cached text" if key == "hit" else None)
+    mocker.patch.object(llm_utils, "get_explanation_cache", return_value = cache)
+    mocker.patch.object(llm_utils, "explanation_key", side_effect = lambda query, page_url, version: query)
+    hits, misses = _lookups("explanation", "hit"), _lookups("explanation", "miss")
+
+    llm_utils.lookup_explanation("hit", "https://example.com/kyoto")
+    llm_utils.lookup_explanation("miss", "https://example.com/kyoto")
+
+    assert _lookups("explanation", "hit") == hits + 1
+    assert _lookups("explanation", "miss") == misses + 1
+
+
+def test_metrics_endpoint(corpus):
+    from backend.src.api import main
+
+    with TestClient(main.app) as client:
+        client.post("/search", json = {"query": "kyoto", "retrieval": {"model": "bm25", "k": 1}})
+        response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'search_stage_seconds_bucket{le="0.001",stage="serialize"}' in body
+    assert 'index_documents{index="bm25"} 2.0' in body
+    assert f'engine_available{{engine="bm25"}} {float(main.BM25_AVAILABLE)}' in body
+    assert 'admission_shed_total{lane="encode",reason="queue_full"}' in body
@@ -0,0 +1,46 @@
+import pytest
+import torch
+
+pytest.importorskip("onnxruntime")
+
+pytestmark = pytest.mark.integration
+
+
+@pytest.fixture
+def corpus():
+    return [
+        "Kyoto temples and shrines are beautiful in autumn.",
+        "The Dolomites offer dramatic mountain landscapes and via ferrata routes.",
+        "Quiet fishing villages along the Portuguese coast with fresh seafood.",
+        "Street food markets and night bazaars in Chiang Mai.",
+        "Backpacking across Patagonia, glaciers, wind and endless trails.",
+        "A weekend of museums, cafes and jazz clubs in Lisbon.",
+    ]
+
+
+@pytest.fixture
+def onnx_dir(tmp_path, mocker):
+    import backend.src.api.modern_bert_utils as mbu
+
+    mocker.patch.object(mbu, "ONNX_MODEL_DIR", str(tmp_path))
+    mocker.patch.dict(mbu._onnx_sessions, clear = True)
+    return tmp_path
+
+
+@pytest.mark.parametrize("backend", ["onnx", "onnx-int8"])
+def test_onnx_backend_matches_torch(corpus, onnx_dir, backend):
+    from backend.src.api.modern_bert_utils import embed_texts
+
+    reference = embed_texts(corpus, backend = "torch")
+    emb = embed_texts(corpus, backend = backend)
+
+    assert emb.shape == reference.shape
+    cosine = torch.nn.functional.cosine_similarity(emb, reference, dim = 1)
+    assert cosine.min().item() > 0.99
+
+
+def test_unknown_backend_raises(corpus):
+    from backend.src.api.modern_bert_utils import embed_texts
+
+    with pytest.raises(ValueError):
+        embed_texts(corpus, backend = "tensorrt")
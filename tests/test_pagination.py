@@ -0,0 +1,108 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.src.api import pagination_utils
+from backend.src.api.pagination_utils import CursorExpired, RankedListCache, encode_cursor
+
+
+N_POSTS = 25
+POSTS = {
+    f"https://example.com/{i}": {"page_url": f"https://example.com/{i}", "page_description": f"About town {i}",
+                                 "content": f"post {i} " * 100}
+    for i in range(N_POSTS)
+}
+
+
+def _ranked(req):
+    from backend.src.api.main import Result
+
+    return [
+        Result(destination = f"Town{i}", country = "", score = 1.0 / (i + 1),
+               full_content = POSTS[f"https://example.com/{i}"]["content"],
+               why = {"page_url": f"https://example.com/{i}"})
+        for i in range(min(req.retrieval.k, N_POSTS))
+    ]
+
+
+@pytest.fixture
+def client(mocker):
+    from backend.src.api import main
+
+    handler = mocker.Mock(side_effect = _ranked)
+    mocker.patch.dict(main.SEARCH_HANDLERS, {"bm25": handler})
+    mocker.patch.object(main, "ranked_lists", RankedListCache())
+    mocker.patch.object(main, "get_post_by_url", side_effect = POSTS.get)
+    mocker.patch.object(main, "get_summary", return_value = None)
+    mocker.patch.object(main, "corpus_version", return_value = 1)
+    with TestClient(main.app) as client:
+        client.handler = handler
+        yield client
+
+
+BODY = {"query": "temples", "retrieval": {"model": "bm25", "k": 10}, "paginate": True}
+
+
+def test_pages_come_from_one_ranking(client):
+    first = client.post("/search", json = BODY).json()
+    second = client.post("/search", json = {**BODY, "cursor": first["next_cursor"]}).json()
+    third = client.post("/search", json = {**BODY, "cursor": second["next_cursor"]}).json()
+
+    assert client.handler.call_count == 1
+    assert client.handler.call_args.args[0].retrieval.k == pagination_utils.ranking_depth(10)
+
+    destinations = [r["destination"] for page in (first, second, third) for r in page["results"]]
+    assert destinations == [f"Town{i}" for i in range(N_POSTS)]
+    assert third["next_cursor"] is None
+
+    hydrated = second["results"][0]
+    assert hydrated["full_content"] == POSTS["https://example.com/10"]["content"]
+    assert hydrated["snippets"][0] == "About town 10"
+    assert hydrated["score"] == pytest.approx(1 / 11)
+
+
+def test_cursor_expires_when_index_changes(client, mocker):
+    from backend.src.api import main
+
+    cursor = client.post("/search", json = BODY).json()["next_cursor"]
+    mocker.patch.object(main, "corpus_version", return_value = 2)
+
+    response = client.post("/search", json = {**BODY, "cursor": cursor})
+
+    assert response.status_code == 410
+    assert client.post("/search", json = {**BODY, "cursor": "not-a-cursor"}).status_code == 410
+
+
+def test_unpaginated_search_has_no_cursor(client):
+    response = client.post("/search", json = {**BODY, "paginate": False}).json()
+
+    assert len(response["results"]) == 10
+    assert response["next_cursor"] is None
+    assert client.handler.call_args.args[0].retrieval.k == 10
+
+
+def test_ranking_depth_scales_with_k(mocker):
+    mocker.patch.object(pagination_utils, "PAGINATION_PAGES", 5)
+    mocker.patch.object(pagination_utils, "PAGINATION_DEPTH", 200)
+
+    assert pagination_utils.ranking_depth(3) == 15
+    assert pagination_utils.ranking_depth(50) == 200
+    assert pagination_utils.ranking_depth(300) == 300
+
+
+def test_cache_is_bounded_and_lists_expire():
+    now = [0.0]
+    cache = RankedListCache(max_lists = 2, ttl_s = 60, clock = lambda: now[0])
+    entries = [{"n": i} for i in range(5)]
+
+    oldest = cache.put(entries, "v1")
+    cache.put(entries, "v1")
+    newest = cache.put(entries, "v1")
+
+    assert len(cache) == 2
+    with pytest.raises(CursorExpired):
+        cache.page(encode_cursor(oldest, 0), 2, "v1")
+    assert cache.page(encode_cursor(newest, 2), 2, "v1") == ([{"n": 2}, {"n": 3}], encode_cursor(newest, 4))
+
+    now[0] = 61.0
+    with pytest.raises(CursorExpired):
+        cache.page(encode_cursor(newest, 2), 2, "v1")
@@ -0,0 +1,141 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from backend.src.api.bm25_utils import Base, Whole_Blogs
+from backend.src.api import summary_utils
+from backend.llm_summary.summarize_blogs_api import RateLimiter, load_known_hashes, summarize_all
+
+
+def _post(post_id, content):
+    return Whole_Blogs(
+        id = post_id,
+        blog_url = "https://example.com",
+        page_url = f"https://example.com/{post_id}",
+        page_title = f"Post {post_id}",
+        page_description = "",
+        page_author = "",
+        location_name = f"Town{post_id}",
+        latitude = 0.0,
+        longitude = 0.0,
+        content = content,
+    )
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'blogs.sqlite'}")
+    Base.metadata.create_all(engine, tables = [Whole_Blogs.__table__])
+    with Session(engine) as session:
+        session.add_all([_post(1, "Temples."), _post(2, "Beaches."), _post(3, "Mountains.")])
+        session.commit()
+    return engine
+
+
+def _client(fail_titles = ()):
+    calls = []
+
+    async def create(model, messages):
+        prompt = messages[0]["content"]
+        calls.append(prompt)
+        if any(f"Title: {title}" in prompt for title in fail_titles):
+            raise RuntimeError("upstream error")
+        title = prompt.split("Title: ")[1].splitlines()[0]
+        return SimpleNamespace(choices = [SimpleNamespace(message = {"content": f" Summary of {title}. "})])
+
+    client = SimpleNamespace(chat = SimpleNamespace(completions = SimpleNamespace(create = create)))
+    return client, calls
+
+
+def _summarize(engine, client, **kwargs):
+    return asyncio.run(summarize_all(engine, client, rate_per_min = 0, checkpoint_every = 2, **kwargs))
+
+
+def test_summarizes_every_post_and_skips_them_on_rerun(engine):
+    client, calls = _client()
+
+    assert _summarize(engine, client) == (3, 0)
+    assert len(calls) == 3
+    assert summary_utils.load_summaries(engine)["https://example.com/2"] == "Summary of Post 2."
+
+    # Resume / refresh: only the post whose content changed is summarized again
+    with Session(engine) as session:
+        session.get(Whole_Blogs, 2).content = "Beaches and reefs."
+        session.commit()
+    assert _summarize(engine, client) == (1, 0)
+    assert len(calls) == 4
+    assert "Beaches and reefs." in calls[-1]
+
+
+def test_summaries_of_edited_posts_are_ignored(engine):
+    client, _ = _client()
+    _summarize(engine, client)
+
+    with Session(engine) as session:
+        session.get(Whole_Blogs, 2).content = "Beaches and reefs."
+        session.commit()
+
+    assert set(summary_utils.load_summaries(engine)) == {"https://example.com/1", "https://example.com/3"}
+
+
+def test_summaries_reload_with_the_corpus(engine, mocker):
+    from backend.src.api import bm25_utils
+
+    client, _ = _client()
+    _summarize(engine, client)
+    mocker.patch.object(bm25_utils, "get_engine", return_value = engine)
+    mocker.patch.object(summary_utils, "get_engine", return_value = engine)
+    mocker.patch.object(summary_utils, "POST_SUMMARIES", True)
+    mocker.patch.object(summary_utils, "_summaries", {})
+    for name in ("_cached_posts", "_cached_bm25", "_posts_by_url", "_corpus_version"):
+        mocker.patch.object(bm25_utils, name, getattr(bm25_utils, name))
+
+    bm25_utils._load_blogs_from_db()
+    assert summary_utils.get_summary("https://example.com/2") == "Summary of Post 2."
+
+    with Session(engine) as session:
+        session.get(Whole_Blogs, 2).content = "Beaches and reefs."
+        session.commit()
+    load = mocker.spy(summary_utils, "load_summaries")
+    summary_utils.get_summary("https://example.com/2")
+    assert load.call_count == 0  # lookups never read the database
+
+    bm25_utils._load_blogs_from_db()
+    assert summary_utils.get_summary("https://example.com/2") is None
+    assert summary_utils.get_summary("https://example.com/1") == "Summary of Post 1."
+
+
+def test_failed_posts_do_not_lose_the_others(engine, mocker):
+    mocker.patch("backend.llm_summary.summarize_blogs_api.RETRY_BACKOFF_S", 0.0)
+    client, calls = _client(fail_titles = ("Post 2",))
+
+    assert _summarize(engine, client) == (2, 1)
+    assert set(load_known_hashes(engine)) == {1, 3}
+    assert len(calls) == 2 + 4  # post 2 tried once plus three retries
+
+
+def test_rate_limiter_spaces_calls():
+    async def run():
+        limiter = RateLimiter(rate_per_min = 1200)  # one call per 50ms
+        start = time.perf_counter()
+        for _ in range(4):
+            await limiter.acquire()
+        return time.perf_counter() - start
+
+    assert asyncio.run(run()) >= 0.14
+
+
+def test_explanations_use_the_stored_summary(mocker):
+    from backend.src.api import llm_utils
+
+    mocker.patch.object(summary_utils, "_summaries", {"https://example.com/1": "Short summary."})
+
+    assert llm_utils.post_context("https://example.com/1", "Full post text.") == "Short summary."
+    assert llm_utils.post_context("https://example.com/2", "Full post text.") == "Full post text."
+
+    mocker.patch.object(summary_utils, "POST_SUMMARIES", False)
+    assert llm_utils.post_context("https://example.com/1", "Full post text.") == "Full post text."
@@ -0,0 +1,76 @@
+import gzip
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.src.api import response_utils
+
+
+def _results(n):
+    from backend.src.api.main import Result
+
+    return [
+        Result(destination = f"Town{i}", country = "", score = 1.0 / (i + 1), full_content = "word " * 400,
+               why = {"page_url": f"https://example.com/{i}"})
+        for i in range(n)
+    ]
+
+
+@pytest.fixture
+def client(mocker):
+    from backend.src.api import main
+
+    mocker.patch.dict(main.SEARCH_HANDLERS, {"bm25": lambda req: _results(req.retrieval.k)})
+    with TestClient(main.app) as client:
+        yield client
+
+
+BODY = {"query": "temples", "retrieval": {"model": "bm25", "k": 5}}
+
+
+@pytest.mark.parametrize("header, brotli_installed, expected", [
+    ("gzip, deflate, br", True, "br"),
+    ("gzip, deflate, br", False, "gzip"),
+    ("br;q=0.5, gzip;q=0.8", True, "gzip"),
+    ("gzip;q=0, identity", True, None),
+    ("*", False, "gzip"),
+    (None, True, None),
+])
+def test_negotiate_encoding(mocker, header, brotli_installed, expected):
+    mocker.patch.object(response_utils, "brotli", object() if brotli_installed else None)
+
+    assert response_utils.negotiate_encoding(header) == expected
+
+
+def test_search_body_still_matches_search_response(client):
+    from backend.src.api.main import SearchResponse
+
+    response = client.post("/search", json = BODY, headers = {"Accept-Encoding": "identity"})
+
+    assert response.status_code == 200
+    assert "Content-Encoding" not in response.headers
+    parsed = SearchResponse.model_validate(response.json())
+    assert [r.destination for r in parsed.results] == [f"Town{i}" for i in range(5)]
+
+
+def test_fields_projection(client):
+    response = client.post("/search?fields=destination,score", json = BODY)
+
+    assert response.json()["results"][0] == {"destination": "Town0", "score": 1.0}
+    assert client.post("/search?fields=destination,nope", json = BODY).status_code == 400
+
+
+def test_gzip_negotiated(client):
+    response = client.post("/search", json = BODY, headers = {"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert len(response.json()["results"]) == 5  # the client decodes transparently
+    assert int(response.headers["Content-Length"]) < len(response.content)
+
+
+def test_small_bodies_are_not_compressed():
+    body = response_utils.json_response({"a": 1}, "gzip").body
+
+    assert body == b'{"a":1}'
+    assert gzip.decompress(response_utils.compress(body, "gzip")) == body
@@ -0,0 +1,118 @@
+import asyncio
+import json
+
+import pytest
+
+
+def _request(**overrides):
+    from backend.src.api.main import StreamSearchRequest
+
+    body = {"query": "kyoto temples", "retrieval": {"model": "bm25", "k": 3}, "llm_explanations": True}
+    body.update(overrides)
+    return StreamSearchRequest(**body)
+
+
+def _results(n):
+    from backend.src.api.main import Result
+
+    return [
+        Result(destination = f"Town{i}", country = "", full_content = f"post {i}", why = {"page_url": f"https://example.com/{i}"})
+        for i in range(n)
+    ]
+
+
+def _collect(events):
+    async def run():
+        return [event async for event in events]
+    return asyncio.run(run())
+
+
+def test_results_come_first_and_explanations_in_completion_order(mocker):
+    from backend.src.api import main
+
+    delays = {"post 0": 0.15, "post 1": 0.0, "post 2": 0.05}
+
+    async def explain(query, content, page_url):
+        await asyncio.sleep(delays[content])
+        return f"why {content}", False
+
+    mocker.patch.object(main, "EXPLANATION_MODE", "per-result")
+    mocker.patch.object(main, "explain_results_cached", side_effect = explain)
+
+    events = _collect(main._search_events(_request(), _results(4), retrieval_ms = 1.0))
+
+    assert events[0]["event"] == "results"
+    assert len(events[0]["results"]) == 4
+    assert [(e["event"], e["index"]) for e in events[1:4]] == [
+        ("explanation", 1), ("explanation", 2), ("explanation", 0),
+    ]
+    assert events[-1]["event"] == "done"
+
+
+def test_token_stream_builds_explanation(mocker):
+    from backend.src.api import main
+
+    async def stream(query, content, page_url):
+        for token in ("Kyoto ", "is ", "calm."):
+            yield token
+
+    mocker.patch.object(main, "lookup_explanation", return_value = None)
+    mocker.patch.object(main, "stream_explanation_async", side_effect = stream)
+
+    events = _collect(main._search_events(_request(stream_tokens = True), _results(1), retrieval_ms = 1.0))
+
+    tokens = [e["text"] for e in events if e["event"] == "token"]
+    explanation = next(e for e in events if e["event"] == "explanation")
+    assert tokens == ["Kyoto ", "is ", "calm."]
+    assert explanation["text"] == "Kyoto is calm."
+    assert explanation["cached"] is False
+
+
+def test_cached_explanation_skips_token_stream(mocker):
+    from backend.src.api import main
+
+    mocker.patch.object(main, "lookup_explanation", return_value = "Kyoto, again.")
+    stream = mocker.patch.object(main, "stream_explanation_async")
+
+    events = _collect(main._search_events(_request(stream_tokens = True), _results(1), retrieval_ms = 1.0))
+
+    explanation = next(e for e in events if e["event"] == "explanation")
+    assert explanation["text"] == "Kyoto, again."
+    assert explanation["cached"] is True
+    assert not [e for e in events if e["event"] == "token"]
+    stream.assert_not_called()
+
+
+def test_no_explanation_events_when_disabled():
+    from backend.src.api import main
+
+    events = _collect(main._search_events(_request(llm_explanations = False), _results(2), retrieval_ms = 1.0))
+
+    assert [e["event"] for e in events] == ["results", "done"]
+
+
+@pytest.mark.parametrize("encode, prefix", [("_ndjson", "{"), ("_sse", "event: done\ndata: {")])
+def test_event_encodings(encode, prefix):
+    from backend.src.api import main
+
+    line = getattr(main, encode)({"event": "done"})
+
+    assert line.startswith(prefix)
+    assert json.loads(line.split("data: ")[-1]) == {"event": "done"}
+
+
+def test_batch_mode_emits_all_explanations_from_one_call(mocker):
+    from backend.src.api import main
+
+    async def explain_batch(query, items):
+        return [(f"why {content}", False) for _, content, _ in items]
+
+    mocker.patch.object(main, "EXPLANATION_MODE", "batch")
+    batch = mocker.patch.object(main, "explain_batch_cached", side_effect = explain_batch)
+
+    events = _collect(main._search_events(_request(), _results(4), retrieval_ms = 1.0))
+
+    assert batch.call_count == 1
+    explanations = [e for e in events if e["event"] == "explanation"]
+    assert [(e["index"], e["text"]) for e in explanations] == [(0, "why post 0"), (1, "why post 1"), (2, "why post 2")]
+    assert explanations[0]["page_url"] == "https://example.com/0"
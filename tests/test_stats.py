@@ -0,0 +1,70 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.src.api import db_utils, stats_utils
+
+
+POSTS = [
+    {"location_name": "Kyoto", "blog_url": "a.com", "page_author": "ann", "latitude": 35.0, "longitude": 135.7},
+    {"location_name": "Kyoto", "blog_url": "a.com", "page_author": "bob", "latitude": 35.0, "longitude": 135.7},
+    {"location_name": "Nara", "blog_url": "b.com", "page_author": None, "latitude": 34.6, "longitude": 135.8},
+    {"location_name": "Nowhere", "blog_url": "b.com", "page_author": "ann", "latitude": None, "longitude": None},
+]
+
+
+def test_compute_stats_matches_sql_semantics():
+    stats = stats_utils.compute_stats(POSTS)
+
+    assert stats["total_posts"] == 4
+    assert stats["unique_locations"] == 3
+    assert stats["unique_blogs"] == 2
+    assert stats["unique_authors"] == 2  # NULL authors are not counted
+    assert sorted((c["location"], c["count"]) for c in stats["coordinates"]) == [("Kyoto", 2), ("Nara", 1)]
+
+
+@pytest.fixture
+def client(mocker):
+    from backend.src.api import main
+
+    mocker.patch.object(stats_utils, "_snapshot", None)
+    mocker.patch.object(stats_utils, "get_bm25_posts", return_value = POSTS)
+    with TestClient(main.app) as client:
+        yield client
+
+
+def test_stats_served_from_snapshot_with_etag(client, mocker):
+    compute = mocker.spy(stats_utils, "compute_stats")
+
+    first = client.get("/stats")
+    second = client.get("/stats")
+
+    assert first.status_code == 200
+    assert first.json()["total_posts"] == 4
+    assert first.headers["Cache-Control"] == f"public, max-age={stats_utils.STATS_MAX_AGE_S}"
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert compute.call_count == 1
+
+    revalidated = client.get("/stats", headers = {"If-None-Match": first.headers["ETag"]})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+
+
+def test_stats_rebuilt_when_corpus_reloads(client, mocker):
+    etag = client.get("/stats").headers["ETag"]
+
+    mocker.patch.object(stats_utils, "get_bm25_posts", return_value = POSTS[:2])
+    reloaded = client.get("/stats", headers = {"If-None-Match": etag})
+
+    assert reloaded.status_code == 200
+    assert reloaded.json()["total_posts"] == 2
+
+
+def test_engine_is_shared(monkeypatch, tmp_path):
+    monkeypatch.setattr(db_utils, "_engine", None)
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'db.sqlite'}")
+
+    assert db_utils.get_engine() is db_utils.get_engine()
+
+    monkeypatch.delenv("DATABASE_URL")
+    with pytest.raises(ValueError):
+        db_utils.get_engine()
@@ -0,0 +1,93 @@
+import io
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from rank_bm25 import BM25Okapi
+
+from backend.src.api import bm25_utils, logging_utils
+from backend.src.api.logging_utils import TraceExporter, flush_logs, request_context, span
+
+
+@pytest.fixture
+def client(mocker):
+    from backend.src.api import main
+
+    posts = [{"location_name": "Kyoto, Japan", "content": "kyoto temples", "page_url": "https://example.com/kyoto"}]
+    mocker.patch.object(bm25_utils, "_cached_posts", posts)
+    mocker.patch.object(bm25_utils, "_cached_bm25", BM25Okapi([p["content"].split() for p in posts]))
+    with TestClient(main.app) as client:
+        yield client
+
+
+BODY = {"query": "kyoto", "retrieval": {"model": "bm25", "k": 1}}
+
+
+def test_request_id_is_echoed(client):
+    assert client.post("/search", json = BODY, headers = {"X-Request-ID": "req-42"}).headers["X-Request-ID"] == "req-42"
+    assert client.get("/health").headers["X-Request-ID"]
+
+
+def test_access_log_carries_the_request_context(client, mocker):
+    stream = io.StringIO()
+    mocker.patch.object(logging_utils._stream_handler, "stream", stream)
+
+    client.get("/health", headers = {"X-Request-ID": "req-9"})
+    flush_logs()
+
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    access = [line for line in lines if line["message"] == "Request processed"]
+    assert len(access) == 1
+    assert access[0]["request_id"] == "req-9"
+    assert len(access[0]["trace_id"]) == 32
+
+
+def test_module_loggers_include_request_id(mocker):
+    stream = io.StringIO()
+    mocker.patch.object(logging_utils._stream_handler, "stream", stream)
+
+    with request_context("req-7", "test"):
+        bm25_utils.logger.info("inside")
+    bm25_utils.logger.info("outside")
+    flush_logs()
+
+    inside, outside = (json.loads(line) for line in stream.getvalue().splitlines())
+    assert inside["request_id"] == "req-7"
+    assert len(inside["trace_id"]) == 32
+    assert "request_id" not in outside
+
+
+def test_spans_exported_as_otlp_json(client, monkeypatch, tmp_path):
+    path = tmp_path / "traces.jsonl"
+    exporter = TraceExporter(path = str(path))
+    monkeypatch.setattr(logging_utils, "_exporter", exporter)
+
+    client.post("/search", json = BODY, headers = {"X-Request-ID": "req-9"})
+    exporter.flush()
+
+    trace = json.loads(path.read_text().splitlines()[-1])
+    spans = {s["name"]: s for s in trace["resourceSpans"][0]["scopeSpans"][0]["spans"]}
+    root = spans["POST /search"]
+    assert root["kind"] == 2 and "parentSpanId" not in root
+    assert {"key": "request.id", "value": {"stringValue": "req-9"}} in root["attributes"]
+    # Stages in the threadpool nest under the retrieval span of the request
+    assert spans["retrieve"]["parentSpanId"] == root["spanId"]
+    assert spans["bm25_score"]["parentSpanId"] == spans["retrieve"]["spanId"]
+    assert spans["serialize"]["parentSpanId"] == root["spanId"]
+    assert len({s["traceId"] for s in spans.values()}) == 1
+
+
+def test_failed_span_records_error(monkeypatch):
+    exporter = TraceExporter()
+    monkeypatch.setattr(logging_utils, "_exporter", exporter)
+    exported = []
+    monkeypatch.setattr(exporter, "export", exported.append)
+
+    with pytest.raises(ValueError):
+        with request_context("req-1", "job"):
+            with span("step", attempt = 1):
+                raise ValueError("boom")
+
+    step = logging_utils.to_otlp(exported[0])["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+    assert step["status"]["code"] == 2
+    assert step["attributes"] == [{"key": "attempt", "value": {"intValue": "1"}}]
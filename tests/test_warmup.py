@@ -0,0 +1,108 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+from rank_bm25 import BM25Okapi
+
+from backend.src.api import bm25_utils
+from backend.src.api.warmup_utils import Warmup
+
+POSTS = [{"location_name": "Kyoto, Japan", "content": "kyoto temples", "page_url": "https://example.com/kyoto"}]
+
+
+def test_engines_warm_concurrently():
+    started = threading.Barrier(3, timeout = 5)
+    warmup = Warmup(required = ["bm25"])
+    warmup.register("bm25", started.wait)
+    warmup.register("faiss", started.wait)
+    warmup.register("encoder", started.wait)
+
+    # Each loader waits for the other two, so this only finishes if they overlap
+    warmup.run()
+
+    assert warmup.ready()
+    assert {engine["status"] for engine in warmup.snapshot()["engines"].values()} == {"ready"}
+
+
+def test_readiness_depends_on_required_engines():
+    def fail():
+        raise RuntimeError("artifact missing")
+
+    degraded = Warmup(required = ["bm25"])
+    degraded.register("bm25", lambda: None)
+    degraded.register("faiss", fail)
+    degraded.register("llm", None, enabled = False)
+    assert not degraded.ready()
+    degraded.run()
+
+    broken = Warmup(required = ["bm25", "faiss"])
+    broken.register("bm25", lambda: None)
+    broken.register("faiss", fail)
+    broken.run()
+
+    assert degraded.ready() and not broken.ready()
+    engines = degraded.snapshot()["engines"]
+    assert (engines["faiss"]["status"], engines["faiss"]["error"]) == ("failed", "artifact missing")
+    assert engines["llm"]["status"] == "disabled"
+
+
+def test_concurrent_first_requests_build_corpus_once(mocker):
+    mocker.patch.object(bm25_utils, "_cached_posts", None)
+    mocker.patch.object(bm25_utils, "_cached_bm25", None)
+    builds = []
+
+    def slow_load():
+        builds.append(1)
+        time.sleep(0.05)
+        bm25_utils._cached_bm25 = BM25Okapi([p["content"].split() for p in POSTS])
+        bm25_utils._cached_posts = POSTS
+
+    mocker.patch.object(bm25_utils, "_load_blogs_from_db", side_effect = slow_load)
+
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(lambda _: bm25_utils.search_bm25("kyoto", top_n = 1), range(8)))
+
+    assert len(builds) == 1
+    assert all(r[0]["country"] == "Japan" for r in results)
+
+
+def test_ready_while_optional_engine_loads():
+    release = threading.Event()
+    warmup = Warmup(required = ["bm25"])
+    warmup.register("bm25", lambda: None)
+    warmup.register("faiss", release.wait)
+    thread = warmup.start()
+
+    try:
+        deadline = time.monotonic() + 5
+        while warmup.engines["bm25"].status != "ready" and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert warmup.engines["faiss"].status == "loading"
+        assert warmup.ready()
+    finally:
+        release.set()
+        thread.join(timeout = 5)
+
+
+def test_livez_and_readyz(mocker):
+    from backend.src.api import main
+
+    release = threading.Event()
+    warmup = Warmup(required = ["bm25"])
+    warmup.register("bm25", release.wait)
+    mocker.patch.object(main, "warmup", warmup)
+
+    with TestClient(main.app) as client:
+        assert client.get("/livez").status_code == 200
+        loading = client.get("/readyz")
+        assert loading.status_code == 503
+        assert loading.json()["engines"]["bm25"]["status"] in ("pending", "loading")
+        assert client.get("/health").json()["status"].startswith("ok")
+
+        release.set()
+        warmup.start().join(timeout = 5)
+        ready = client.get("/readyz")
+
+    assert ready.status_code == 200
+    assert ready.json()["engines"]["bm25"]["duration_s"] >= 0